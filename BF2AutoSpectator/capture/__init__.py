@@ -0,0 +1,6 @@
+from .frame import Frame
+from .sources import ScreenSource, DesktopScreenSource, ReplayScreenSource, OBSScreenSource, get_screen_source, \
+    set_screen_source
+
+__all__ = ['Frame', 'ScreenSource', 'DesktopScreenSource', 'ReplayScreenSource', 'OBSScreenSource',
+           'get_screen_source', 'set_screen_source']
@@ -0,0 +1,116 @@
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Deque, Tuple, Optional
+
+from PIL import Image
+from numpy import ndarray
+
+from BF2AutoSpectator.common.classes import Singleton
+from BF2AutoSpectator.common.logger import logger
+
+
+class DebugScreenshotWriter(metaclass=Singleton):
+    """
+    Writes debug screenshots to disk in the background. Screenshots are sampled at a configurable rate and queued in
+    a bounded queue (dropping the oldest screenshots if the writer cannot keep up). Once the screenshots on disk exceed
+    the disk quota, the oldest ones are deleted.
+    """
+    directory: Optional[str] = None
+    sample_rate: float = 1.0
+    quota: int = 1000 * 1000 * 1000
+
+    queue: Deque[Tuple[datetime, ndarray]]
+    written: Deque[Tuple[str, int]]
+    written_size: int = 0
+    sample_budget: float = 0.0
+    dropped: int = 0
+
+    thread: Optional[threading.Thread] = None
+    condition: threading.Condition
+
+    def __init__(self, queue_size: int = 64):
+        self.queue = deque(maxlen=queue_size)
+        self.written = deque()
+        self.condition = threading.Condition()
+
+    def configure(self, directory: str, sample_rate: float, quota: int) -> None:
+        """
+        :param directory: directory to write screenshots to
+        :param sample_rate: fraction of screenshots to write (1.0 to write every screenshot)
+        :param quota: maximum number of bytes the screenshots may take up on disk
+        :return:
+        """
+        with self.condition:
+            self.directory = directory
+            self.sample_rate = sample_rate
+            self.quota = quota
+            self.written.clear()
+            self.written_size = 0
+
+            # Count any screenshots written by previous runs towards the quota
+            if os.path.isdir(directory):
+                paths = [
+                    os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                    if name.startswith('screenshot-')
+                ]
+                for path in paths:
+                    self.track(path)
+
+    def submit(self, image: ndarray) -> None:
+        """
+        Queue a screenshot to be written to disk (if it is sampled)
+        :param image: RGB or grayscale image (must not be modified afterwards)
+        :return:
+        """
+        with self.condition:
+            self.sample_budget += self.sample_rate
+            if self.sample_budget < 1.0:
+                return
+            self.sample_budget -= 1.0
+
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append((datetime.now(), image))
+            self.condition.notify()
+
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name='DebugScreenshotWriter', daemon=True)
+            self.thread.start()
+
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: len(self.queue) > 0)
+                taken_at, image = self.queue.popleft()
+                directory = self.directory if self.directory is not None else os.getcwd()
+
+            path = os.path.join(directory, f'screenshot-{taken_at.strftime("%Y-%m-%d-%H-%M-%S-%f")}.jpg')
+            try:
+                Image.fromarray(image).save(path)
+            except OSError as e:
+                logger.error(f'Failed to save screenshot to disk: {e}')
+                continue
+
+            with self.condition:
+                self.track(path)
+                self.enforce_quota()
+
+    def track(self, path: str) -> None:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+
+        self.written.append((path, size))
+        self.written_size += size
+
+    def enforce_quota(self) -> None:
+        while self.written_size > self.quota and len(self.written) > 0:
+            path, size = self.written.popleft()
+            self.written_size -= size
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.error(f'Failed to remove old screenshot from disk: {e}')
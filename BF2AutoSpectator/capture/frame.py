@@ -0,0 +1,116 @@
+import time
+import zlib
+from typing import Tuple, Optional, List, Dict
+
+import numpy as np
+from numpy import ndarray
+
+from BF2AutoSpectator.capture.planner import crop_to_box, contains
+
+
+class Frame:
+    """
+    Snapshot of a screen region (usually the game window's client area), taken once and then shared by any detectors
+    that need to look at the screen. Detectors crop the regions they need from the snapshot instead of taking
+    screenshots of their own, so all detections based on the same frame agree with each other.
+
+    Frames may also only contain parts of the region (e.g. when only some small regions are needed), in which case
+    only crops that lie within one of the parts are available.
+    """
+    region: Tuple[int, int, int, int]
+    parts: List[Tuple[Tuple[int, int, int, int], ndarray]]
+    captured_at: float
+    hashes: Dict[Tuple[Tuple[int, int, int, int], int], int]
+
+    def __init__(self, image: ndarray, region: Tuple[int, int, int, int], captured_at: Optional[float] = None):
+        """
+        :param image: RGB image, shape: (height, width, 3)
+        :param region: screen region the image was taken of, format: (left, top, width, height)
+        :param captured_at: time the image was taken at (defaults to now)
+        """
+        self.region = region
+        height, width, *_ = image.shape
+        self.parts = [((0, 0, width, height), image)]
+        self.captured_at = captured_at if captured_at is not None else time.time()
+        self.hashes = {}
+
+    @classmethod
+    def from_parts(cls, region: Tuple[int, int, int, int], parts: List[Tuple[Tuple[int, int, int, int], ndarray]],
+                   captured_at: Optional[float] = None) -> 'Frame':
+        """
+        Create a frame that only contains parts of a screen region
+        :param region: screen region the frame covers, format: (left, top, width, height)
+        :param parts: boxes within the region and their RGB images, box format: (left, top, right, bottom)
+        :param captured_at: time the parts were taken at (defaults to now)
+        :return:
+        """
+        frame = cls.__new__(cls)
+        frame.region = region
+        frame.parts = parts
+        frame.captured_at = captured_at if captured_at is not None else time.time()
+        frame.hashes = {}
+        return frame
+
+    @property
+    def image(self) -> ndarray:
+        if not self.is_complete():
+            raise ValueError('Frame only contains parts of the region')
+
+        box, image = self.parts[0]
+        return image
+
+    def is_complete(self) -> bool:
+        return len(self.parts) == 1 and self.parts[0][0] == (0, 0, *self.get_size())
+
+    def get_size(self) -> Tuple[int, int]:
+        left, top, width, height = self.region
+        return width, height
+
+    def get_age(self) -> float:
+        return time.time() - self.captured_at
+
+    def covers(self, crops: Optional[List[Tuple[int, int, int, int]]] = None) -> bool:
+        """
+        Check whether the frame contains all the given crops
+        :param crops: image crop tuples, format: (left, top, right, bottom) (None to check for a complete frame)
+        :return:
+        """
+        if crops is None:
+            return self.is_complete()
+
+        return all(self.find_part(crop_to_box(crop, self.get_size())) is not None for crop in crops)
+
+    def find_part(self, box: Tuple[int, int, int, int]) -> Optional[Tuple[Tuple[int, int, int, int], ndarray]]:
+        for part in self.parts:
+            if contains(part[0], box):
+                return part
+
+        return None
+
+    def crop(self, crop: Tuple[int, int, int, int]) -> ndarray:
+        """
+        Crop a region from the frame (returns a view, so the result must not be modified in place)
+        :param crop: image crop tuple (border to remove on each side), format: (left, top, right, bottom)
+        :return:
+        """
+        left, top, right, bottom = crop_to_box(crop, self.get_size())
+        part = self.find_part((left, top, right, bottom))
+        if part is None:
+            raise ValueError(f'Frame does not contain crop {crop}')
+
+        (part_left, part_top, *_), image = part
+        return image[top - part_top:bottom - part_top, left - part_left:right - part_left]
+
+    def get_region_hash(self, crop: Tuple[int, int, int, int], stride: int = 1) -> int:
+        """
+        Get a cheap hash of a region's content (cached per frame)
+        :param crop: image crop tuple (border to remove on each side), format: (left, top, right, bottom)
+        :param stride: only hash every n-th row and column (faster, but changes in skipped pixels go unnoticed)
+        :return:
+        """
+        key = crop, stride
+        if key not in self.hashes:
+            cropped = np.ascontiguousarray(self.crop(crop)[::stride, ::stride])
+            self.hashes[key] = zlib.crc32(repr(cropped.shape).encode(), zlib.crc32(cropped))
+
+        return self.hashes[key]
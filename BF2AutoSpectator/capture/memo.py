@@ -0,0 +1,55 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class RegionResultCache:
+    """
+    Size-bounded (LRU) cache for results of evaluating screen regions, keyed by the regions' content hashes
+    """
+    maxsize: int
+    results: 'OrderedDict[Hashable, Any]'
+    lock: threading.Lock
+
+    hits: int = 0
+    misses: int = 0
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self.lock:
+            if key not in self.results:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.results.move_to_end(key)
+            return self.results[key]
+
+    def put(self, key: Hashable, result: Any) -> None:
+        with self.lock:
+            self.results[key] = result
+            self.results.move_to_end(key)
+            while len(self.results) > self.maxsize:
+                self.results.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Get the cached result for the key or compute (and cache) it
+        :param key: cache key (should contain the content hash of any regions the result is based on)
+        :param compute: callable computing the result
+        :return:
+        """
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            self.put(key, result)
+
+        return result
+
+    def clear(self) -> None:
+        with self.lock:
+            self.results.clear()
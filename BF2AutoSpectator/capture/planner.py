@@ -0,0 +1,98 @@
+from typing import List, Tuple
+
+# Fixed cost of grabbing a region from the screen, expressed as the number of pixels that could be copied instead
+CAPTURE_OVERHEAD_PIXELS = 50000
+
+
+class CapturePlan:
+    """
+    Set of boxes to capture in order to be able to crop all requested regions from the captured boxes
+    """
+    size: Tuple[int, int]
+    boxes: List[Tuple[int, int, int, int]]
+
+    def __init__(self, size: Tuple[int, int], boxes: List[Tuple[int, int, int, int]]):
+        """
+        :param size: size of the area the boxes are located in, format: (width, height)
+        :param boxes: boxes to capture, format: (left, top, right, bottom)
+        """
+        self.size = size
+        self.boxes = boxes
+
+    def get_regions(self, origin: Tuple[int, int]) -> List[Tuple[int, int, int, int]]:
+        """
+        Get the screen regions to capture
+        :param origin: screen coordinates of the top left corner of the area the boxes are located in
+        :return: regions, format: (left, top, width, height)
+        """
+        origin_left, origin_top = origin
+        return [
+            (origin_left + left, origin_top + top, right - left, bottom - top)
+            for left, top, right, bottom in self.boxes
+        ]
+
+    def get_pixel_count(self) -> int:
+        return sum(get_area(box) for box in self.boxes)
+
+
+def crop_to_box(crop: Tuple[int, int, int, int], size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    """
+    Convert an image crop tuple to a box
+    :param crop: image crop tuple (border to remove on each side), format: (left, top, right, bottom)
+    :param size: size of the image the crop applies to, format: (width, height)
+    :return: box, format: (left, top, right, bottom)
+    """
+    width, height = size
+    left, top, right, bottom = crop
+    return left, top, width - right, height - bottom
+
+
+def get_area(box: Tuple[int, int, int, int]) -> int:
+    left, top, right, bottom = box
+    return max(right - left, 0) * max(bottom - top, 0)
+
+
+def get_union(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def contains(outer: Tuple[int, int, int, int], inner: Tuple[int, int, int, int]) -> bool:
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+
+def plan_capture(crops: List[Tuple[int, int, int, int]], size: Tuple[int, int],
+                 overhead: int = CAPTURE_OVERHEAD_PIXELS) -> CapturePlan:
+    """
+    Plan a minimal set of boxes to capture in order to be able to crop all given regions
+    :param crops: image crop tuples of the regions that are needed, format: (left, top, right, bottom)
+    :param size: size of the area the regions are located in, format: (width, height)
+    :param overhead: fixed cost of capturing a box in pixels (higher values lead to fewer, bigger boxes)
+    :return:
+    """
+    boxes: List[Tuple[int, int, int, int]] = []
+    for box in sorted({crop_to_box(crop, size) for crop in crops}, key=get_area, reverse=True):
+        # Skip any boxes that are contained by others
+        if not any(contains(other, box) for other in boxes):
+            boxes.append(box)
+
+    # Greedily merge the pair of boxes that saves the most, until merging no longer saves anything
+    while len(boxes) > 1:
+        best_saving, best_pair = 0, None
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                union = get_union(boxes[i], boxes[j])
+                # Merging saves one capture overhead, but may copy pixels that are not needed
+                saving = get_area(boxes[i]) + get_area(boxes[j]) + overhead - get_area(union)
+                if saving > best_saving:
+                    best_saving, best_pair = saving, (i, j)
+
+        if best_pair is None:
+            break
+
+        i, j = best_pair
+        union = get_union(boxes[i], boxes[j])
+        # Merged box may now also contain other boxes
+        boxes = [box for k, box in enumerate(boxes) if k not in best_pair and not contains(union, box)]
+        boxes.append(union)
+
+    return CapturePlan(size, boxes)
@@ -0,0 +1,205 @@
+from enum import Enum
+from functools import lru_cache
+from typing import Optional, List, Tuple
+
+import cv2
+import numpy as np
+from PIL import ImageColor
+from numpy import ndarray
+
+
+class ImageOperation(Enum):
+    invert = 1
+    solarize = 2
+    grayscale = 3
+    colorize = 4
+
+
+IDENTITY_LUT = np.arange(256, dtype=np.uint8)
+
+
+class CompiledImageOps:
+    """
+    Chain of image operations fused into a single lookup table pass (plus a grayscale conversion if needed)
+    """
+    grayscale: bool
+    lut: Optional[ndarray]
+
+    def __init__(self, grayscale: bool, lut: Optional[ndarray]):
+        """
+        :param grayscale: whether to convert images to grayscale before applying the lookup table
+        :param lut: lookup table to apply, shape: (256,) or (256, 3) (None if the chain does not map intensities)
+        """
+        self.grayscale = grayscale
+        self.lut = lut
+
+    def apply(self, image: ndarray) -> ndarray:
+        if self.grayscale and image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        elif self.lut is not None and self.lut.ndim == 2 and image.ndim == 3:
+            raise ValueError('Colorize requires a grayscale image')
+
+        if self.lut is not None:
+            image = apply_lut(image, self.lut)
+
+        return image
+
+
+def get_image_ops_signature(image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]]) -> tuple:
+    """
+    Get a hashable signature of a list of image operations
+    """
+    return tuple(
+        (method, tuple(sorted(args.items())) if args is not None else ())
+        for method, args in (image_ops if image_ops is not None else [])
+    )
+
+
+def compile_image_ops(image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]]) -> Optional[CompiledImageOps]:
+    """
+    Compile a list of image operations into a single lookup table pass (cached by the list's signature)
+    :param image_ops: List of image operation tuples, format: (operation, arguments)
+    :return: compiled image operations or None if the operations cannot be fused (e.g. grayscale after invert)
+    """
+    return _compile_image_ops_signature(get_image_ops_signature(image_ops))
+
+
+@lru_cache(maxsize=None)
+def _compile_image_ops_signature(signature: tuple) -> Optional[CompiledImageOps]:
+    grayscale = False
+    lut = IDENTITY_LUT
+    for method, args in signature:
+        args = dict(args)
+        if method is ImageOperation.grayscale:
+            # Converting to grayscale after mapping individual channels cannot be expressed as a lookup table
+            # (also ignore grayscale after grayscale)
+            if lut is not IDENTITY_LUT and not grayscale:
+                return None
+            grayscale = True
+        elif method is ImageOperation.colorize:
+            # Colorize maps single channel intensities, so it cannot be applied to a (colorized) RGB lookup table
+            if lut.ndim == 2:
+                return None
+            lut = colorize_lut(**args)[lut]
+        elif method is ImageOperation.invert:
+            lut = 255 - lut
+        elif method is ImageOperation.solarize:
+            lut = np.where(lut >= args.get('threshold', 128), 255 - lut, lut).astype(np.uint8)
+
+    return CompiledImageOps(grayscale, lut if lut is not IDENTITY_LUT else None)
+
+
+def apply_image_ops(image: ndarray, image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]]) -> ndarray:
+    """
+    Apply image operations to an image (behaves like the equivalent PIL ImageOps functions)
+    :param image: RGB or grayscale image to apply operations to (will not be modified, since it is usually a view
+    into a frame)
+    :param image_ops: List of image operation tuples, format: (operation, arguments)
+    :return: image with all operations applied
+    """
+    compiled = compile_image_ops(image_ops)
+    if compiled is not None:
+        return compiled.apply(image)
+
+    return apply_image_ops_sequentially(image, image_ops)
+
+
+def apply_image_ops_sequentially(image: ndarray,
+                                 image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]]) -> ndarray:
+    """
+    Apply image operations to an image one after another (fallback for operations that cannot be compiled)
+    :param image: RGB or grayscale image to apply operations to (will not be modified)
+    :param image_ops: List of image operation tuples, format: (operation, arguments)
+    :return: image with all operations applied
+    """
+    # Any operation that can work in place may only do so once the image is no longer a view into the original
+    owned = False
+    for method, args in image_ops if image_ops is not None else []:
+        args = args if args is not None else {}
+        if method is ImageOperation.invert:
+            image = cv2.bitwise_not(image, dst=image if owned else None)
+            owned = True
+        elif method is ImageOperation.solarize:
+            if not owned:
+                image = image.copy()
+                owned = True
+            np.subtract(255, image, out=image, where=image >= args.get('threshold', 128))
+        elif method is ImageOperation.grayscale:
+            if image.ndim == 3:
+                image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+                owned = True
+        elif method is ImageOperation.colorize:
+            if image.ndim == 3:
+                raise ValueError('Colorize requires a grayscale image')
+            image = apply_lut(image, colorize_lut(**args))
+            owned = True
+
+    return image
+
+
+def apply_lut(image: ndarray, lut: ndarray) -> ndarray:
+    """
+    Map image intensities via a lookup table
+    :param image: grayscale or RGB image
+    :param lut: lookup table with 256 entries per channel, shape: (256,) for a single channel or (256, 3) for RGB
+    (applying an RGB table to a grayscale image turns it into an RGB image)
+    :return:
+    """
+    if lut.ndim == 1:
+        return cv2.LUT(image, lut)
+
+    if image.ndim == 2:
+        image = cv2.merge([image, image, image])
+
+    return cv2.LUT(image, lut.reshape(256, 1, 3))
+
+
+def colorize_lut(black: str, white: str, mid: Optional[str] = None,
+                 blackpoint: int = 0, whitepoint: int = 255, midpoint: int = 127) -> ndarray:
+    """
+    Build the lookup table of PIL's ImageOps.colorize
+    :return: lookup table, shape: (256,) if all colors are shades of gray, else (256, 3)
+    """
+    colors = [ImageColor.getrgb(color) for color in [black, white] + ([mid] if mid is not None else [])]
+    black, white, *_ = colors
+    mid = colors[2] if len(colors) > 2 else None
+
+    lut = np.empty((256, 3), dtype=np.uint8)
+    lut[:blackpoint] = black
+    if mid is None:
+        length = whitepoint - blackpoint
+        steps = np.arange(length).reshape(-1, 1)
+        lut[blackpoint:whitepoint] = black + steps * (np.array(white) - black) // max(length, 1)
+    else:
+        lower, upper = midpoint - blackpoint, whitepoint - midpoint
+        lut[blackpoint:midpoint] = black + np.arange(lower).reshape(-1, 1) * (np.array(mid) - black) // max(lower, 1)
+        lut[midpoint:whitepoint] = mid + np.arange(upper).reshape(-1, 1) * (np.array(white) - mid) // max(upper, 1)
+    lut[whitepoint:] = white
+
+    # Stick to a single channel if colorizing does not actually add any color
+    if all(r == g == b for r, g, b in colors):
+        return np.ascontiguousarray(lut[:, 0])
+
+    return lut
+
+
+def get_difference_hash(image: ndarray, rows: int = 16, columns: int = 64, threshold: int = 8) -> int:
+    """
+    Calculate the perceptual difference hash (dHash) of an image: the image is downscaled to a grid, with the hash
+    noting for each grid cell whether it is notably brighter or darker than its left neighbour
+    (nearly identical images, e.g. with some compression noise, end up with the same hash)
+    :param image: grayscale or RGB image
+    :param rows: number of grid rows
+    :param columns: number of grid columns
+    :param threshold: minimum intensity difference between cells to be considered brighter/darker
+    (keeps noise in flat areas such as text backgrounds from changing the hash)
+    :return:
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+
+    cells = cv2.resize(image, (columns, rows), interpolation=cv2.INTER_AREA).astype(np.int16)
+    differences = cells[:, 1:] - cells[:, :-1]
+    bits = np.packbits([differences > threshold, differences < -threshold])
+
+    return int.from_bytes(bits.tobytes(), 'big')
@@ -0,0 +1,281 @@
+import bisect
+import io
+import json
+import os
+import threading
+import zipfile
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+from numpy import ndarray
+
+from BF2AutoSpectator.capture.processing import ImageOperation
+from BF2AutoSpectator.common.logger import logger
+
+RECORDING_INDEX_NAME = 'index.jsonl'
+RECORDING_CHUNK_NAME_FORMAT = 'chunk-{:06d}.zip'
+
+Verdict = Optional[Union[bool, int, float, str]]
+
+
+def serialize_image_ops(image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]]) -> Optional[list]:
+    if image_ops is None:
+        return None
+
+    return [[operation.name, args] for operation, args in image_ops]
+
+
+def deserialize_image_ops(data: Optional[list]) -> Optional[List[Tuple[ImageOperation, Optional[dict]]]]:
+    if data is None:
+        return None
+
+    return [(ImageOperation[name], args) for name, args in data]
+
+
+class RecordingEntry:
+    """
+    Index entry of a single recorded region
+    """
+    timestamp: float
+    region_key: str
+    resolution: str
+    crop: Tuple[int, int, int, int]
+    verdict: Verdict
+    text: Optional[str]
+    # Image operations the detector applied to the region (in serialized form)
+    image_ops: Optional[list]
+    chunk: str
+    name: str
+
+    def __init__(self, timestamp: float, region_key: str, resolution: str, crop: Tuple[int, int, int, int],
+                 verdict: Verdict, text: Optional[str], image_ops: Optional[list], chunk: str, name: str):
+        self.timestamp = timestamp
+        self.region_key = region_key
+        self.resolution = resolution
+        self.crop = crop
+        self.verdict = verdict
+        self.text = text
+        self.image_ops = image_ops
+        self.chunk = chunk
+        self.name = name
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'RecordingEntry':
+        return cls(
+            data['timestamp'],
+            data['region_key'],
+            data['resolution'],
+            tuple(data['crop']),
+            data.get('verdict'),
+            data.get('text'),
+            data.get('image_ops'),
+            data['chunk'],
+            data['name']
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            'timestamp': self.timestamp,
+            'region_key': self.region_key,
+            'resolution': self.resolution,
+            'crop': list(self.crop),
+            'verdict': self.verdict,
+            'text': self.text,
+            'image_ops': self.image_ops,
+            'chunk': self.chunk,
+            'name': self.name
+        }
+
+
+class RecordingWriter:
+    """
+    Records evaluated screen regions along with what the detectors made of them. Region images are written as PNGs to
+    zip archive chunks (in the background), while an index of all entries is appended to a JSON lines file. Regions
+    whose content did not change since they were last recorded re-use the already written image.
+    """
+    directory: str
+    chunk_size: int
+    queue_size: int
+
+    queue: Deque[Tuple[RecordingEntry, Optional[ndarray]]]
+    condition: threading.Condition
+    thread: Optional[threading.Thread] = None
+
+    chunk_index: int = 0
+    chunk_count: int = 0
+    image_count: int = 0
+    # Name of the image last written for a region key, along with the content hash of the region
+    last_images: Dict[str, Tuple[int, str, str]]
+    dropped: int = 0
+
+    def __init__(self, directory: str, chunk_size: int = 250, queue_size: int = 256):
+        """
+        :param directory: directory to write recording to (will be created if it does not exist)
+        :param chunk_size: number of images to write to each chunk
+        :param queue_size: number of entries to queue before dropping the oldest ones
+        """
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.queue_size = queue_size
+        # Not bounded by the deque itself, since dropping an entry may require handing its image over (see drop_oldest)
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.last_images = {}
+
+        os.makedirs(directory, exist_ok=True)
+
+        # Continue after any chunks written by previous sessions
+        while os.path.isfile(os.path.join(directory, RECORDING_CHUNK_NAME_FORMAT.format(self.chunk_index))):
+            self.chunk_index += 1
+
+    def record(self, image: ndarray, region_key: str, resolution: str, crop: Tuple[int, int, int, int],
+               timestamp: float, image_hash: int, verdict: Verdict = None, text: Optional[str] = None,
+               image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]] = None) -> None:
+        """
+        Queue a region to be recorded
+        :param image: image of the region (must not be modified afterwards)
+        :param region_key: key of the region, e.g. "ocr/eor-map-details"
+        :param resolution: resolution of the game window
+        :param crop: image crop tuple of region, format: (left, top, right, bottom)
+        :param timestamp: time the region was captured at
+        :param image_hash: content hash of the region (used to detect unchanged regions)
+        :param verdict: what the detector concluded from the region
+        :param text: OCR result for the region
+        :param image_ops: image operations the detector applied to the region
+        :return:
+        """
+        with self.condition:
+            last_hash, chunk, name = self.last_images.get(region_key, (None, None, None))
+            if last_hash == image_hash:
+                # Region did not change, so just reference the last image written for it
+                image = None
+            else:
+                if self.chunk_count >= self.chunk_size:
+                    self.chunk_index += 1
+                    self.chunk_count = 0
+                chunk = RECORDING_CHUNK_NAME_FORMAT.format(self.chunk_index)
+                name = f'{self.image_count:08d}.png'
+                self.last_images[region_key] = (image_hash, chunk, name)
+                self.chunk_count += 1
+                self.image_count += 1
+
+            entry = RecordingEntry(
+                timestamp, region_key, resolution, crop, verdict, text, serialize_image_ops(image_ops), chunk, name
+            )
+            self.queue.append((entry, image))
+            if len(self.queue) > self.queue_size:
+                self.drop_oldest()
+            self.condition.notify()
+
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name='RecordingWriter', daemon=True)
+            self.thread.start()
+
+    def drop_oldest(self) -> None:
+        """
+        Drop the oldest queued entry (must be called while holding the condition)
+        If the entry carries an image that queued entries of unchanged regions reference, the image is handed over to
+        the first of them instead of being dropped, so that no written entry references an image that was never written
+        :return:
+        """
+        dropped_entry, dropped_image = self.queue.popleft()
+        self.dropped += 1
+        if dropped_image is None:
+            return
+
+        for index, (entry, image) in enumerate(self.queue):
+            if entry.chunk == dropped_entry.chunk and entry.name == dropped_entry.name:
+                self.queue[index] = (entry, dropped_image)
+                return
+
+        # Make sure the next entry for the dropped region writes its image again
+        if self.last_images.get(dropped_entry.region_key, (None, None, None))[2] == dropped_entry.name:
+            del self.last_images[dropped_entry.region_key]
+
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: len(self.queue) > 0)
+                entry, image = self.queue.popleft()
+
+            try:
+                if image is not None:
+                    buffer = io.BytesIO()
+                    # Use fast compression, chunks are written while detectors are running
+                    Image.fromarray(image).save(buffer, format='PNG', compress_level=1)
+                    with zipfile.ZipFile(os.path.join(self.directory, entry.chunk), 'a') as archive:
+                        archive.writestr(entry.name, buffer.getvalue(), compress_type=zipfile.ZIP_STORED)
+
+                with open(os.path.join(self.directory, RECORDING_INDEX_NAME), 'a') as index:
+                    index.write(json.dumps(entry.to_dict()) + '\n')
+            except OSError as e:
+                logger.error(f'Failed to write recording entry to disk: {e}')
+
+
+class RecordingReader:
+    """
+    Provides random access to the entries of a recording, by time and/or by region key
+    """
+    directory: str
+    entries: List[RecordingEntry]
+    timestamps: List[float]
+    archives: Dict[str, zipfile.ZipFile]
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.archives = {}
+
+        with open(os.path.join(directory, RECORDING_INDEX_NAME), 'r') as index:
+            entries = [RecordingEntry.from_dict(json.loads(line)) for line in index if line.strip() != '']
+
+        # Entries are written in the order they were recorded, which may differ slightly from the capture order
+        self.entries = sorted(entries, key=lambda e: e.timestamp)
+        self.timestamps = [entry.timestamp for entry in self.entries]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def seek(self, timestamp: float) -> int:
+        """
+        Find the position of the first entry recorded at or after the given time
+        :param timestamp: time to seek to
+        :return: position of the entry (equal to the number of entries if there are no later entries)
+        """
+        return bisect.bisect_left(self.timestamps, timestamp)
+
+    def get_entries(self, region_key: Optional[str] = None, start: Optional[float] = None,
+                    end: Optional[float] = None) -> List[RecordingEntry]:
+        """
+        Get recorded entries, optionally filtered by region key and time
+        :param region_key: only return entries of this region key
+        :param start: only return entries recorded at or after this time
+        :param end: only return entries recorded before this time
+        :return:
+        """
+        first = self.seek(start) if start is not None else 0
+        last = self.seek(end) if end is not None else len(self.entries)
+
+        return [entry for entry in self.entries[first:last] if region_key is None or entry.region_key == region_key]
+
+    def get_region_keys(self) -> List[str]:
+        return sorted(set(entry.region_key for entry in self.entries))
+
+    def read_image(self, entry: RecordingEntry) -> ndarray:
+        """
+        Read the image of a recorded region
+        :param entry: entry to read the image of
+        :return: RGB or grayscale image
+        """
+        archive = self.archives.get(entry.chunk)
+        if archive is None:
+            archive = self.archives[entry.chunk] = zipfile.ZipFile(os.path.join(self.directory, entry.chunk))
+
+        with Image.open(io.BytesIO(archive.read(entry.name))) as image:
+            return np.asarray(image)
+
+    def close(self) -> None:
+        for archive in self.archives.values():
+            archive.close()
+        self.archives.clear()
@@ -0,0 +1,256 @@
+import io
+import os
+import zipfile
+from abc import ABC, abstractmethod
+from typing import Tuple, List, Optional, Callable
+
+import cv2
+import numpy as np
+from PIL import Image
+from numpy import ndarray
+
+REPLAY_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+# Region sets covering at most this share of the window are always grabbed losslessly at full resolution
+OBS_SMALL_REGION_SET_SHARE = .25
+
+
+class ScreenSource(ABC):
+    """
+    Source of screen contents. Any screenshot taken by the capture helpers goes through the active screen source.
+    """
+    @abstractmethod
+    def grab(self, region: Tuple[int, int, int, int]) -> ndarray:
+        """
+        Grab the current contents of a screen region
+        :param region: region to grab, format: (left, top, width, height)
+        :return: RGB image, shape: (height, width, 3)
+        """
+        pass
+
+    def grab_many(self, regions: List[Tuple[int, int, int, int]]) -> List[ndarray]:
+        """
+        Grab the current contents of multiple screen regions
+        :param regions: regions to grab, format: (left, top, width, height)
+        :return: RGB images, shape: (height, width, 3)
+        """
+        return [self.grab(region) for region in regions]
+
+    def close(self) -> None:
+        pass
+
+
+class DesktopScreenSource(ScreenSource):
+    """
+    Grabs screen contents from the live desktop (via GDI on Windows, via pyautogui elsewhere)
+    """
+    def grab(self, region: Tuple[int, int, int, int]) -> ndarray:
+        return self.grab_many([region])[0]
+
+    def grab_many(self, regions: List[Tuple[int, int, int, int]]) -> List[ndarray]:
+        if os.name != 'nt':
+            # Import here, since pyautogui requires a display to be importable
+            import pyautogui
+
+            return [np.asarray(pyautogui.screenshot(region=region).convert('RGB')) for region in regions]
+
+        # pyautogui screenshots always copy the entire screen and crop afterwards, which would cancel out the
+        # capture planner's boxes, so copy each region from the desktop device context on its own instead
+        # Import here, since the Windows modules are only available on Windows
+        import win32con
+        import win32gui
+        import win32ui
+
+        desktop = win32gui.GetDesktopWindow()
+        desktop_dc = win32gui.GetWindowDC(desktop)
+        source_dc = win32ui.CreateDCFromHandle(desktop_dc)
+        memory_dc = source_dc.CreateCompatibleDC()
+        images = []
+        try:
+            for left, top, width, height in regions:
+                bitmap = win32ui.CreateBitmap()
+                bitmap.CreateCompatibleBitmap(source_dc, width, height)
+                previous = memory_dc.SelectObject(bitmap)
+                memory_dc.BitBlt((0, 0), (width, height), source_dc, (left, top), win32con.SRCCOPY)
+                bgra = np.frombuffer(bitmap.GetBitmapBits(True), dtype=np.uint8).reshape((height, width, 4))
+                images.append(cv2.cvtColor(bgra, cv2.COLOR_BGRA2RGB))
+                memory_dc.SelectObject(previous)
+                win32gui.DeleteObject(bitmap.GetHandle())
+        finally:
+            memory_dc.DeleteDC()
+            source_dc.DeleteDC()
+            win32gui.ReleaseDC(desktop, desktop_dc)
+
+        return images
+
+
+class ReplayScreenSource(ScreenSource):
+    """
+    Serves previously recorded frames (of the game window's client area) from a directory or zip archive,
+    advancing by one frame each time the screen is grabbed
+    """
+    path: str
+    origin: Optional[Tuple[int, int]]
+    loop: bool
+
+    archive: Optional[zipfile.ZipFile] = None
+    names: List[str]
+    position: int = 0
+    __anchor: Tuple[int, int] = (0, 0)
+
+    def __init__(self, path: str, origin: Optional[Tuple[int, int]] = None, loop: bool = True):
+        """
+        :param path: path to directory or zip archive containing recorded frames (replayed in order of file names)
+        :param origin: screen coordinates the top left corner of the recorded frames is assumed to be at
+        (if not given, frames are anchored to the last grabbed region that is the same size as the frames)
+        :param loop: whether to start over after serving the last frame
+        """
+        self.path = path
+        self.origin = origin
+        self.loop = loop
+
+        if os.path.isdir(path):
+            names = os.listdir(path)
+        elif zipfile.is_zipfile(path):
+            self.archive = zipfile.ZipFile(path)
+            names = self.archive.namelist()
+        else:
+            raise ValueError(f'Replay path is neither a directory nor a zip archive: {path}')
+
+        self.names = sorted(name for name in names if name.lower().endswith(REPLAY_IMAGE_EXTENSIONS))
+        if len(self.names) == 0:
+            raise ValueError(f'Replay path does not contain any frames: {path}')
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def grab(self, region: Tuple[int, int, int, int]) -> ndarray:
+        return self.grab_many([region]).pop()
+
+    def grab_many(self, regions: List[Tuple[int, int, int, int]]) -> List[ndarray]:
+        # Serve all regions from the same frame
+        image = self.next_image()
+        origin_left, origin_top = self.get_origin(image, regions)
+        return [
+            image[top - origin_top:top - origin_top + height, left - origin_left:left - origin_left + width]
+            for left, top, width, height in regions
+        ]
+
+    def get_origin(self, image: ndarray, regions: List[Tuple[int, int, int, int]]) -> Tuple[int, int]:
+        if self.origin is not None:
+            return self.origin
+
+        height, width, *_ = image.shape
+        for left, top, region_width, region_height in regions:
+            if (region_width, region_height) == (width, height):
+                self.__anchor = left, top
+
+        return self.__anchor
+
+    def next_image(self) -> ndarray:
+        if self.position >= len(self.names):
+            if not self.loop:
+                raise EOFError('Reached end of replay')
+            self.position = 0
+
+        name = self.names[self.position]
+        self.position += 1
+
+        if self.archive is not None:
+            image = Image.open(io.BytesIO(self.archive.read(name)))
+        else:
+            image = Image.open(os.path.join(self.path, name))
+
+        return np.asarray(image.convert('RGB'))
+
+    def close(self) -> None:
+        if self.archive is not None:
+            self.archive.close()
+
+
+class OBSScreenSource(ScreenSource):
+    """
+    Grabs screen contents from screenshots of the OBS source capturing the game window
+    (source is expected to capture only the window's client area)
+    """
+    get_source_screenshot: Callable[[str, str, int, int, int], bytes]
+    source_name: str
+    get_window_region: Callable[[], Optional[Tuple[int, int, int, int]]]
+    image_format: str
+    scale: float
+    quality: int
+
+    def __init__(self, get_source_screenshot: Callable[[str, str, int, int, int], bytes], source_name: str,
+                 get_window_region: Callable[[], Optional[Tuple[int, int, int, int]]],
+                 image_format: str = 'png', scale: float = 1.0, quality: int = -1):
+        """
+        :param get_source_screenshot: function taking an encoded screenshot of an OBS source
+        (e.g. OBSClient.get_source_screenshot), arguments: source name, image format, width, height, quality
+        :param source_name: name of the OBS source capturing the game window
+        :param get_window_region: function returning the current screen region of the game window
+        :param image_format: image format OBS should use for larger region sets, e.g. "png" or "jpg"
+        :param scale: factor OBS should scale screenshots by for larger region sets (frames are scaled back up)
+        :param quality: compression quality (0-100, -1 for the format's default)
+        """
+        self.get_source_screenshot = get_source_screenshot
+        self.source_name = source_name
+        self.get_window_region = get_window_region
+        self.image_format = image_format
+        self.scale = scale
+        self.quality = quality
+
+    def grab(self, region: Tuple[int, int, int, int]) -> ndarray:
+        return self.grab_many([region]).pop()
+
+    def grab_many(self, regions: List[Tuple[int, int, int, int]]) -> List[ndarray]:
+        window_region = self.get_window_region()
+        if window_region is None:
+            raise ValueError('Cannot grab screen regions via OBS without a game window')
+
+        window_left, window_top, window_width, window_height = window_region
+        image_format, scale = self.get_screenshot_settings(regions, window_width * window_height)
+
+        # Serve all regions from the same screenshot
+        data = self.get_source_screenshot(
+            self.source_name,
+            image_format,
+            max(8, round(window_width * scale)),
+            max(8, round(window_height * scale)),
+            self.quality
+        )
+        with Image.open(io.BytesIO(data)) as screenshot:
+            image = np.asarray(screenshot.convert('RGB'))
+
+        # Coordinates/reference histograms are based on the native resolution, so scale any downscaled screenshot back up
+        if image.shape[:2] != (window_height, window_width):
+            image = cv2.resize(image, (window_width, window_height), interpolation=cv2.INTER_LINEAR)
+
+        return [
+            image[top - window_top:top - window_top + height, left - window_left:left - window_left + width]
+            for left, top, width, height in regions
+        ]
+
+    def get_screenshot_settings(self, regions: List[Tuple[int, int, int, int]], window_area: int) -> Tuple[str, float]:
+        """
+        Choose screenshot format and scale for a set of regions
+        :param regions: regions to grab, format: (left, top, width, height)
+        :param window_area: number of pixels in the game window
+        :return: image format and scale
+        """
+        # Small region sets are usually text for OCR, which does not hold up to lossy compression or scaling
+        if sum(width * height for *_, width, height in regions) <= window_area * OBS_SMALL_REGION_SET_SHARE:
+            return 'png', 1.0
+
+        return self.image_format, self.scale
+
+
+_screen_source: ScreenSource = DesktopScreenSource()
+
+
+def get_screen_source() -> ScreenSource:
+    return _screen_source
+
+
+def set_screen_source(screen_source: ScreenSource) -> None:
+    global _screen_source
+    _screen_source.close()
+    _screen_source = screen_source
@@ -0,0 +1,352 @@
+from concurrent.futures import Future
+from typing import Optional, Tuple, List, Union
+
+import cv2
+from PIL import Image
+from numpy import ndarray
+
+from BF2AutoSpectator.capture.debug import DebugScreenshotWriter
+from BF2AutoSpectator.capture.frame import Frame
+from BF2AutoSpectator.capture.planner import plan_capture
+from BF2AutoSpectator.capture.processing import ImageOperation, apply_image_ops, get_image_ops_signature, \
+    get_difference_hash
+from BF2AutoSpectator.capture.sources import get_screen_source
+from BF2AutoSpectator.common import constants
+from BF2AutoSpectator.common.config import Config
+from BF2AutoSpectator.common.logger import logger
+from BF2AutoSpectator.ocr import get_ocr_engine, get_ocr_result_cache, get_ocr_executor, get_ocr_profile, OCRResult
+from BF2AutoSpectator.ocr.batch import layout_batch, get_batch_ocr_config, assign_words
+
+
+def capture_region(region: Tuple[int, int, int, int]) -> Frame:
+    """
+    Take a screenshot of the specified screen region (via the active screen source)
+    :param region: region to take screenshot of, format: (left, top, width, height)
+    :return: frame containing the screenshot
+    """
+    return Frame(get_screen_source().grab(region), region)
+
+
+def capture_region_crops(region: Tuple[int, int, int, int], crops: List[Tuple[int, int, int, int]]) -> Frame:
+    """
+    Take screenshots of only the parts of the specified screen region that are required for the given crops
+    :param region: region to take screenshots in, format: (left, top, width, height)
+    :param crops: List of image crop tuples that need to be available, format: (left, top, right, bottom)
+    :return: frame containing the screenshots
+    """
+    left, top, width, height = region
+    plan = plan_capture(crops, (width, height))
+    images = get_screen_source().grab_many(plan.get_regions((left, top)))
+    return Frame.from_parts(region, list(zip(plan.boxes, images)))
+
+
+def submit_debug_screenshot(image: ndarray) -> None:
+    """
+    Queue a (processed) screenshot to be saved to the debug directory if debugging is enabled
+    :param image: screenshot to save
+    :return:
+    """
+    if Config().debug_screenshot():
+        DebugScreenshotWriter().submit(image)
+
+
+def process_frame(
+        frame: Frame,
+        image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]] = None,
+        crops: Optional[List[Tuple[int, int, int, int]]] = None,
+        show: bool = False
+) -> Union[ndarray, List[ndarray]]:
+    """
+    Crop regions from a frame and apply image operations to each crop
+    :param frame: frame to crop regions from
+    :param image_ops: List of image operation tuples, format: (operation, arguments)
+    :param crops: List of image crop tuples, format: (left, top, right, bottom)
+    :param show: whether to show the cropped images
+    :return:
+    """
+    results: List[ndarray] = []
+    # Apply zero-crop if no crops have been given
+    # (crops are views into the frame, image operations never modify the original screenshot)
+    for crop in crops if crops is not None else [(0, 0, 0, 0)]:
+        cropped = apply_image_ops(frame.crop(crop), image_ops)
+
+        if show:
+            Image.fromarray(cropped).show()
+
+        submit_debug_screenshot(cropped)
+
+        results.append(cropped)
+
+    # Return list of cropped screenshots if there are multiple, else return the sole result directly
+    return results if len(results) > 1 else results.pop()
+
+
+def screenshot_region(
+        region: Tuple[int, int, int, int],
+        image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]] = None,
+        crops: Optional[List[Tuple[int, int, int, int]]] = None,
+        show: bool = False
+) -> Tuple[Union[ndarray, List[ndarray]], ndarray]:
+    """
+    Take a screenshot of the specified screen region (wrapper for capture_region)
+    :param region: region to take screenshot of, format: (left, top, width, height)
+    :param image_ops: List of image operation tuples, format: (operation, arguments)
+    :param crops: List of image crop tuples, format: (left, top, right, bottom)
+    :param show: whether to show the screenshot
+    :return:
+    """
+    frame = capture_region(region)
+    return process_frame(frame, image_ops, crops, show), frame.image
+
+
+def image_to_string(image: ndarray, ocr_config: str, cache_key: Optional[tuple] = None,
+                    cache_max_distance: Optional[int] = None) -> str:
+    """
+    Extract text from an image (using the active OCR engine)
+    :param image: image to extract text from
+    :param ocr_config: config/parameters for Tesseract OCR (see https://guides.nyu.edu/tesseract/usage)
+    :param cache_key: key identifying the image's region and processing, if given, the OCR result is cached and re-used
+    for any perceptually (nearly) identical image of the same region
+    :param cache_max_distance: maximum number of bits the image's hash may differ from a cached hash (0 to only re-use
+    results of perceptually identical images, cache default if not given)
+    :return:
+    """
+    if cache_key is not None:
+        return get_ocr_result_cache().get_or_compute(
+            (*cache_key, ocr_config, image.shape),
+            get_difference_hash(image),
+            lambda: image_to_string(image, ocr_config),
+            cache_max_distance
+        )
+
+    # pytesseract stopped stripping \n\x0c from ocr results,
+    # returning raw results instead (https://github.com/madmaze/pytesseract/issues/297)
+    # so strip those characters as well as spaces after getting the result
+    ocr_result = get_ocr_engine().image_to_string(image, ocr_config).strip(' \n\x0c')
+
+    # Print ocr result if debugging is enabled
+    config = Config()
+    if config.debug_screenshot():
+        logger.debug(f'OCR result: {ocr_result}')
+
+    return ocr_result.lower()
+
+
+def image_to_result(image: ndarray, ocr_config: str, cache_key: Optional[tuple] = None,
+                    cache_max_distance: Optional[int] = None) -> OCRResult:
+    """
+    Extract text along with the confidence of each word from an image (using the active OCR engine)
+    :param image: image to extract text from
+    :param ocr_config: config/parameters for Tesseract OCR (see https://guides.nyu.edu/tesseract/usage)
+    :param cache_key: key identifying the image's region and processing, if given, the OCR result is cached and re-used
+    for any perceptually (nearly) identical image of the same region
+    :param cache_max_distance: maximum number of bits the image's hash may differ from a cached hash (0 to only re-use
+    results of perceptually identical images, cache default if not given)
+    :return:
+    """
+    if cache_key is not None:
+        return get_ocr_result_cache().get_or_compute(
+            (*cache_key, 'result', ocr_config, image.shape),
+            get_difference_hash(image),
+            lambda: image_to_result(image, ocr_config),
+            cache_max_distance
+        )
+
+    raw_result = get_ocr_engine().image_to_result(image, ocr_config)
+    ocr_result = OCRResult(raw_result.text.strip(' \n\x0c'), raw_result.words)
+
+    # Print ocr result if debugging is enabled
+    config = Config()
+    if config.debug_screenshot():
+        logger.debug(f'OCR result: {ocr_result}')
+
+    return ocr_result.lower()
+
+
+def images_to_strings(images: List[ndarray], ocr_config: str, cache_key: Optional[tuple] = None,
+                      cache_max_distance: Optional[int] = None) -> List[str]:
+    """
+    Extract text from multiple (single line) images by running them through OCR as a single batch
+    :param images: images to extract text from (must all be grayscale or all be RGB)
+    :param ocr_config: config/parameters for Tesseract OCR used for individual images
+    :param cache_key: key identifying the images' region and processing, if given, OCR results are cached and re-used
+    for any perceptually (nearly) identical image of the same region
+    :param cache_max_distance: maximum number of bits an image's hash may differ from a cached hash (cache default if
+    not given)
+    :return:
+    """
+    ocr_results: List[Optional[str]] = [None for _ in images]
+    hashes: List[Optional[int]] = [None for _ in images]
+    # Only batch images whose results are not cached
+    if cache_key is not None:
+        for i, image in enumerate(images):
+            hashes[i] = get_difference_hash(image)
+            ocr_results[i] = get_ocr_result_cache().get(
+                (*cache_key, ocr_config, image.shape), hashes[i], cache_max_distance
+            )
+
+    pending = [i for i, ocr_result in enumerate(ocr_results) if ocr_result is None]
+    if len(pending) == 1:
+        ocr_results[pending[0]] = image_to_string(images[pending[0]], ocr_config)
+    elif len(pending) > 1:
+        canvas, bands = layout_batch([images[i] for i in pending])
+        words = get_ocr_engine().image_to_words(canvas, get_batch_ocr_config(ocr_config))
+        for i, ocr_result in zip(pending, assign_words(words, bands)):
+            ocr_results[i] = ocr_result.strip(' \n\x0c').lower()
+
+    if cache_key is not None:
+        for i in pending:
+            get_ocr_result_cache().put((*cache_key, ocr_config, images[i].shape), hashes[i], ocr_results[i])
+
+    # Print ocr results if debugging is enabled
+    config = Config()
+    if config.debug_screenshot():
+        logger.debug(f'OCR results: {ocr_results}')
+
+    return ocr_results
+
+
+# Run regions of an already taken screenshot through OCR
+def ocr_frame_region(
+        frame: Frame,
+        image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]] = None,
+        crops: Optional[List[Tuple[int, int, int, int]]] = None,
+        show: bool = False, ocr_config: str = r'--oem 3 --psm 7', cache_key: Optional[str] = None,
+        batch: bool = False, cache_max_distance: Optional[int] = None
+) -> Union[str, List[str]]:
+    result = process_frame(frame, image_ops, crops, show)
+    # Processing is part of the cache key, since the same region might be processed differently
+    image_cache_key = (cache_key, get_image_ops_signature(image_ops)) if cache_key is not None else None
+
+    if isinstance(result, ndarray):
+        return image_to_string(result, ocr_config, image_cache_key, cache_max_distance)
+
+    # Run all crops through OCR at once if requested
+    if batch:
+        return images_to_strings(result, ocr_config, image_cache_key, cache_max_distance)
+
+    # Run crops through OCR concurrently
+    return get_ocr_executor().map(
+        lambda cropped: image_to_string(cropped, ocr_config, image_cache_key, cache_max_distance),
+        result
+    )
+
+
+def submit_ocr_frame_region(
+        frame: Frame,
+        image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]] = None,
+        crops: Optional[List[Tuple[int, int, int, int]]] = None,
+        show: bool = False, ocr_config: str = r'--oem 3 --psm 7', cache_key: Optional[str] = None,
+        batch: bool = False, cache_max_distance: Optional[int] = None
+) -> 'Future[Union[str, List[str]]]':
+    """
+    Submit regions of an already taken screenshot to be run through OCR on the OCR executor
+    (see ocr_frame_region for parameters)
+    :return: future of the OCR result(s)
+    """
+    return get_ocr_executor().submit(
+        ocr_frame_region, frame, image_ops, crops, show, ocr_config, cache_key, batch, cache_max_distance
+    )
+
+
+# Take a screenshot of the given region and run the result through OCR
+def ocr_screenshot_region(
+        region: Tuple[int, int, int, int],
+        image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]] = None,
+        crops: Optional[List[Tuple[int, int, int, int]]] = None,
+        show: bool = False, ocr_config: str = r'--oem 3 --psm 7'
+) -> Union[str, List[str]]:
+    frame = capture_region(region) if crops is None else capture_region_crops(region, crops)
+    return ocr_frame_region(frame, image_ops, crops, show, ocr_config)
+
+
+def submit_ocr_screenshot_region(
+        region: Tuple[int, int, int, int],
+        image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]] = None,
+        crops: Optional[List[Tuple[int, int, int, int]]] = None,
+        show: bool = False, ocr_config: str = r'--oem 3 --psm 7'
+) -> 'Future[Union[str, List[str]]]':
+    """
+    Take a screenshot of the given region right away and submit it to be run through OCR on the OCR executor
+    (see ocr_screenshot_region for parameters)
+    :return: future of the OCR result(s)
+    """
+    frame = capture_region(region) if crops is None else capture_region_crops(region, crops)
+    return submit_ocr_frame_region(frame, image_ops, crops, show, ocr_config)
+
+
+def get_ocr_cache_max_distance(key: str) -> Optional[int]:
+    """
+    Get the maximum number of bits the hash of a region's image may differ from a cached hash to re-use the OCR result
+    (a single changed character of free text, e.g. a game message, may only change a few bits of the hash, so results
+    are only re-used for perceptually identical images unless the region has a fixed vocabulary, e.g. a label)
+    :param key: key of region in coordinates dict
+    :return: 0 for free text regions, None (cache default) for regions with a fixed vocabulary
+    """
+    return None if len(get_ocr_profile(key).vocabulary) > 0 else 0
+
+
+def ocr_game_window_frame_region(
+        frame: Frame, resolution: str, key: str,
+        image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]] = None,
+        show: bool = False, ocr_config: str = r'--oem 3 --psm 7', batch: bool = False
+) -> Union[str, List[str]]:
+    """
+    Run a region of a game window frame through OCR (wrapper for ocr_frame_region)
+    :param frame: game window frame to crop region from
+    :param resolution: resolution to get/use coordinates for
+    :param key: key of region in coordinates dict
+    :param image_ops: List of image operation tuples, format: (operation, arguments)
+    :param show: whether to show the screenshot
+    :param ocr_config: config/parameters for Tesseract OCR (see https://guides.nyu.edu/tesseract/usage)
+    :param batch: whether to run all crops of the region through OCR at once
+    :return:
+    """
+    return ocr_frame_region(
+        frame,
+        image_ops,
+        constants.COORDINATES[resolution]['ocr'][key],
+        show,
+        ocr_config,
+        cache_key=f'{resolution}/{key}',
+        batch=batch,
+        cache_max_distance=get_ocr_cache_max_distance(key)
+    )
+
+
+def ocr_game_window_frame_region_result(
+        frame: Frame, resolution: str, key: str,
+        image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]] = None,
+        ocr_config: str = r'--oem 3 --psm 7'
+) -> OCRResult:
+    """
+    Run a (single crop) region of a game window frame through OCR, keeping the confidence of each word
+    :param frame: game window frame to crop region from
+    :param resolution: resolution to get/use coordinates for
+    :param key: key of region in coordinates dict
+    :param image_ops: List of image operation tuples, format: (operation, arguments)
+    :param ocr_config: config/parameters for Tesseract OCR (see https://guides.nyu.edu/tesseract/usage)
+    :return:
+    """
+    image = process_frame(frame, image_ops, constants.COORDINATES[resolution]['ocr'][key][:1])
+    return image_to_result(
+        image,
+        ocr_config,
+        (f'{resolution}/{key}', get_image_ops_signature(image_ops)),
+        get_ocr_cache_max_distance(key)
+    )
+
+
+def histogram_frame_region(frame: Frame, crop: Tuple[int, int, int, int]) -> ndarray:
+    return calc_cv2_hist(process_frame(frame, crops=[crop]))
+
+
+def calc_cv2_hist(image: ndarray) -> ndarray:
+    # Calculate histogram of the blue channel (images are RGB, so no need to convert them to BGR first)
+    histogram = cv2.calcHist([image], [2], None, [256], [0, 256])
+
+    return histogram
+
+
+def calc_cv2_hist_delta(a: ndarray, b: ndarray) -> float:
+    return cv2.compareHist(a, b, cv2.HISTCMP_BHATTACHARYYA)
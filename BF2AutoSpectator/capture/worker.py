@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional, Tuple, Deque, List
+
+from BF2AutoSpectator.capture.frame import Frame
+from BF2AutoSpectator.capture.sources import get_screen_source
+from BF2AutoSpectator.common.logger import logger
+
+
+class CaptureWorker:
+    """
+    Continuously captures a screen region in the background, keeping a bounded ring buffer of recent frames
+    """
+    get_region: Callable[[], Optional[Tuple[int, int, int, int]]]
+    rate: float
+    frames: Deque[Frame]
+
+    thread: Optional[threading.Thread] = None
+    stopped: threading.Event
+    condition: threading.Condition
+
+    def __init__(self, get_region: Callable[[], Optional[Tuple[int, int, int, int]]], rate: float,
+                 buffer_size: int):
+        """
+        :param get_region: callable returning the region to capture, format: (left, top, width, height)
+        (or None if there currently is nothing to capture)
+        :param rate: number of frames to capture per second
+        :param buffer_size: number of recent frames to keep
+        """
+        self.get_region = get_region
+        self.rate = rate
+        self.frames = deque(maxlen=buffer_size)
+        self.stopped = threading.Event()
+        self.condition = threading.Condition()
+
+    def start(self) -> None:
+        if self.thread is not None and self.thread.is_alive():
+            return
+
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, name='CaptureWorker', daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def get_interval(self) -> float:
+        return 1 / self.rate
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            started = time.time()
+            region = self.get_region()
+            if region is not None:
+                try:
+                    frame = Frame(get_screen_source().grab(region), region, started)
+                    with self.condition:
+                        self.frames.append(frame)
+                        self.condition.notify_all()
+                except Exception as e:
+                    logger.error(f'Failed to capture frame in background: {e}')
+                    # Window is probably gone, start over with an empty buffer once it is back
+                    self.clear()
+
+            self.stopped.wait(max(self.get_interval() - (time.time() - started), 0))
+
+    def clear(self) -> None:
+        with self.condition:
+            self.frames.clear()
+
+    def get_latest(self, max_age: Optional[float] = None) -> Optional[Frame]:
+        """
+        Get the most recently captured frame
+        :param max_age: maximum age of the frame in seconds
+        :return: latest frame or None if there is no (sufficiently recent) frame
+        """
+        with self.condition:
+            if len(self.frames) == 0:
+                return None
+            frame = self.frames[-1]
+
+        if max_age is not None and frame.get_age() > max_age:
+            return None
+
+        return frame
+
+    def wait_for_frame(self, after: float, timeout: Optional[float] = None) -> Optional[Frame]:
+        """
+        Wait for a frame that was captured after the given point in time
+        :param after: timestamp the frame needs to have been captured after
+        :param timeout: maximum number of seconds to wait (defaults to two capture intervals)
+        :return: first frame captured after the timestamp or None if no such frame was captured in time
+        """
+        with self.condition:
+            self.condition.wait_for(
+                lambda: len(self.frames) > 0 and self.frames[-1].captured_at > after,
+                timeout=timeout if timeout is not None else self.get_interval() * 2
+            )
+            if len(self.frames) > 0 and self.frames[-1].captured_at > after:
+                return self.frames[-1]
+
+        return None
+
+    def get_recent(self, count: int, spacing: float = 0.0, after: Optional[float] = None) -> List[Frame]:
+        """
+        Get recent frames that are (at least) a given number of seconds apart
+        :param count: number of frames to get
+        :param spacing: minimum number of seconds between the frames
+        :param after: timestamp the frames need to have been captured after
+        :return: up to count frames, ordered from oldest to newest
+        """
+        with self.condition:
+            frames = list(self.frames)
+
+        selected: List[Frame] = []
+        for frame in reversed(frames):
+            if len(selected) == count or after is not None and frame.captured_at <= after:
+                break
+            if len(selected) == 0 or selected[-1].captured_at - frame.captured_at >= spacing:
+                selected.append(frame)
+
+        return list(reversed(selected))
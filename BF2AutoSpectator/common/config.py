@@ -20,6 +20,14 @@ class Config(metaclass=Singleton):
 
     __game_path: str
     __tesseract_path: str
+    __ocr_engine: str
+    __ocr_model: str
+    __ocr_model_path: Optional[str]
+    __ocr_workers: int
+    __concurrent_checks: bool
+    __label_templates_path: Optional[str]
+    __calibrate_ink_gate: bool
+    __histogram_subsampling: str
     __limit_rtl: bool
     __instance_rtl: int
     __map_load_delay: int
@@ -30,7 +38,17 @@ class Config(metaclass=Singleton):
     __obs_url: str
 
     __resolution: str
+    __capture_source: str
+    __replay_path: Optional[str]
+    __obs_source_name: Optional[str]
+    __obs_capture_format: str
+    __obs_capture_scale: float
+    __capture_rate: float
+    __capture_buffer_size: int
+    __record_path: Optional[str]
     __debug_screenshot: bool
+    __debug_screenshot_sample_rate: float
+    __debug_screenshot_quota: int
 
     __min_iterations_on_player: int
     __max_iterations_on_player: int
@@ -42,8 +60,15 @@ class Config(metaclass=Singleton):
 
     def set_options(self, player_name: str, player_pass: str, server_ip: str, server_port: str, server_pass: str,
                     server_mod: str, game_path: str, tesseract_path: str, limit_rtl: bool, instance_rtl: int, map_load_delay: int,
+                    ocr_engine: str, ocr_model: str, ocr_model_path: Optional[str], ocr_workers: int,
+                    concurrent_checks: bool,
+                    label_templates_path: Optional[str], calibrate_ink_gate: bool,
+                    histogram_subsampling: str,
                     use_controller: bool, controller_base_uri: str, control_obs: bool, obs_url: str,
-                    resolution: str, debug_screenshot: bool,
+                    resolution: str, capture_source: str, replay_path: Optional[str],
+                    obs_source_name: Optional[str], obs_capture_format: str, obs_capture_scale: float, capture_rate: float,
+                    capture_buffer_size: int, record_path: Optional[str], debug_screenshot: bool,
+                    debug_screenshot_sample_rate: float, debug_screenshot_quota: int,
                     min_iterations_on_player: int, max_iterations_on_player: int,
                     max_iterations_on_default_camera_view: int, lockup_iterations_on_spawn_menu: int):
         self.__player_name = player_name
@@ -55,6 +80,14 @@ class Config(metaclass=Singleton):
 
         self.__game_path = game_path
         self.__tesseract_path = tesseract_path
+        self.__ocr_engine = ocr_engine
+        self.__ocr_model = ocr_model
+        self.__ocr_model_path = ocr_model_path
+        self.__ocr_workers = ocr_workers
+        self.__concurrent_checks = concurrent_checks
+        self.__label_templates_path = label_templates_path
+        self.__calibrate_ink_gate = calibrate_ink_gate
+        self.__histogram_subsampling = histogram_subsampling
         self.__limit_rtl = limit_rtl
         self.__instance_rtl = instance_rtl
         self.__map_load_delay = map_load_delay
@@ -65,8 +98,18 @@ class Config(metaclass=Singleton):
         self.__obs_url = obs_url
 
         self.__resolution = resolution
+        self.__capture_source = capture_source
+        self.__replay_path = replay_path
+        self.__obs_source_name = obs_source_name
+        self.__obs_capture_format = obs_capture_format
+        self.__obs_capture_scale = obs_capture_scale
+        self.__capture_rate = capture_rate
+        self.__capture_buffer_size = capture_buffer_size
+        self.__record_path = record_path
 
         self.__debug_screenshot = debug_screenshot
+        self.__debug_screenshot_sample_rate = debug_screenshot_sample_rate
+        self.__debug_screenshot_quota = debug_screenshot_quota
 
         self.__min_iterations_on_player = min_iterations_on_player
         self.__max_iterations_on_player = max_iterations_on_player
@@ -118,6 +161,34 @@ class Config(metaclass=Singleton):
     def get_tesseract_path(self) -> str:
         return self.__tesseract_path
 
+    def get_ocr_engine(self) -> str:
+        return self.__ocr_engine
+
+    def set_ocr_model(self, ocr_model: str, ocr_model_path: Optional[str]) -> None:
+        self.__ocr_model = ocr_model
+        self.__ocr_model_path = ocr_model_path
+
+    def get_ocr_model(self) -> str:
+        return self.__ocr_model
+
+    def get_ocr_model_path(self) -> Optional[str]:
+        return self.__ocr_model_path
+
+    def get_ocr_workers(self) -> int:
+        return self.__ocr_workers
+
+    def concurrent_checks(self) -> bool:
+        return self.__concurrent_checks
+
+    def get_label_templates_path(self) -> Optional[str]:
+        return self.__label_templates_path
+
+    def calibrate_ink_gate(self) -> bool:
+        return self.__calibrate_ink_gate
+
+    def get_histogram_subsampling(self) -> str:
+        return self.__histogram_subsampling
+
     def limit_rtl(self) -> bool:
         return self.__limit_rtl
 
@@ -142,12 +213,42 @@ class Config(metaclass=Singleton):
     def get_resolution(self) -> str:
         return self.__resolution
 
+    def get_capture_source(self) -> str:
+        return self.__capture_source
+
+    def get_replay_path(self) -> Optional[str]:
+        return self.__replay_path
+
+    def get_capture_rate(self) -> float:
+        return self.__capture_rate
+
+    def get_obs_source_name(self) -> Optional[str]:
+        return self.__obs_source_name
+
+    def get_obs_capture_format(self) -> str:
+        return self.__obs_capture_format
+
+    def get_obs_capture_scale(self) -> float:
+        return self.__obs_capture_scale
+
+    def get_capture_buffer_size(self) -> int:
+        return self.__capture_buffer_size
+
+    def get_record_path(self) -> Optional[str]:
+        return self.__record_path
+
     def debug_screenshot(self) -> bool:
         return self.__debug_screenshot
 
     def set_debug_screenshot(self, debug_screenshot: bool) -> None:
         self.__debug_screenshot = debug_screenshot
 
+    def get_debug_screenshot_sample_rate(self) -> float:
+        return self.__debug_screenshot_sample_rate
+
+    def get_debug_screenshot_quota(self) -> int:
+        return self.__debug_screenshot_quota
+
     def get_min_iterations_on_player(self) -> int:
         return self.__min_iterations_on_player
 
@@ -7,6 +7,9 @@ WINDOW_TITLE_BAR_HEIGHT = 31
 WINDOW_SHADOW_SIZE = 8
 HISTCMP_MAX_DELTA = 0.2
 DEFAULT_CAMERA_VIEW_HISTCMP_MAX_DELTA = 0.175
+# Subsampling factors of histogram regions by region key (or prefix), only used if histogram subsampling is enabled
+# (validate factors against recordings via BF2AutoSpectator.tools.validate_histogram_subsampling before adding any)
+HISTOGRAM_SUBSAMPLING_FACTORS = {}
 PLAYER_ROTATION_PAUSE_DURATION = 5
 TEAMS_SPAWN_MENU_LEFT = ['usmc', 'eu', 'navy-seal', 'sas', 'rebels-left', 'spetsnaz-left', 'peglegs', 'canada-left',
                          'russia-left']
@@ -0,0 +1,140 @@
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import jellyfish
+
+MAP_NAME_REGEX_NvN = re.compile(r'(\d+).?v.?(\d+)')
+MAP_NAME_REGEX_SEPARATORS = re.compile(r'[_.\s]')
+MAP_NAME_REGEX_EXTRA = re.compile(r'[\'()]')
+MAP_NAME_REGEX_MULTI = re.compile(r'[-]{2,}')
+# Pairs of characters OCR commonly confuses in map names (e.g. q read as g, i read as t or a trailing e read as colon)
+OCR_CONFUSABLE_CHARACTERS = {frozenset(pair) for pair in ['0o', '1l', '1i', 'il', 'gq', 'it', '5s', '8b', 'ce', 'e:',
+                                                           'uv', '2z']}
+# Minimum distance the runner-up needs to be further away from a name than the closest known name
+MIN_RUNNER_UP_MARGIN = 2
+
+
+class BKTreeNode:
+    name: str
+    children: Dict[int, 'BKTreeNode']
+
+    def __init__(self, name: str):
+        self.name = name
+        self.children = {}
+
+
+class MapNameIndex:
+    """
+    Index of known map names for resolving (slightly) misread map names in a single lookup
+    (BK-tree over the Levenshtein distance between names)
+    """
+    names: Set[str]
+    root: Optional[BKTreeNode] = None
+
+    def __init__(self, names: Iterable[str]):
+        self.names = set()
+        for name in names:
+            self.add(name)
+
+    def add(self, name: str) -> None:
+        if name in self.names:
+            return
+
+        self.names.add(name)
+        if self.root is None:
+            self.root = BKTreeNode(name)
+            return
+
+        node = self.root
+        while True:
+            distance = jellyfish.levenshtein_distance(name, node.name)
+            if distance not in node.children:
+                node.children[distance] = BKTreeNode(name)
+                return
+            node = node.children[distance]
+
+    def search(self, name: str, max_distance: int) -> List[Tuple[int, str]]:
+        """
+        Find all known names within a maximum distance of a name
+        :param name: name to search for
+        :param max_distance: maximum Levenshtein distance
+        :return: matching names along with their distance, closest first
+        """
+        if self.root is None:
+            return []
+
+        matches = []
+        nodes = [self.root]
+        while len(nodes) > 0:
+            node = nodes.pop()
+            distance = jellyfish.levenshtein_distance(name, node.name)
+            if distance <= max_distance:
+                matches.append((distance, node.name))
+
+            # Triangle inequality: only children within the distance band can be within max distance of the name
+            nodes.extend(
+                child for child_distance, child in node.children.items()
+                if distance - max_distance <= child_distance <= distance + max_distance
+            )
+
+        return sorted(matches)
+
+    def lookup(self, name: str) -> Tuple[Optional[str], float]:
+        """
+        Resolve a (possibly misread) name to the closest known name
+        (a name is only resolved to a different known name if it differs from it by OCR-confusable substitutions only
+        and it is clearly closer to it than to any other known name, since unknown maps often only differ from known
+        ones by a suffix, e.g. strike-at-karkand-2/strike-at-karkand)
+        :param name: name to resolve
+        :return: closest known name and similarity score (1.0 for an exact match), None and 0.0 if no known name is
+        sufficiently close (by confusable substitutions only) or the closest known names are not clearly distinct
+        """
+        if name in self.names:
+            return name, 1.0
+
+        # Allow about one error per six characters, but never more than three
+        # (several maps only differ by a suffix or a few characters, e.g. wake-island-2007/wake-island-1707)
+        max_distance = max(1, min(3, len(name) // 6))
+        matches = self.search(name, max_distance + MIN_RUNNER_UP_MARGIN)
+        if len(matches) == 0 or matches[0][0] > max_distance:
+            return None, 0.0
+
+        distance, match = matches[0]
+        if len(matches) > 1 and matches[1][0] - distance < MIN_RUNNER_UP_MARGIN:
+            return None, 0.0
+        if not is_confusable_substitution(name, match):
+            return None, 0.0
+
+        return match, 1.0 - distance / max(len(name), len(match))
+
+
+def is_confusable_substitution(name: str, other: str) -> bool:
+    """
+    Check whether two names only differ by characters OCR commonly confuses
+    :param name: name as read via OCR
+    :param other: known name
+    :return: True if the names are the same length and all differing characters are confusable, else False
+    """
+    if len(name) != len(other):
+        return False
+
+    return all(a == b or frozenset((a, b)) in OCR_CONFUSABLE_CHARACTERS for a, b in zip(name, other))
+
+
+def clean_map_name(ocr_result: str) -> str:
+    """
+    Turn a map name as displayed in game (or rather, read via OCR) into the format used for map keys
+    :param ocr_result: map name as read via OCR, e.g. "Dalian Plant"
+    :return: cleaned map name, e.g. "dalian-plant"
+    """
+    # Make sure any weird OCR result for 2v2/NvN maps are turned into just NvN
+    ocr_result = MAP_NAME_REGEX_NvN.sub('\\1v\\2', ocr_result)
+    # Replace spaces/underscores/dots with dashes
+    ocr_result = MAP_NAME_REGEX_SEPARATORS.sub('-', ocr_result)
+    # Remove any other special characters
+    ocr_result = MAP_NAME_REGEX_EXTRA.sub('', ocr_result)
+    # "Merge" multiple dashes into one
+    ocr_result = MAP_NAME_REGEX_MULTI.sub('-', ocr_result)
+
+    # Convert to lower case
+    return ocr_result.lower()
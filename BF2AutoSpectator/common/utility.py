@@ -2,28 +2,28 @@ import ctypes
 import os
 import subprocess
 import time
-from datetime import datetime
-from enum import Enum
+from concurrent.futures import Future
+from functools import lru_cache
+from types import ModuleType
 from typing import Optional, Tuple, List, Union
 
-import cv2
 import jellyfish
-import numpy as np
 import psutil
-import pyautogui
 import pytesseract
-import win32api
-import win32con
-import win32gui
-import win32process
-from PIL import Image, ImageOps
 from numpy import ndarray
 
+from BF2AutoSpectator.capture import Frame
+from BF2AutoSpectator.capture.processing import ImageOperation
+from BF2AutoSpectator.capture.vision import capture_region, capture_region_crops, screenshot_region, \
+    ocr_game_window_frame_region, histogram_frame_region
 from BF2AutoSpectator.common import constants
 from BF2AutoSpectator.common.config import Config
 from BF2AutoSpectator.common.logger import logger
+from BF2AutoSpectator.ocr import get_ocr_executor, set_ocr_engine, PytesseractEngine
+
+# Any Windows specific modules (pywin32, ctypes.windll) and pyautogui (which requires a display to be importable) are
+# imported where used, so that the remaining helpers can be imported on any platform
 
-SendInput = ctypes.windll.user32.SendInput
 # C struct redefinitions
 PUL = ctypes.POINTER(ctypes.c_ulong)
 
@@ -84,13 +84,6 @@ class Input(ctypes.Structure):
                 ("ii", Input_I)]
 
 
-class ImageOperation(Enum):
-    invert = 1
-    solarize = 2
-    grayscale = 3
-    colorize = 4
-
-
 def is_responding_pid(pid: int) -> bool:
     try:
         return psutil.Process(pid=pid).status() == psutil.STATUS_RUNNING
@@ -132,8 +125,56 @@ def auto_press_key(key_code: int) -> None:
     release_key(key_code)
 
 
+@lru_cache(maxsize=None)
+def get_pyautogui() -> ModuleType:
+    """
+    Import (and set up) pyautogui
+    :return: pyautogui module
+    """
+    import pyautogui
+
+    # Remove the top left corner from pyautogui failsafe points
+    # (avoid triggering failsafe exception due to mouse moving to top left during spawn)
+    if (0, 0) in pyautogui.FAILSAFE_POINTS:
+        pyautogui.FAILSAFE_POINTS.remove((0, 0))
+
+    return pyautogui
+
+
+def press_named_key(key: str, presses: int = 1, interval: float = 0.0) -> None:
+    """
+    Press a key (via pyautogui)
+    :param key: name of key, e.g. "backspace" or "tab"
+    :param presses: number of times to press the key
+    :param interval: seconds to wait between presses
+    :return:
+    """
+    get_pyautogui().press(key, presses=presses, interval=interval)
+
+
+def write_text(text: str, interval: float = .05) -> None:
+    """
+    Type a text (via pyautogui)
+    :param text: text to type
+    :param interval: seconds to wait between characters
+    :return:
+    """
+    get_pyautogui().write(text, interval=interval)
+
+
+def bring_window_to_foreground(window: Window) -> None:
+    import win32con
+    import win32gui
+
+    win32gui.ShowWindow(window.handle, win32con.SW_SHOW)
+    win32gui.SetForegroundWindow(window.handle)
+
+
 def window_enumeration_handler(hwnd: int, top_windows: list):
     """Add window title and ID to array."""
+    import win32gui
+    import win32process
+
     tid, pid = win32process.GetWindowThreadProcessId(hwnd)
     window = Window(
         hwnd,
@@ -147,6 +188,8 @@ def window_enumeration_handler(hwnd: int, top_windows: list):
 
 
 def find_window_by_title(search_title: str, search_class: str = None) -> Optional[Window]:
+    import win32gui
+
     # Reset top windows array
     top_windows = []
 
@@ -163,6 +206,9 @@ def find_window_by_title(search_title: str, search_class: str = None) -> Optiona
 
 # Move mouse using old mouse_event method (relative, by "mickeys)
 def mouse_move_legacy(dx: int, dy: int) -> None:
+    import win32api
+    import win32con
+
     win32api.mouse_event(win32con.MOUSEEVENTF_MOVE, dx, dy)
     time.sleep(.08)
 
@@ -180,13 +226,15 @@ def mouse_move_to_game_window_coord(game_window: Window, resolution: str, key: s
         mouse_move_legacy(constants.COORDINATES[resolution]['clicks'][key][0],
                           constants.COORDINATES[resolution]['clicks'][key][1])
     else:
-        pyautogui.moveTo(
+        get_pyautogui().moveTo(
             game_window.rect[0] + constants.COORDINATES[resolution]['clicks'][key][0],
             game_window.rect[1] + constants.COORDINATES[resolution]['clicks'][key][1]
         )
 
 
 def is_cursor_on_game_window(game_window: Window) -> bool:
+    import win32gui
+
     # https://learn.microsoft.com/en-us/windows/win32/api/winuser/ns-winuser-cursorinfo
     flags, handle, (px, py) = win32gui.GetCursorInfo()
     # Get current (!) game window rectangle
@@ -216,17 +264,23 @@ def mouse_click_in_game_window(game_window: Window, legacy: bool = False) -> Non
     if legacy:
         mouse_click_legacy()
     else:
-        pyautogui.leftClick()
+        get_pyautogui().leftClick()
 
 
 # Mouse click using old mouse_event method
 def mouse_click_legacy() -> None:
+    import win32api
+    import win32con
+
     win32api.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, 0, 0, 0, 0)
     time.sleep(.08)
     win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, 0, 0, 0, 0)
 
 
 def mouse_reset_legacy() -> None:
+    import win32api
+    import win32con
+
     win32api.mouse_event(win32con.MOUSEEVENTF_MOVE, -10000, -10000)
     time.sleep(.2)
 
@@ -238,62 +292,36 @@ def mouse_reset(game_window: Window) -> None:
     :return:
     """
     left, top, right, bottom = game_window.rect
-    pyautogui.moveTo((right - left)/2 + left, (bottom - top - 40)/2 + top)
+    get_pyautogui().moveTo((right - left)/2 + left, (bottom - top - 40)/2 + top)
 
 
-def screenshot_region(
-        region: Tuple[int, int, int, int],
-        image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]] = None,
-        crops: Optional[List[Tuple[int, int, int, int]]] = None,
-        show: bool = False
-) -> Tuple[Union[Image.Image, List[Image.Image]], Image.Image]:
+def get_game_window_region(game_window: Window) -> Tuple[int, int, int, int]:
     """
-    Take a screenshot of the specified screen region (wrapper for pyautogui.screenshot)
-    :param region: region to take screenshot of, format: (left, top, width, height)
-    :param image_ops: List of image operation tuples, format: (operation, arguments)
-    :param crops: List of image crop tuples, format: (left, top, right, bottom)
-    :param show: whether to show the screenshot
-    :return:
+    Get the screen region of the game window's client area (the window without title bar and shadow)
+    :param game_window: game window to get region of
+    :return: region, format: (left, top, width, height)
     """
-    screenshot = pyautogui.screenshot(region=region)
-    results: List[Image.Image] = []
-    # Apply zero-crop if no crops have been given, since we should not modify the original screenshot
-    for crop in crops if crops is not None else [(0, 0, 0, 0)]:
-        cropped = ImageOps.crop(screenshot, crop)
-
-        if image_ops is not None:
-            for operation in image_ops:
-                method, args = operation
-                if method is ImageOperation.invert:
-                    cropped = ImageOps.invert(cropped)
-                elif method is ImageOperation.solarize:
-                    cropped = ImageOps.solarize(cropped, **(args if args is not None else {}))
-                elif method is ImageOperation.grayscale:
-                    cropped = ImageOps.grayscale(cropped)
-                elif method is ImageOperation.colorize:
-                    cropped = ImageOps.colorize(cropped, **(args if args is not None else {}))
-
-        if show:
-            cropped.show()
-
-        # Save screenshot to debug directory if debugging is enabled
-        config = Config()
-        if config.debug_screenshot():
-            # Save screenshot
-            try:
-                cropped.save(
-                    os.path.join(
-                        Config.DEBUG_DIR,
-                        f'screenshot-{datetime.now().strftime("%Y-%m-%d-%H-%M-%S-%f")}.jpg'
-                    )
-                )
-            except OSError as e:
-                logger.error(f'Failed to save screenshot to disk: {e}')
-
-        results.append(cropped)
-
-    # Return list of cropped screenshots if there are multiple, else return the sole result directly
-    return results if len(results) > 1 else results.pop(), screenshot
+    left, top, right, bottom = game_window.rect
+    return (
+        left + constants.WINDOW_SHADOW_SIZE,
+        top + constants.WINDOW_TITLE_BAR_HEIGHT,
+        right - constants.WINDOW_SHADOW_SIZE - left - constants.WINDOW_SHADOW_SIZE,
+        bottom - constants.WINDOW_SHADOW_SIZE - top - constants.WINDOW_TITLE_BAR_HEIGHT
+    )
+
+
+def capture_game_window(game_window: Window, crops: Optional[List[Tuple[int, int, int, int]]] = None) -> Frame:
+    """
+    Take a screenshot of the game window's client area
+    :param game_window: game window to take screenshot of
+    :param crops: List of image crop tuples that need to be available, format: (left, top, right, bottom)
+    (only the required parts of the window will be captured if given, else the entire window is captured)
+    :return: frame containing the screenshot
+    """
+    if crops is None:
+        return capture_region(get_game_window_region(game_window))
+
+    return capture_region_crops(get_game_window_region(game_window), crops)
 
 
 def screenshot_game_window_region(
@@ -301,7 +329,7 @@ def screenshot_game_window_region(
         image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]] = None,
         crops: Optional[List[Tuple[int, int, int, int]]] = None,
         show: bool = False
-) -> Tuple[Union[Image.Image, List[Image.Image]], Image.Image]:
+) -> Tuple[Union[ndarray, List[ndarray]], ndarray]:
     """
     Take a screenshot of the specified game window region
     :param game_window: game window to take screenshot of
@@ -310,59 +338,19 @@ def screenshot_game_window_region(
     :param show: whether to show the screenshot
     :return:
     """
-    left, top, right, bottom = game_window.rect
-    return screenshot_region(
-        (
-            left + constants.WINDOW_SHADOW_SIZE,
-            top + constants.WINDOW_TITLE_BAR_HEIGHT,
-            right - constants.WINDOW_SHADOW_SIZE - left - constants.WINDOW_SHADOW_SIZE,
-            bottom - constants.WINDOW_SHADOW_SIZE - top - constants.WINDOW_TITLE_BAR_HEIGHT
-        ),
-        image_ops, crops, show
-    )
-
+    return screenshot_region(get_game_window_region(game_window), image_ops, crops, show)
 
-def init_pytesseract(tesseract_path: str) -> None:
-    pytesseract.pytesseract.tesseract_cmd = os.path.join(tesseract_path, constants.TESSERACT_EXE)
 
-
-def image_to_string(image: Image, ocr_config: str) -> str:
+def init_pytesseract(tesseract_path: str, ocr_model: str = 'eng', ocr_model_path: Optional[str] = None) -> None:
     """
-    Extract text from an image (wrapper for pytesseract.image_to_string)
-    :param image: PIL image to extract text from
-    :param ocr_config: config/parameters for Tesseract OCR (see https://guides.nyu.edu/tesseract/usage)
+    Point pytesseract to the Tesseract install and make it the active OCR engine
+    :param tesseract_path: path to Tesseract install folder
+    :param ocr_model: name of model (traineddata file) to run OCR with
+    :param ocr_model_path: path to folder containing the model (Tesseract's tessdata folder is used if not given)
     :return:
     """
-    # pytesseract stopped stripping \n\x0c from ocr results,
-    # returning raw results instead (https://github.com/madmaze/pytesseract/issues/297)
-    # so strip those characters as well as spaces after getting the result
-    ocr_result = pytesseract.image_to_string(image, config=ocr_config).strip(' \n\x0c')
-
-    # Print ocr result if debugging is enabled
-    config = Config()
-    if config.debug_screenshot():
-        logger.debug(f'OCR result: {ocr_result}')
-
-    return ocr_result.lower()
-
-
-# Take a screenshot of the given region and run the result through OCR
-def ocr_screenshot_region(
-        region: Tuple[int, int, int, int],
-        image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]] = None,
-        crops: Optional[List[Tuple[int, int, int, int]]] = None,
-        show: bool = False, ocr_config: str = r'--oem 3 --psm 7'
-) -> Union[str, List[str]]:
-    result, screenshot = screenshot_region(region, image_ops, crops, show)
-
-    if isinstance(result, Image.Image):
-        return image_to_string(result, ocr_config)
-
-    ocr_results: List[str] = []
-    for cropped in result:
-        ocr_results.append(image_to_string(cropped, ocr_config))
-
-    return ocr_results
+    pytesseract.pytesseract.tesseract_cmd = os.path.join(tesseract_path, constants.TESSERACT_EXE)
+    set_ocr_engine(PytesseractEngine(ocr_model, ocr_model_path))
 
 
 def ocr_screenshot_game_window_region(
@@ -371,7 +359,7 @@ def ocr_screenshot_game_window_region(
         show: bool = False, ocr_config: str = r'--oem 3 --psm 7'
 ) -> Union[str, List[str]]:
     """
-    Run a region of a game window through OCR (wrapper for ocr_screenshot_region)
+    Run a region of a game window through OCR (wrapper for ocr_game_window_frame_region)
     :param game_window: game window to take screenshot of
     :param resolution: resolution to get/use coordinates for
     :param key: key of region in coordinates dict
@@ -380,37 +368,39 @@ def ocr_screenshot_game_window_region(
     :param ocr_config: config/parameters for Tesseract OCR (see https://guides.nyu.edu/tesseract/usage)
     :return:
     """
-    left, top, right, bottom = game_window.rect
-    return ocr_screenshot_region(
-        (
-            left + constants.WINDOW_SHADOW_SIZE,
-            top + constants.WINDOW_TITLE_BAR_HEIGHT,
-            right - constants.WINDOW_SHADOW_SIZE - left - constants.WINDOW_SHADOW_SIZE,
-            bottom - constants.WINDOW_SHADOW_SIZE - top - constants.WINDOW_TITLE_BAR_HEIGHT
-        ),
+    return ocr_game_window_frame_region(
+        capture_game_window(game_window, constants.COORDINATES[resolution]['ocr'][key]),
+        resolution,
+        key,
         image_ops,
-        constants.COORDINATES[resolution]['ocr'][key],
         show,
         ocr_config
     )
 
 
-def histogram_screenshot_region(game_window: Window, crop: Tuple[int, int, int, int]) -> ndarray:
-    result, screenshot = screenshot_game_window_region(game_window, crops=[crop])
-
-    return calc_cv2_hist_from_pil_image(result)
-
-
-def calc_cv2_hist_from_pil_image(pil_image: Image) -> ndarray:
-    # Convert PIL to cv2 image
-    cv_image = cv2.cvtColor(np.asarray(pil_image), cv2.COLOR_RGB2BGR)
-    histogram = cv2.calcHist([cv_image], [0], None, [256], [0, 256])
-
-    return histogram
+def submit_ocr_screenshot_game_window_region(
+        game_window: Window, resolution: str, key: str,
+        image_ops: Optional[List[Tuple[ImageOperation, Optional[dict]]]] = None,
+        show: bool = False, ocr_config: str = r'--oem 3 --psm 7'
+) -> 'Future[Union[str, List[str]]]':
+    """
+    Take a screenshot of a game window region right away and submit it to be run through OCR on the OCR executor
+    (see ocr_screenshot_game_window_region for parameters)
+    :return: future of the OCR result(s)
+    """
+    return get_ocr_executor().submit(
+        ocr_game_window_frame_region,
+        capture_game_window(game_window, constants.COORDINATES[resolution]['ocr'][key]),
+        resolution,
+        key,
+        image_ops,
+        show,
+        ocr_config
+    )
 
 
-def calc_cv2_hist_delta(a: ndarray, b: ndarray) -> float:
-    return cv2.compareHist(a, b, cv2.HISTCMP_BHATTACHARYYA)
+def histogram_screenshot_region(game_window: Window, crop: Tuple[int, int, int, int]) -> ndarray:
+    return histogram_frame_region(capture_game_window(game_window, [crop]), crop)
 
 
 def get_resolution_window_size(resolution: str) -> Tuple[int, int]:
@@ -3,32 +3,35 @@ import random
 import re
 import subprocess
 import time
-from typing import Tuple, Optional
+import zlib
+from contextlib import contextmanager
+from typing import Tuple, Optional, Iterator, List, Union, Callable, Any, Dict
 
 import numpy as np
-import pyautogui
-import win32con
-import win32gui
 
+from BF2AutoSpectator.capture import Frame
+from BF2AutoSpectator.capture.memo import RegionResultCache
+from BF2AutoSpectator.capture.processing import ImageOperation, get_image_ops_signature, apply_image_ops
+from BF2AutoSpectator.capture.recording import RecordingWriter, Verdict
+from BF2AutoSpectator.capture.vision import calc_cv2_hist_delta, ocr_game_window_frame_region, \
+    ocr_game_window_frame_region_result, histogram_frame_region, ocr_frame_region, submit_debug_screenshot
+from BF2AutoSpectator.capture.worker import CaptureWorker
 from BF2AutoSpectator.common import constants
 from BF2AutoSpectator.common.exceptions import SpawnCoordinatesNotAvailableException
 from BF2AutoSpectator.common.logger import logger
+from BF2AutoSpectator.common.map_names import MapNameIndex, clean_map_name
 from BF2AutoSpectator.common.utility import Window, find_window_by_title, get_resolution_window_size, \
-    mouse_move_to_game_window_coord, mouse_click_in_game_window, ocr_screenshot_game_window_region, auto_press_key, \
-    mouse_reset_legacy, mouse_move_legacy, is_responding_pid, histogram_screenshot_region, calc_cv2_hist_delta, \
-    ImageOperation, mouse_reset, get_mod_from_command_line, run_conman, ocr_screenshot_region, is_similar_str, \
-    press_key, release_key
+    mouse_move_to_game_window_coord, mouse_click_in_game_window, auto_press_key, mouse_reset_legacy, \
+    mouse_move_legacy, is_responding_pid, histogram_screenshot_region, mouse_reset, \
+    get_mod_from_command_line, run_conman, is_similar_str, press_key, release_key, capture_game_window, \
+    get_game_window_region, press_named_key, write_text, bring_window_to_foreground
+from BF2AutoSpectator.histograms import HistogramStore, HistogramEngine, calc_bhattacharyya_distances, \
+    stack_histograms, get_subsampling_factor
+from BF2AutoSpectator.ocr import get_ocr_executor, LabelMatcher, GlyphReader, OCRResult, get_ocr_profile, \
+    InkDensityGate
 from .instance_state import GameInstanceState
 
-# Remove the top left corner from pyautogui failsafe points
-# (avoid triggering failsafe exception due to mouse moving to top left during spawn)
-del pyautogui.FAILSAFE_POINTS[0]
-
-
-MAP_NAME_REGEX_NvN = re.compile(r'(\d+).?v.?(\d+)')
-MAP_NAME_REGEX_SEPARATORS = re.compile(r'[_.\s]')
-MAP_NAME_REGEX_EXTRA = re.compile(r'[\'()]')
-MAP_NAME_REGEX_MULTI = re.compile(r'[-]{2,}')
+MAP_NAME_INDEX = MapNameIndex(constants.COORDINATES['spawns'].keys())
 
 
 class GameInstanceManager:
@@ -36,13 +39,28 @@ class GameInstanceManager:
     player_name: str
     player_pass: str
     resolution: str
-    histograms: dict
+    histograms: HistogramStore
+    histogram_engine: HistogramEngine
+    # Subsampling factors of histogram regions by region key (or prefix), empty if subsampling is disabled
+    histogram_subsampling_factors: Dict[str, int]
 
     game_window: Optional[Window] = None
+    frame: Optional[Frame] = None
+    capture_worker: Optional[CaptureWorker] = None
+    recorder: Optional[RecordingWriter] = None
+    region_results: RegionResultCache
+    label_matcher: LabelMatcher
+    console_reader: GlyphReader
+    ink_gate: InkDensityGate
+    # Whether to run independent detectors concurrently (see run_checks)
+    concurrent_checks: bool = False
+    # Time of the last input that changed what the camera shows
+    camera_changed_at: float = 0.0
 
     state: GameInstanceState
 
-    def __init__(self, game_path: str, player_name: str, player_pass: str, resolution: str, histograms: dict):
+    def __init__(self, game_path: str, player_name: str, player_pass: str, resolution: str,
+                 histograms: HistogramStore):
         self.game_path = game_path
         self.player_name = player_name
         self.player_pass = player_pass
@@ -52,6 +70,20 @@ class GameInstanceManager:
         # Init game instance state
         self.state = GameInstanceState()
 
+        # Remember results of evaluating regions, so we don't re-evaluate regions whose content did not change
+        # (e.g. while waiting on the map briefing or loading screen)
+        self.region_results = RegionResultCache()
+        # Calculate histograms of regions evaluated together in as few passes over the frame as possible
+        self.histogram_engine = HistogramEngine()
+        self.histogram_subsampling_factors = {}
+
+        # Check fixed UI labels via template matching where possible (templates are harvested from OCR results)
+        self.label_matcher = LabelMatcher()
+        # Read console input via glyph templates where possible (glyphs are learned from typed commands)
+        self.console_reader = GlyphReader()
+        # Skip OCR of label regions without any text (thresholds are calibrated from confirmed labels)
+        self.ink_gate = InkDensityGate()
+
     """
     Attribute getters/setters
     """
@@ -61,6 +93,394 @@ class GameInstanceManager:
     def get_game_window(self) -> Optional[Window]:
         return self.game_window
 
+    def get_game_window_region(self) -> Optional[Tuple[int, int, int, int]]:
+        if self.game_window is None:
+            return None
+
+        return get_game_window_region(self.game_window)
+
+    """
+    Functions for capturing the game window
+    """
+    def enable_background_capture(self, rate: float, buffer_size: int) -> None:
+        """
+        Continuously capture the game window in the background
+        :param rate: number of frames to capture per second
+        :param buffer_size: number of recent frames to keep
+        :return:
+        """
+        self.capture_worker = CaptureWorker(self.get_game_window_region, rate, buffer_size)
+        self.capture_worker.start()
+
+    def enable_recording(self, directory: str) -> None:
+        """
+        Record any evaluated game window regions along with the detectors' verdicts
+        :param directory: directory to write the recording to
+        :return:
+        """
+        self.recorder = RecordingWriter(directory)
+
+    def enable_label_template_persistence(self, directory: str) -> None:
+        """
+        Load/persist label templates (and console glyphs/ink density thresholds) from/to disk, so they are available
+        right away in later sessions
+        :param directory: directory to load/persist templates from/to
+        :return:
+        """
+        self.label_matcher = LabelMatcher(directory)
+        self.console_reader = GlyphReader(directory=os.path.join(directory, 'console-glyphs'))
+        self.ink_gate = InkDensityGate(
+            os.path.join(directory, 'ink-thresholds.json'),
+            calibrate_only=self.ink_gate.calibrate_only
+        )
+
+    def enable_ink_gate_calibration(self) -> None:
+        """
+        Only calibrate ink density thresholds, running label regions through OCR even if they seem to be empty
+        :return:
+        """
+        self.ink_gate.calibrate_only = True
+
+    def enable_histogram_subsampling(self, mode: str) -> None:
+        """
+        Calculate histograms of large regions from subsampled images (see constants.HISTOGRAM_SUBSAMPLING_FACTORS)
+        :param mode: mode to subsample regions with (see HISTOGRAM_SUBSAMPLING_MODES)
+        :return:
+        """
+        self.histogram_engine.subsampling_mode = mode
+        self.histogram_subsampling_factors = constants.HISTOGRAM_SUBSAMPLING_FACTORS
+
+    def record_region(self, frame: Frame, region_key: str, crop: Tuple[int, int, int, int],
+                      verdict: Verdict = None, text: Optional[str] = None, image_ops: Optional[list] = None) -> None:
+        if self.recorder is None:
+            return
+        # Only record what the detector actually evaluated, which needs to be part of the frame
+        if not frame.covers([crop]):
+            logger.debug(f'Frame does not contain region {region_key}, not recording it')
+            return
+
+        self.recorder.record(
+            frame.crop(crop),
+            region_key,
+            self.resolution,
+            crop,
+            frame.captured_at,
+            frame.get_region_hash(crop),
+            verdict=verdict,
+            text=text,
+            image_ops=image_ops
+        )
+
+    @contextmanager
+    def shared_frame(self, reset_mouse: bool = False,
+                     crops: Optional[List[Tuple[int, int, int, int]]] = None) -> Iterator[Frame]:
+        """
+        Capture the game window once and let any detectors called within the context use that same frame
+        (nested contexts re-use the outermost frame)
+        :param reset_mouse: whether to reset the mouse before capturing to not block any OCR/histogram spots
+        :param crops: List of image crop tuples the detectors need (only those parts of the window will be captured,
+        entire window is captured if not given)
+        :return:
+        """
+        if self.frame is not None:
+            yield self.frame
+            return
+
+        if reset_mouse:
+            mouse_reset(self.game_window)
+
+        self.frame = self.get_background_frame(after=time.time() if reset_mouse else None)
+        if self.frame is None:
+            self.frame = capture_game_window(self.game_window, crops)
+        try:
+            yield self.frame
+        finally:
+            self.frame = None
+
+    def get_frame(self, crops: Optional[List[Tuple[int, int, int, int]]] = None) -> Frame:
+        """
+        Get the currently shared frame or capture a new one if no frame is currently shared
+        :param crops: List of image crop tuples that need to be available in the frame (None for the entire window)
+        :return:
+        """
+        if self.frame is not None and self.frame.covers(crops):
+            return self.frame
+        elif self.frame is not None:
+            logger.debug('Shared frame does not contain all required regions, capturing required regions')
+
+        return capture_game_window(self.game_window, crops)
+
+    def get_ocr_crops(self, *keys: str) -> List[Tuple[int, int, int, int]]:
+        return [crop for key in keys for crop in constants.COORDINATES[self.resolution]['ocr'][key]]
+
+    def ocr_region(self, key: str, image_ops: Optional[list] = None, batch: bool = False) -> Union[str, List[str]]:
+        """
+        Run a game window region through OCR (using the shared frame if there is one)
+        (OCR results are re-used if the region's content did not change since it was last run through OCR)
+        :param key: key of region in coordinates dict
+        :param image_ops: List of image operation tuples, format: (operation, arguments)
+        :param batch: whether to run all crops of the region through OCR at once
+        :return:
+        """
+        crops = self.get_ocr_crops(key)
+        frame = self.get_frame(crops)
+        result = self.region_results.get_or_compute(
+            ('ocr', key, get_image_ops_signature(image_ops), *[frame.get_region_hash(crop) for crop in crops]),
+            lambda: ocr_game_window_frame_region(
+                frame,
+                self.resolution,
+                key,
+                image_ops=image_ops,
+                ocr_config=get_ocr_profile(key).get_ocr_config(),
+                batch=batch
+            )
+        )
+
+        if self.recorder is not None:
+            texts = result if isinstance(result, list) else [result]
+            for crop, text in zip(crops, texts):
+                self.record_region(frame, f'ocr/{key}', crop, text=text, image_ops=image_ops)
+
+        return result
+
+    def ocr_region_result(self, key: str, image_ops: Optional[list] = None) -> OCRResult:
+        """
+        Run a single crop game window region through OCR, keeping the confidence of each word
+        (OCR results are re-used if the region's content did not change since it was last run through OCR)
+        :param key: key of region in coordinates dict (must be single crop region)
+        :param image_ops: List of image operation tuples, format: (operation, arguments)
+        :return:
+        """
+        crop, = self.get_ocr_crops(key)
+        frame = self.get_frame([crop])
+        result = self.region_results.get_or_compute(
+            ('ocr-result', key, get_image_ops_signature(image_ops), frame.get_region_hash(crop)),
+            lambda: ocr_game_window_frame_region_result(
+                frame,
+                self.resolution,
+                key,
+                image_ops=image_ops,
+                ocr_config=get_ocr_profile(key).get_ocr_config()
+            )
+        )
+
+        self.record_region(frame, f'ocr/{key}', crop, text=result.text, image_ops=image_ops)
+
+        return result
+
+    def histogram_region(self, crop: Tuple[int, int, int, int], factor: int = 1,
+                         frame: Optional[Frame] = None) -> np.ndarray:
+        """
+        Calculate the histogram of a game window region (using the shared frame if there is one)
+        (histograms are re-used if the region's content did not change since the histogram was last calculated)
+        :param crop: image crop tuple of region, format: (left, top, right, bottom)
+        :param factor: factor to subsample region by
+        :param frame: frame to calculate the histogram on (must cover the region, see get_frame if not given)
+        :return:
+        """
+        histogram, = self.histogram_regions([crop], [factor], frame)
+        return histogram
+
+    def histogram_regions(self, crops: List[Tuple[int, int, int, int]], factors: Optional[List[int]] = None,
+                          frame: Optional[Frame] = None) -> List[np.ndarray]:
+        """
+        Calculate the histograms of multiple game window regions (using the shared frame if there is one)
+        (regions whose histograms are not re-used are calculated together, see HistogramEngine)
+        :param crops: image crop tuples of regions, format: (left, top, right, bottom)
+        :param factors: factors to subsample regions by, one per crop (regions are not subsampled if not given)
+        :param frame: frame to calculate the histograms on (must cover all regions, see get_frame if not given)
+        :return: histograms, one per crop
+        """
+        if factors is None:
+            factors = [1] * len(crops)
+
+        if frame is None:
+            frame = self.get_frame(crops)
+        # Hashing a region costs about as much as calculating its histogram, so only hash every 4th row/column
+        # (missing changes in skipped pixels would only have a negligible effect on the histogram)
+        keys = [
+            ('histogram', crop, factor, frame.get_region_hash(crop, stride=4))
+            for crop, factor in zip(crops, factors)
+        ]
+        histograms = [self.region_results.get(key) for key in keys]
+
+        missing = [(crop, factor) for crop, factor, histogram in zip(crops, factors, histograms) if histogram is None]
+        if len(missing) > 0:
+            calculated = dict(zip(missing, self.histogram_engine.get_histograms(
+                frame,
+                [crop for crop, factor in missing],
+                [factor for crop, factor in missing]
+            )))
+            for i, (key, crop, factor) in enumerate(zip(keys, crops, factors)):
+                if histograms[i] is None:
+                    histograms[i] = calculated[(crop, factor)]
+                    self.region_results.put(key, histograms[i])
+
+        return histograms
+
+    def is_label_visible(self, key: str, label: str, image_ops: Optional[list] = None) -> bool:
+        """
+        Check whether a fixed label is visible in a game window region (see check_label)
+        :param key: key of region in coordinates dict (must be single crop region)
+        :param label: label to check for
+        :param image_ops: List of image operation tuples, format: (operation, arguments)
+        :return: True if the label is visible, else False
+        """
+        visible, _ = self.check_label(key, label, image_ops)
+        return visible
+
+    def check_label(self, key: str, label: str, image_ops: Optional[list] = None) -> Tuple[bool, bool]:
+        """
+        Check whether a fixed label is visible in a game window region, using template matching if possible and OCR
+        if the templates do not (yet) clearly (mis)match the region (regions without any ink are skipped right away)
+        :param key: key of region in coordinates dict (must be single crop region)
+        :param label: label to check for
+        :param image_ops: List of image operation tuples, format: (operation, arguments)
+        :return: whether the label is visible and whether that verdict can be accepted without re-checking
+                 (empty regions, template matches and accepted OCR results, see OCRProfile.is_accepted)
+        """
+        crop, = self.get_ocr_crops(key)
+        frame = self.get_frame([crop])
+        image = apply_image_ops(frame.crop(crop), image_ops)
+        # Signature is hashed into a short, stable name in order to be usable as a directory name
+        signature = f'{zlib.crc32(repr(get_image_ops_signature(image_ops)).encode()):08x}'
+        template_key = (self.resolution, key, label, signature)
+        # Ink density does not depend on the label (thresholds are shared by all labels of a region)
+        gate_key = (self.resolution, key, signature)
+
+        if self.ink_gate.is_empty(gate_key, image):
+            # Write debug screenshots as OCR would have (regions that are run through OCR are written by OCR)
+            submit_debug_screenshot(image)
+            self.record_region(frame, f'ink/{key}', crop, verdict=False, image_ops=image_ops)
+            return False, True
+
+        visible = self.label_matcher.match(template_key, image)
+        if visible is not None:
+            submit_debug_screenshot(image)
+            self.record_region(frame, f'labels/{key}', crop, verdict=visible, image_ops=image_ops)
+            if visible:
+                self.ink_gate.observe(gate_key, image)
+            return visible, True
+
+        result = self.ocr_region_result(key, image_ops)
+        visible = label in result.text
+        accepted = visible and get_ocr_profile(key).is_accepted(result)
+        # Only learn from confident reads of an expected label (a misread must never become a template/threshold)
+        if accepted:
+            self.label_matcher.add(template_key, image)
+            self.ink_gate.observe(gate_key, image)
+
+        return visible, accepted
+
+    def enable_concurrent_checks(self) -> None:
+        """
+        Run independent detectors (see run_checks) concurrently on the OCR executor
+        :return:
+        """
+        self.concurrent_checks = True
+
+    def run_checks(self, *checks: Callable[[], Any]) -> List[Any]:
+        """
+        Run independent detectors, sequentially or (if enabled) concurrently on the OCR executor
+        (use within a shared frame context to have all detectors evaluate the same frame)
+        Detectors do not depend on each other's results, but they are not side effect free. They update state shared
+        between detectors, which is guarded as follows:
+        - label templates (LabelMatcher) and console glyphs (GlyphReader): own lock each, files written outside of it
+        - ink density thresholds (InkDensityGate): own lock, file written from a snapshot outside of it
+        - region results (RegionResultCache) and OCR results: own lock each (a result may be computed twice if two
+          detectors miss the cache at the same time)
+        - histograms of the shared frame (HistogramEngine): own lock
+        - recording (RecordingWriter): condition guarding the queue, written by the recorder thread
+        Files of learned state are written outside of these locks, so concurrent learning could interleave writes.
+        Running detectors concurrently is therefore off by default (until concurrent learning has been verified).
+        :param checks: detectors to run
+        :return: results of the detectors, in the order given
+        """
+        if not self.concurrent_checks:
+            return [check() for check in checks]
+
+        return get_ocr_executor().map(lambda check: check(), checks)
+
+    def is_histogram_region_match(self, region_key: str, crop: Tuple[int, int, int, int], reference: np.ndarray,
+                                  max_delta: float = constants.HISTCMP_MAX_DELTA) -> bool:
+        """
+        Compare the histogram of a game window region to a reference histogram
+        :param region_key: key of the region (used when recording)
+        :param crop: image crop tuple of region, format: (left, top, right, bottom)
+        :param reference: histogram to compare to
+        :param max_delta: maximum delta between histograms for them to be considered a match
+        (only used if the store does not contain a calibrated threshold for the region)
+        :return: True if the histograms match, else False
+        """
+        with self.shared_frame(crops=[crop]):
+            # A nested context re-uses the outer frame, which may not cover the region (in which case it is captured
+            # separately), so make sure to record the frame the histogram is calculated on
+            frame = self.get_frame([crop])
+            histogram = self.histogram_region(
+                crop,
+                get_subsampling_factor(self.histogram_subsampling_factors, region_key),
+                frame
+            )
+        delta = calc_cv2_hist_delta(histogram, reference)
+        match = delta < self.histograms.get_threshold(self.resolution, region_key, max_delta)
+
+        self.record_region(frame, f'hists/{region_key}', crop, verdict=bool(match))
+
+        return match
+
+    def are_histogram_regions_matching(self, region_keys: List[str], crops: List[Tuple[int, int, int, int]],
+                                       reference_keys: List[str],
+                                       max_delta: float = constants.HISTCMP_MAX_DELTA) -> List[bool]:
+        """
+        Compare the histograms of multiple game window regions to one reference histogram each (in a single pass)
+        :param region_keys: keys of the regions (used when recording)
+        :param crops: image crop tuples of regions, format: (left, top, right, bottom)
+        :param reference_keys: keys of reference histograms to compare to, one per region
+        :param max_delta: maximum delta between histograms for them to be considered a match
+        (only used for regions the store does not contain a calibrated threshold for)
+        :return: whether each region's histogram matches its reference histogram
+        """
+        with self.shared_frame(crops=crops):
+            # Record the frame the histograms are calculated on (see is_histogram_region_match)
+            frame = self.get_frame(crops)
+            histograms = self.histogram_regions(crops, [
+                get_subsampling_factor(self.histogram_subsampling_factors, region_key) for region_key in region_keys
+            ], frame)
+        deltas = calc_bhattacharyya_distances(
+            stack_histograms(histograms),
+            self.histograms.get_stack(self.resolution, reference_keys)
+        )
+        # Each region is only compared to its own reference
+        matches = [
+            bool(delta < self.histograms.get_threshold(self.resolution, region_key, max_delta))
+            for region_key, delta in zip(region_keys, np.diagonal(deltas))
+        ]
+
+        for region_key, crop, match in zip(region_keys, crops, matches):
+            self.record_region(frame, f'hists/{region_key}', crop, verdict=match)
+
+        return matches
+
+    def get_background_frame(self, after: Optional[float] = None) -> Optional[Frame]:
+        """
+        Get a recent frame captured by the background capture worker (if enabled)
+        :param after: timestamp the frame needs to have been captured after (e.g. when the mouse was moved)
+        :return: sufficiently recent frame of the current game window or None
+        """
+        if self.capture_worker is None:
+            return None
+
+        if after is not None:
+            frame = self.capture_worker.wait_for_frame(after)
+        else:
+            frame = self.capture_worker.get_latest(max_age=self.capture_worker.get_interval())
+
+        # Window might have been moved/replaced since the frame was taken
+        if frame is None or frame.region != self.get_game_window_region():
+            return None
+
+        return frame
+
     """
     Functions for launching, finding and destroying/quitting a game instance
     """
@@ -187,28 +607,24 @@ class GameInstanceManager:
     Functions for detecting game state elements
     """
     def is_game_message_visible(self) -> bool:
-        return 'game message' in ocr_screenshot_game_window_region(
-            self.game_window,
-            self.resolution,
+        return self.is_label_visible(
             'game-message-header',
+            'game message',
             image_ops=[(ImageOperation.invert, None)]
         )
 
     def ocr_game_message(self) -> str:
         # Get ocr result of game message content region
-        return ocr_screenshot_game_window_region(
-            self.game_window,
-            self.resolution,
+        return self.ocr_region(
             'game-message-text',
             image_ops=[(ImageOperation.invert, None)]
         )
 
     def is_in_menu(self) -> bool:
         # Get ocr result of quit menu item area
-        return 'quit' in ocr_screenshot_game_window_region(
-            self.game_window,
-            self.resolution,
+        return self.is_label_visible(
             'quit-menu-item',
+            'quit',
             image_ops=[
                 (ImageOperation.grayscale, None),
                 (ImageOperation.colorize, {'black': '#000', 'white': '#fff', 'blackpoint': 30, 'whitepoint': 175}),
@@ -223,30 +639,23 @@ class GameInstanceManager:
         return self.is_menu_item_active('join-internet')
 
     def is_menu_item_active(self, menu_item: str) -> bool:
-        histogram = histogram_screenshot_region(
-            self.game_window,
-            constants.COORDINATES[self.resolution]['hists']['menu'][menu_item]
-        )
-        delta = calc_cv2_hist_delta(
-            histogram,
-            self.histograms[self.resolution]['menu'][menu_item]['active']
+        return self.is_histogram_region_match(
+            f'menu/{menu_item}',
+            constants.COORDINATES[self.resolution]['hists']['menu'][menu_item],
+            self.histograms.get(self.resolution, f'menu/{menu_item}/active')
         )
 
-        return delta < constants.HISTCMP_MAX_DELTA
-
     def is_disconnect_prompt_visible(self) -> bool:
-        return 'disconnect' in ocr_screenshot_game_window_region(
-            self.game_window,
-            self.resolution,
+        return self.is_label_visible(
             'disconnect-prompt-header',
+            'disconnect',
             image_ops=[(ImageOperation.invert, None)]
         )
 
     def is_disconnect_button_visible(self) -> bool:
-        return 'disconnect' in ocr_screenshot_game_window_region(
-            self.game_window,
-            self.resolution,
+        return self.is_label_visible(
             'disconnect-button',
+            'disconnect',
             image_ops=[
                 (ImageOperation.grayscale, None),
                 (ImageOperation.colorize, {'black': '#000', 'white': '#fff', 'blackpoint': 30, 'whitepoint': 175}),
@@ -255,10 +664,9 @@ class GameInstanceManager:
         )
 
     def is_play_now_button_visible(self) -> bool:
-        return 'play now' in ocr_screenshot_game_window_region(
-            self.game_window,
-            self.resolution,
+        return self.is_label_visible(
             'play-now-button',
+            'play now',
             image_ops=[
                 (ImageOperation.grayscale, None),
                 (ImageOperation.colorize, {'black': '#000', 'white': '#fff', 'blackpoint': 100, 'whitepoint': 200})
@@ -267,45 +675,44 @@ class GameInstanceManager:
 
     def is_round_end_screen_visible(self) -> bool:
         round_end_screen_items = ['score-list', 'top-players', 'top-scores', 'map-briefing']
-        active = [self.is_round_end_screen_item_active(item) for item in round_end_screen_items]
+        crops = [
+            *[constants.COORDINATES[self.resolution]['hists']['eor'][item] for item in round_end_screen_items],
+            *self.get_ocr_crops('eor-header-items')
+        ]
+        with self.shared_frame(crops=crops):
+            active = self.are_histogram_regions_matching(
+                [f'eor/{item}' for item in round_end_screen_items],
+                [constants.COORDINATES[self.resolution]['hists']['eor'][item] for item in round_end_screen_items],
+                [f'eor/{item}/active' for item in round_end_screen_items]
+            )
 
-        # During map load, only item is active at any time. When the round just ended, all are active.
-        if not (all(active) or len([a for a in active if a]) == 1):
-            return False
+            # During map load, only item is active at any time. When the round just ended, all are active.
+            if not (all(active) or len([a for a in active if a]) == 1):
+                return False
 
-        # Run expensive multi-ocr only after faster histogram based detection succeeded
-        item_labels = ocr_screenshot_game_window_region(
-            self.game_window,
-            self.resolution,
-            'eor-header-items',
-            image_ops=[
-                (ImageOperation.grayscale, None),
-                (ImageOperation.colorize, {'black': '#000', 'white': '#fff', 'blackpoint': 50, 'whitepoint': 135}),
-                (ImageOperation.invert, None),
-            ]
-        )
+            # Run expensive multi-ocr only after faster histogram based detection succeeded
+            item_labels = self.ocr_region(
+                'eor-header-items',
+                image_ops=[
+                    (ImageOperation.grayscale, None),
+                    (ImageOperation.colorize, {'black': '#000', 'white': '#fff', 'blackpoint': 50, 'whitepoint': 135}),
+                    (ImageOperation.invert, None),
+                ],
+                batch=True
+            )
 
         # Due to the eor header items being transparent, ocr is not going to always detect all items
         # So, we'll take any ocr match (the strings are fairly unique)
         return any(label in item_labels for label in ['score list', 'top players', 'top scores', 'map briefing'])
 
-    def is_round_end_screen_item_active(self, round_end_screen_item: str) -> bool:
-        histogram = histogram_screenshot_region(
-            self.game_window,
-            constants.COORDINATES[self.resolution]['hists']['eor'][round_end_screen_item]
-        )
-        delta = calc_cv2_hist_delta(
-            histogram,
-            self.histograms[self.resolution]['eor'][round_end_screen_item]['active']
-        )
-
-        return delta < constants.HISTCMP_MAX_DELTA
-
     def is_connect_to_ip_button_visible(self) -> bool:
-        return 'connect to ip' in ocr_screenshot_game_window_region(
-            self.game_window,
-            self.resolution,
+        visible, _ = self.check_connect_to_ip_button()
+        return visible
+
+    def check_connect_to_ip_button(self) -> Tuple[bool, bool]:
+        return self.check_label(
             'connect-to-ip-button',
+            'connect to ip',
             image_ops=[
                 (ImageOperation.grayscale, None),
                 (ImageOperation.colorize, {'black': '#000', 'white': '#fff', 'blackpoint': 30, 'whitepoint': 175}),
@@ -318,10 +725,9 @@ class GameInstanceManager:
         mouse_reset(self.game_window)
 
         # Get ocr result of bottom left corner where "join game"-button would be
-        return 'join game' in ocr_screenshot_game_window_region(
-            self.game_window,
-            self.resolution,
+        return self.is_label_visible(
             'join-game-button',
+            'join game',
             image_ops=[
                 (ImageOperation.grayscale, None),
                 (ImageOperation.colorize, {'black': '#000', 'white': '#fff', 'blackpoint': 30, 'whitepoint': 175}),
@@ -338,23 +744,16 @@ class GameInstanceManager:
         return self.is_round_end_screen_visible() and not join_game_button_present
 
     def is_loading_bar_visible(self) -> bool:
-        histogram = histogram_screenshot_region(
-            self.game_window,
-            constants.COORDINATES[self.resolution]['hists']['eor']['loading-bar']
-        )
-
-        delta = calc_cv2_hist_delta(
-            histogram,
-            self.histograms[self.resolution]['eor']['loading-bar']
+        return self.is_histogram_region_match(
+            'eor/loading-bar',
+            constants.COORDINATES[self.resolution]['hists']['eor']['loading-bar'],
+            self.histograms.get(self.resolution, 'eor/loading-bar')
         )
 
-        return delta < constants.HISTCMP_MAX_DELTA
-
     def is_map_briefing_visible(self) -> bool:
-        return 'map briefing' in ocr_screenshot_game_window_region(
-            self.game_window,
-            self.resolution,
+        return self.is_label_visible(
             'map-briefing-header',
+            'map briefing',
             image_ops=[(ImageOperation.invert, None)]
         )
 
@@ -382,23 +781,17 @@ class GameInstanceManager:
         return self.is_map_briefing_visible()
 
     def is_spawn_menu_visible(self) -> bool:
-        histogram = histogram_screenshot_region(
-            self.game_window,
-            constants.COORDINATES[self.resolution]['hists']['spawn-menu']['close-button']
+        return self.is_histogram_region_match(
+            'spawn-menu/close-button',
+            constants.COORDINATES[self.resolution]['hists']['spawn-menu']['close-button'],
+            self.histograms.get(self.resolution, 'spawn-menu/close-button')
         )
-        delta = calc_cv2_hist_delta(
-            histogram,
-            self.histograms[self.resolution]['spawn-menu']['close-button']
-        )
-
-        return delta < constants.HISTCMP_MAX_DELTA
 
     def get_map_details(self) -> Tuple[str, int, str]:
-        ocr_map_name, ocr_map_size, ocr_game_mode = ocr_screenshot_game_window_region(
-            self.game_window,
-            self.resolution,
+        ocr_map_name, ocr_map_size, ocr_game_mode = self.ocr_region(
             'eor-map-details',
-            image_ops=[(ImageOperation.invert, None)]
+            image_ops=[(ImageOperation.invert, None)],
+            batch=True
         )
 
         logger.debug(f'Detected map details: {ocr_map_name}/{ocr_map_size}/{ocr_game_mode}')
@@ -414,36 +807,19 @@ class GameInstanceManager:
 
     @staticmethod
     def normalize_map_name(ocr_result: str) -> str:
-        # Make sure any weird OCR result for 2v2/NvN maps are turned into just NvN
-        ocr_result = MAP_NAME_REGEX_NvN.sub('\\1v\\2', ocr_result)
-        # Replace spaces/underscores/dots with dashes
-        ocr_result = MAP_NAME_REGEX_SEPARATORS.sub('-', ocr_result)
-        # Remove any other special characters
-        ocr_result = MAP_NAME_REGEX_EXTRA.sub('', ocr_result)
-        # "Merge" multiple dashes into one
-        ocr_result = MAP_NAME_REGEX_MULTI.sub('-', ocr_result)
-
-        # Convert to lower case
-        ocr_result = ocr_result.lower()
-
-        # Check if map is known
-        # Also check while replacing first g with q, second t with i and trailing colon with e
-        # to account for common ocr errors
-        if ocr_result in constants.COORDINATES['spawns'].keys():
-            # If block only serves to not run regex if ocr result already matches a known map
-            return ocr_result
-        elif (normalized := re.sub(r'^([^g]*?)g(.*)$', '\\1q\\2', ocr_result)) \
-                in constants.COORDINATES['spawns'].keys():
-            return normalized
-        elif (normalized := re.sub(r'^([^t]*?t[^t]+?)t(.*)$', '\\1i\\2', ocr_result)) \
-                in constants.COORDINATES['spawns'].keys():
-            return normalized
-        elif (normalized := re.sub(r'^(.*?):$', '\\1e', ocr_result)) \
-                in constants.COORDINATES['spawns'].keys():
-            return normalized
-        else:
+        ocr_result = clean_map_name(ocr_result)
+
+        # Resolve to the closest known map name to account for common ocr errors
+        # (e.g. q read as g, i read as t or a trailing e read as colon)
+        map_name, score = MAP_NAME_INDEX.lookup(ocr_result)
+        if map_name is None:
             return ocr_result
 
+        if map_name != ocr_result:
+            logger.debug(f'Resolved map name "{ocr_result}" to "{map_name}" (score: {score:.2f})')
+
+        return map_name
+
     @staticmethod
     def normalize_map_size(ocr_result: str) -> int:
         map_size = -1
@@ -455,82 +831,79 @@ class GameInstanceManager:
 
     def get_player_team(self) -> Optional[int]:
         # Get histograms of team selection areas
-        team_selection_histograms = []
-        for coord_set in constants.COORDINATES[self.resolution]['hists']['teams']:
-            histogram = histogram_screenshot_region(
-                self.game_window,
-                coord_set
-            )
-            team_selection_histograms.append(histogram)
+        crops = constants.COORDINATES[self.resolution]['hists']['teams']
+        with self.shared_frame(crops=crops):
+            # Record the frame the histograms are calculated on (see is_histogram_region_match)
+            frame = self.get_frame(crops)
+            team_selection_histograms = self.histogram_regions(crops, frame=frame)
+
+        # Compare both sides against all known (active) team histograms at once
+        left_keys = [f'teams/{team_key}/active' for team_key in constants.TEAMS_SPAWN_MENU_LEFT]
+        right_keys = [f'teams/{team_key}/active' for team_key in constants.TEAMS_SPAWN_MENU_RIGHT]
+        histogram_deltas = calc_bhattacharyya_distances(
+            stack_histograms(team_selection_histograms),
+            self.histograms.get_stack(self.resolution, left_keys + right_keys)
+        )
 
-        # Calculate histogram deltas and compare against known ones
+        # Right side wins if both sides match
         team = None
-        for team_key in constants.TEAMS_SPAWN_MENU_LEFT:
-            histogram_delta = calc_cv2_hist_delta(
-                team_selection_histograms[0],
-                self.histograms[self.resolution]['teams'][team_key]['active']
-            )
-
-            if histogram_delta < constants.HISTCMP_MAX_DELTA:
-                team = 0
-                break
-
-        for team_key in constants.TEAMS_SPAWN_MENU_RIGHT:
-            histogram_delta = calc_cv2_hist_delta(
-                team_selection_histograms[1],
-                self.histograms[self.resolution]['teams'][team_key]['active']
-            )
-
-            if histogram_delta < constants.HISTCMP_MAX_DELTA:
-                team = 1
-                break
+        if (histogram_deltas[1, len(left_keys):] < constants.HISTCMP_MAX_DELTA).any():
+            team = 1
+        elif (histogram_deltas[0, :len(left_keys)] < constants.HISTCMP_MAX_DELTA).any():
+            team = 0
 
         logger.debug(f'Detected team is {team}')
 
+        for side, coord_set in zip(['left', 'right'], crops):
+            self.record_region(frame, f'hists/teams/{side}', coord_set, verdict=team)
+
         return team
 
     def is_default_camera_view_visible(self) -> bool:
         map_name = self.state.get_rotation_map_name()
         # Return false if map has not been determined (yet) or is not supported
-        if map_name is None or map_name not in self.histograms[self.resolution]['maps']['default-camera-view']:
+        if map_name is None or not self.histograms.has(self.resolution, f'maps/default-camera-view/{map_name}'):
             return False
 
-        histogram = histogram_screenshot_region(
-            self.game_window,
+        return self.is_histogram_region_match(
+            f'maps/default-camera-view/{map_name}',
             (
                 168,
                 0,
                 168,
                 0
-            )
-        )
-        delta = calc_cv2_hist_delta(
-            histogram,
-            self.histograms[self.resolution]['maps']['default-camera-view'][map_name]
+            ),
+            self.histograms.get(self.resolution, f'maps/default-camera-view/{map_name}'),
+            max_delta=constants.DEFAULT_CAMERA_VIEW_HISTCMP_MAX_DELTA
         )
 
-        return delta < constants.DEFAULT_CAMERA_VIEW_HISTCMP_MAX_DELTA
-
     def is_sufficient_action_on_screen(self, screenshot_count: int = 3, screenshot_sleep: float = .55,
                                        min_delta: float = .022) -> bool:
         histograms = []
 
-        # Take screenshots and calculate histograms
-        for i in range(0, screenshot_count):
-            histogram = histogram_screenshot_region(
-                self.game_window,
-                (
-                    168,
-                    0,
-                    168,
-                    0
+        # Use frames captured in the background if there are enough recent ones (taken since the camera last changed)
+        if self.capture_worker is not None:
+            frames = self.capture_worker.get_recent(screenshot_count, screenshot_sleep, after=self.camera_changed_at)
+            if len(frames) == screenshot_count and all(f.region == self.get_game_window_region() for f in frames):
+                histograms = [histogram_frame_region(frame, (168, 0, 168, 0)) for frame in frames]
+
+        # Else, take screenshots and calculate histograms
+        if len(histograms) == 0:
+            for i in range(0, screenshot_count):
+                histogram = histogram_screenshot_region(
+                    self.game_window,
+                    (
+                        168,
+                        0,
+                        168,
+                        0
+                    )
                 )
-            )
-            histograms.append(histogram)
+                histograms.append(histogram)
 
-            # Sleep before taking next screenshot
-            if i + 1 < screenshot_count:
-                time.sleep(screenshot_sleep)
+                # Sleep before taking next screenshot
+                if i + 1 < screenshot_count:
+                    time.sleep(screenshot_sleep)
 
         histogram_deltas = []
         # Calculate histogram differences
@@ -548,8 +921,7 @@ class GameInstanceManager:
     Functions to interact with the game instance (=change state)
     """
     def bring_to_foreground(self) -> None:
-        win32gui.ShowWindow(self.game_window.handle, win32con.SW_SHOW)
-        win32gui.SetForegroundWindow(self.game_window.handle)
+        bring_window_to_foreground(self.game_window)
 
     def connect_to_server(self, server_ip: str, server_port: str, server_pass: Optional[str] = None) -> bool:
         if not self.is_multiplayer_menu_active():
@@ -566,11 +938,14 @@ class GameInstanceManager:
 
         check_count = 0
         check_limit = 10
-        while not self.is_connect_to_ip_button_visible() and check_count < check_limit:
+        visible, accepted = self.check_connect_to_ip_button()
+        while not visible and check_count < check_limit:
             check_count += 1
             time.sleep(1)
+            visible, accepted = self.check_connect_to_ip_button()
 
-        if not self.is_connect_to_ip_button_visible():
+        # Confirm the button is (still) visible unless the last check can be accepted as is
+        if not accepted and not self.is_connect_to_ip_button_visible():
             return False
 
         # Move cursor onto connect to ip button and click
@@ -582,28 +957,28 @@ class GameInstanceManager:
         time.sleep(.3)
 
         # Clear out ip field
-        pyautogui.press('backspace', presses=20, interval=.05)
+        press_named_key('backspace', presses=20, interval=.05)
 
         # Write ip
-        pyautogui.write(server_ip, interval=.05)
+        write_text(server_ip, interval=.05)
 
         # Hit tab to enter port
-        pyautogui.press('tab')
+        press_named_key('tab')
 
         # Clear out port field
-        pyautogui.press('backspace', presses=10, interval=.05)
+        press_named_key('backspace', presses=10, interval=.05)
 
         # Write port
-        pyautogui.write(server_port, interval=.05)
+        write_text(server_port, interval=.05)
 
         time.sleep(.3)
 
         # Write password if required
         # Field clears itself, so need to clear manually
         if server_pass is not None:
-            pyautogui.press('tab')
+            press_named_key('tab')
 
-            pyautogui.write(server_pass, interval=.05)
+            write_text(server_pass, interval=.05)
 
             time.sleep(.3)
 
@@ -619,10 +994,16 @@ class GameInstanceManager:
         in_menu = True
         game_message_visible = False
         while in_menu and not game_message_visible and check_count < check_limit:
-            in_menu = self.is_in_menu()
-            game_message_visible = self.is_game_message_visible()
-            # Game will show a "you need to disconnect first" prompt if it was still connected to a server
-            if self.is_disconnect_prompt_visible():
+            with self.shared_frame(crops=self.get_ocr_crops(
+                    'quit-menu-item', 'game-message-header', 'disconnect-prompt-header'
+            )):
+                # Game will show a "you need to disconnect first" prompt if it was still connected to a server
+                in_menu, game_message_visible, disconnect_prompt_visible = self.run_checks(
+                    self.is_in_menu,
+                    self.is_game_message_visible,
+                    self.is_disconnect_prompt_visible
+                )
+            if disconnect_prompt_visible:
                 logger.warning('Disconnect prompt is visible, clicking "Yes" to disconnect')
                 # Click "yes" in order to disconnect
                 mouse_move_to_game_window_coord(self.game_window, self.resolution, 'disconnect-prompt-yes-button')
@@ -654,7 +1035,8 @@ class GameInstanceManager:
                 time.sleep(.3)
 
         # We should still be in the menu but see the "play now" button instead of the "disconnect" button
-        return self.is_in_menu() and self.is_play_now_button_visible()
+        with self.shared_frame(crops=self.get_ocr_crops('quit-menu-item', 'play-now-button')):
+            return self.is_in_menu() and self.is_play_now_button_visible()
 
     def delay_map_load(self, delay: int) -> bool:
         if not self.state.map_loading():
@@ -675,11 +1057,11 @@ class GameInstanceManager:
         # Toggling ALT somehow "pauses"/"resumes" the game while keeping the audio running
         # In contrast, BF2mld's approach of suspending the process pauses the audio (not ideal with loading music on)
         logger.debug('Suspending map load')
-        pyautogui.press('alt')
+        press_named_key('alt')
         time.sleep(delay)
 
         logger.debug('Resuming map load')
-        pyautogui.press('alt')
+        press_named_key('alt')
 
         return True
 
@@ -694,23 +1076,23 @@ class GameInstanceManager:
         attempt = 0
         max_attempts = 5
         while not (ready := self.is_console_ready()) and attempt < max_attempts:
-            pyautogui.press('backspace', presses=pow((attempt + 1), 2), interval=.05)
+            press_named_key('backspace', presses=pow((attempt + 1), 2), interval=.05)
             attempt += 1
 
         if not ready:
             return False
 
         # Write command
-        pyautogui.write(command, interval=.05)
+        write_text(command, interval=.05)
         time.sleep(.3)
 
         # Read command back
-        written_command = self.get_console_command(len(command))
+        written_command = self.get_console_command(len(command), expected=f'>{command}')
         if not is_similar_str(command, written_command.lstrip('>')):
             return False
 
         # Hit enter
-        pyautogui.press('enter')
+        press_named_key('enter')
         time.sleep(.1)
 
         # X / toggle console
@@ -720,32 +1102,41 @@ class GameInstanceManager:
 
     def is_console_ready(self) -> bool:
         # We should only see the input "prompt"
-        return self.get_console_command(3) == '>'
+        return self.get_console_command(3, expected='>') == '>'
 
-    def get_console_command(self, characters: int) -> str:
+    def get_console_command(self, characters: int, expected: Optional[str] = None) -> str:
         """
         Read current console command, including ">" prompt
         :param characters: number of characters to read
-        :return: current console command (note: due to how tiny the text is,
-        don't expect an exact match with the command that was put in)
+        :param expected: command expected to be in the console (including prompt), used to learn console glyphs if OCR
+        reads exactly the expected command
+        :return: current console command (note: if the console glyphs are not known (yet), the command is read via OCR
+        and due to how tiny the text is, don't expect an exact match with the command that was put in)
         """
-        # Set screenshot width based on command length (add 5px per character)
-        left, top, right, bottom = self.game_window.rect
-        return ocr_screenshot_region(
-            (
-                left + constants.WINDOW_SHADOW_SIZE,
-                top + constants.WINDOW_TITLE_BAR_HEIGHT,
-                right - constants.WINDOW_SHADOW_SIZE - left - constants.WINDOW_SHADOW_SIZE,
-                bottom - constants.WINDOW_SHADOW_SIZE - top - constants.WINDOW_TITLE_BAR_HEIGHT
-            ),
-            crops=[(
-                constants.COORDINATES[self.resolution]['ocr']['console-command'][0][0],
-                constants.COORDINATES[self.resolution]['ocr']['console-command'][0][1],
-                constants.COORDINATES[self.resolution]['ocr']['console-command'][0][2] - characters * 6,
-                constants.COORDINATES[self.resolution]['ocr']['console-command'][0][3]
-            )]
+        # Set screenshot width based on command length (add 6px per character, plus one for the prompt)
+        left, top, right, bottom = constants.COORDINATES[self.resolution]['ocr']['console-command'][0]
+        glyph_crop = (left, top, right - (characters + 1) * 6, bottom)
+        frame = self.get_frame([glyph_crop])
+        line = apply_image_ops(frame.crop(glyph_crop), [(ImageOperation.grayscale, None)])
+
+        # Glyphs are read with their case intact, while OCR results are always lower case
+        command = self.console_reader.read(self.resolution, line)
+        if command is not None:
+            self.record_region(frame, 'glyphs/console-command', glyph_crop, text=command)
+            return command.lower()
+
+        crop = (left, top, right - characters * 6, bottom)
+        command = ocr_frame_region(
+            frame,
+            crops=[crop]
         )
 
+        # Only learn from exact reads, a similar read might be a mistyped/substituted keystroke with the same layout
+        if expected is not None and command.strip() == expected.lower().strip():
+            self.console_reader.learn(self.resolution, line, expected)
+
+        return command
+
     @staticmethod
     def toggle_console() -> None:
         auto_press_key(0x1d)
@@ -816,7 +1207,8 @@ class GameInstanceManager:
 
         # Try any alternate spawns if primary one is not available
         alternate_spawns = constants.COORDINATES['spawns'][map_name][str(map_size)][2:]
-        if not self.is_spawn_point_selected() and len(alternate_spawns) > 0:
+        selected, accepted = self.check_spawn_point_selected()
+        if not selected and len(alternate_spawns) > 0:
             logger.warning('Default spawn point could not be selected, trying alternate spawn points')
             # Iterate over alternate spawns in reverse order for team 1
             # (spawns are ordered by "likeliness" of team 0 having control over them)
@@ -831,15 +1223,18 @@ class GameInstanceManager:
                 time.sleep(.1)
                 mouse_click_in_game_window(self.game_window, legacy=True)
                 time.sleep(.1)
-                if self.is_spawn_point_selected():
+                selected, accepted = self.check_spawn_point_selected()
+                if selected:
                     break
 
-        return self.is_spawn_point_selected()
+        # Confirm the selection unless the last check can be accepted as is
+        return selected if accepted else self.is_spawn_point_selected()
 
     def select_random_spawn_point(self) -> bool:
         attempt = 0
         max_attempts = 5
-        while not self.is_spawn_point_selected() and attempt < max_attempts:
+        selected, accepted = self.check_spawn_point_selected()
+        while not selected and attempt < max_attempts:
             # Reset mouse to top left corner
             mouse_reset_legacy()
 
@@ -851,19 +1246,20 @@ class GameInstanceManager:
             mouse_click_in_game_window(self.game_window, legacy=True)
 
             attempt += 1
+            selected, accepted = self.check_spawn_point_selected()
 
-        return self.is_spawn_point_selected()
+        # Confirm the selection unless the last check can be accepted as is
+        return selected if accepted else self.is_spawn_point_selected()
 
-    @staticmethod
-    def start_spectating_via_freecam_toggle() -> None:
+    def start_spectating_via_freecam_toggle(self) -> None:
         auto_press_key(0x39)
+        self.camera_changed_at = time.time()
         time.sleep(.2)
 
     def is_spawn_point_selectable(self) -> bool:
-        return 'select' in ocr_screenshot_game_window_region(
-            self.game_window,
-            self.resolution,
+        return self.is_label_visible(
             'spawn-selected-text',
+            'select',
             image_ops=[
                 (ImageOperation.grayscale, None),
                 (ImageOperation.colorize, {'black': '#000', 'white': '#fff', 'blackpoint': 30, 'whitepoint': 175}),
@@ -872,10 +1268,13 @@ class GameInstanceManager:
         )
 
     def is_spawn_point_selected(self) -> bool:
-        return 'done' in ocr_screenshot_game_window_region(
-            self.game_window,
-            self.resolution,
+        selected, _ = self.check_spawn_point_selected()
+        return selected
+
+    def check_spawn_point_selected(self) -> Tuple[bool, bool]:
+        return self.check_label(
             'spawn-selected-text',
+            'done',
             image_ops=[
                 (ImageOperation.grayscale, None),
                 (ImageOperation.colorize, {'black': '#000', 'white': '#fff', 'blackpoint': 30, 'whitepoint': 175}),
@@ -884,10 +1283,9 @@ class GameInstanceManager:
         )
 
     def is_suicide_button_visible(self) -> bool:
-        return 'suicide' in ocr_screenshot_game_window_region(
-            self.game_window,
-            self.resolution,
+        return self.is_label_visible(
             'suicide-button',
+            'suicide',
             image_ops=[
                 (ImageOperation.grayscale, None),
                 (ImageOperation.colorize, {'black': '#000', 'white': '#fff', 'blackpoint': 30, 'whitepoint': 175}),
@@ -915,25 +1313,16 @@ class GameInstanceManager:
         return not self.is_scoreboard_visible()
 
     def is_scoreboard_visible(self) -> bool:
-        for side in ['table-icons-left', 'table-icons-right']:
-            histogram = histogram_screenshot_region(
-                self.game_window,
-                constants.COORDINATES[self.resolution]['hists']['scoreboard'][side]
-            )
-
-            delta = calc_cv2_hist_delta(
-                histogram,
-                self.histograms[self.resolution]['scoreboard'][side]
-            )
-
-            if delta >= constants.HISTCMP_MAX_DELTA:
-                return False
-
-        return True
-
-    @staticmethod
-    def rotate_to_next_player():
+        sides = ['table-icons-left', 'table-icons-right']
+        return all(self.are_histogram_regions_matching(
+            [f'scoreboard/{side}' for side in sides],
+            [constants.COORDINATES[self.resolution]['hists']['scoreboard'][side] for side in sides],
+            [f'scoreboard/{side}' for side in sides]
+        ))
+
+    def rotate_to_next_player(self):
         auto_press_key(0x2e)
+        self.camera_changed_at = time.time()
 
     def join_game(self) -> bool:
         if not self.is_join_game_button_visible():
@@ -0,0 +1,8 @@
+from .compare import calc_bhattacharyya_distances, stack_histograms
+from .engine import HistogramEngine
+from .subsampling import HISTOGRAM_SUBSAMPLING_MODES, subsample_image, get_subsampling_factor
+from .store import HistogramStore, flatten_histograms, write_histogram_store
+
+__all__ = ['HistogramStore', 'flatten_histograms', 'write_histogram_store', 'calc_bhattacharyya_distances',
+           'stack_histograms', 'HistogramEngine', 'HISTOGRAM_SUBSAMPLING_MODES', 'subsample_image',
+           'get_subsampling_factor']
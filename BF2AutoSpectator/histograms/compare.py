@@ -0,0 +1,35 @@
+from typing import List
+
+import numpy as np
+from numpy import ndarray
+
+# Sums below this are treated as zero (as done by OpenCV)
+FLT_EPSILON = np.finfo(np.float32).eps
+
+
+def stack_histograms(histograms: List[ndarray]) -> ndarray:
+    """
+    Stack histograms into a matrix with one histogram per row
+    :param histograms: histograms in the format returned by cv2.calcHist (one bin per row)
+    :return:
+    """
+    return np.stack([np.asarray(histogram).reshape(-1) for histogram in histograms])
+
+
+def calc_bhattacharyya_distances(observed: ndarray, references: ndarray) -> ndarray:
+    """
+    Calculate the Bhattacharyya distance between each observed and each reference histogram in a single pass
+    (matches cv2.compareHist with cv2.HISTCMP_BHATTACHARYYA)
+    :param observed: matrix of observed histograms, one histogram per row
+    :param references: matrix of reference histograms, one histogram per row
+    :return: matrix of distances, one row per observed and one column per reference histogram
+    """
+    observed = np.asarray(observed, dtype=np.float64)
+    references = np.asarray(references, dtype=np.float64)
+
+    products = np.sqrt(observed) @ np.sqrt(references).T
+    sums = np.outer(observed.sum(axis=1), references.sum(axis=1))
+    with np.errstate(divide='ignore'):
+        scale = np.where(np.abs(sums) > FLT_EPSILON, 1.0 / np.sqrt(np.abs(sums)), 1.0)
+
+    return np.sqrt(np.maximum(1.0 - products * scale, 0.0))
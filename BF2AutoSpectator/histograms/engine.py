@@ -0,0 +1,178 @@
+import threading
+import weakref
+from typing import Dict, List, Tuple, Optional
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from BF2AutoSpectator.capture import Frame
+from BF2AutoSpectator.histograms.store import HISTOGRAM_BINS
+from BF2AutoSpectator.histograms.subsampling import subsample_image
+
+# Channel histograms are calculated for (images are RGB, so this is the blue channel)
+HISTOGRAM_CHANNEL = 2
+
+
+def calc_histogram(image: ndarray) -> ndarray:
+    """
+    Calculate the histogram of an image
+    :param image: RGB image
+    :return: histogram in the format returned by cv2.calcHist (one bin per row)
+    """
+    return cv2.calcHist([image], [HISTOGRAM_CHANNEL], None, [HISTOGRAM_BINS], [0, HISTOGRAM_BINS]).reshape(-1, 1)
+
+
+class BandTable:
+    """
+    Cumulative per-column histograms of a horizontal band of a frame, from which the histogram of any region within the
+    band (and the table's column span) can be calculated by subtracting two rows
+    """
+    left: int
+    right: int
+    cumulative: ndarray
+
+    def __init__(self, image: ndarray, left: int, right: int):
+        """
+        :param image: single channel image of the band, spanning the table's columns
+        :param left: first column of the band covered by the table
+        :param right: column after the last column covered by the table
+        """
+        self.left = left
+        self.right = right
+
+        height, width = image.shape
+        # Count each (column, value) pair, then accumulate counts across columns
+        counts = np.bincount(
+            (np.arange(width, dtype=np.int32) * HISTOGRAM_BINS + image).ravel(),
+            minlength=width * HISTOGRAM_BINS
+        ).reshape(width, HISTOGRAM_BINS)
+        self.cumulative = np.zeros((width + 1, HISTOGRAM_BINS), dtype=np.int32)
+        np.cumsum(counts, axis=0, out=self.cumulative[1:])
+
+    def covers(self, left: int, right: int) -> bool:
+        return self.left <= left and right <= self.right
+
+    def get_histogram(self, left: int, right: int) -> ndarray:
+        histogram = self.cumulative[right - self.left] - self.cumulative[left - self.left]
+        return histogram.astype(np.float32).reshape(-1, 1)
+
+
+class FrameHistograms:
+    """
+    Histograms calculated for a single frame, along with the band tables they were calculated from
+    """
+    # Histograms by crop and subsampling factor
+    histograms: Dict[Tuple[Tuple[int, int, int, int], int], ndarray]
+    # Band tables by band, format: (top, bottom) (as image crop borders)
+    tables: Dict[Tuple[int, int], List[BandTable]]
+
+    def __init__(self):
+        self.histograms = {}
+        self.tables = {}
+
+
+class HistogramEngine:
+    """
+    Calculates histograms of frame regions, scanning each pixel of a frame at most once where possible.
+    Identical regions are only calculated once per frame. Regions sharing a horizontal band (e.g. the items of a menu
+    or both sides of the scoreboard) are calculated from cumulative per-column histograms of the band, which only
+    cover the columns of the requested regions (so overlapping regions share the scan of their overlap).
+    Regions can optionally be subsampled, in which case their (approximate) histogram is calculated from a subsampled
+    image of the region instead.
+    """
+    subsampling_mode: str
+    frames: 'weakref.WeakKeyDictionary[Frame, FrameHistograms]'
+    lock: threading.Lock
+
+    requested_pixels: int = 0
+    scanned_pixels: int = 0
+
+    def __init__(self, subsampling_mode: str = 'stride'):
+        """
+        :param subsampling_mode: mode to subsample regions with (see HISTOGRAM_SUBSAMPLING_MODES)
+        """
+        self.subsampling_mode = subsampling_mode
+        self.frames = weakref.WeakKeyDictionary()
+        self.lock = threading.Lock()
+
+    def get_histograms(self, frame: Frame, crops: List[Tuple[int, int, int, int]],
+                       factors: Optional[List[int]] = None) -> List[ndarray]:
+        """
+        Get the histograms of multiple frame regions
+        :param frame: frame to calculate histograms of
+        :param crops: image crop tuples of regions, format: (left, top, right, bottom)
+        :param factors: subsampling factor of each region (all regions are calculated at full resolution if not given)
+        :return: histograms in the format returned by cv2.calcHist, one per crop
+        """
+        keys = list(zip(crops, factors if factors is not None else [1] * len(crops)))
+        with self.lock:
+            state = self.frames.get(frame)
+            if state is None:
+                state = self.frames[frame] = FrameHistograms()
+
+            pending = [key for key in dict.fromkeys(keys) if key not in state.histograms]
+            self.requested_pixels += sum(self.get_crop_area(frame, crop) for crop in crops)
+
+            # Group regions by band, only bands with multiple regions (or existing tables) are worth a table
+            bands: Dict[Tuple[int, int], List[Tuple[int, int, int, int]]] = {}
+            for crop, factor in pending:
+                if factor > 1:
+                    state.histograms[(crop, factor)] = self.calc_histogram(frame, crop, factor)
+                    continue
+
+                left, top, right, bottom = crop
+                bands.setdefault((top, bottom), []).append(crop)
+
+            for (top, bottom), band_crops in bands.items():
+                if len(band_crops) == 1 and (top, bottom) not in state.tables:
+                    crop, = band_crops
+                    state.histograms[(crop, 1)] = self.calc_histogram(frame, crop)
+                    continue
+
+                for crop in band_crops:
+                    state.histograms[(crop, 1)] = self.calc_band_histogram(frame, state, crop, band_crops)
+
+            return [state.histograms[key] for key in keys]
+
+    def calc_histogram(self, frame: Frame, crop: Tuple[int, int, int, int], factor: int = 1) -> ndarray:
+        image = subsample_image(frame.crop(crop), factor, self.subsampling_mode)
+        self.scanned_pixels += image.shape[0] * image.shape[1]
+        return calc_histogram(image)
+
+    def calc_band_histogram(self, frame: Frame, state: FrameHistograms, crop: Tuple[int, int, int, int],
+                            band_crops: List[Tuple[int, int, int, int]]) -> ndarray:
+        width, height = frame.get_size()
+        left, top, right, bottom = crop
+        start, end = left, width - right
+
+        tables = state.tables.setdefault((top, bottom), [])
+        table = next((t for t in tables if t.covers(start, end)), None)
+        if table is None:
+            # Cover the crop along with any other crops of the band that overlap/touch it, so those share the table
+            spans = [(c[0], width - c[2]) for c in band_crops]
+            extended = True
+            while extended:
+                extended = False
+                for span_start, span_end in spans:
+                    if span_start <= end and span_end >= start and (span_start < start or span_end > end):
+                        start, end = min(start, span_start), max(end, span_end)
+                        extended = True
+
+            try:
+                image = frame.crop((start, top, width - end, bottom))[:, :, HISTOGRAM_CHANNEL]
+            except ValueError:
+                # Frame does not contain the combined span (only parts of the frame were captured)
+                return self.calc_histogram(frame, crop)
+
+            self.scanned_pixels += image.shape[0] * image.shape[1]
+            table = BandTable(image, start, end)
+            tables.append(table)
+
+        return table.get_histogram(left, width - right)
+
+    @staticmethod
+    def get_crop_area(frame: Frame, crop: Tuple[int, int, int, int]) -> int:
+        width, height = frame.get_size()
+        left, top, right, bottom = crop
+        return max(width - right - left, 0) * max(height - bottom - top, 0)
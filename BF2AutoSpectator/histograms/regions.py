@@ -0,0 +1,77 @@
+from typing import List, Tuple, Optional
+
+from BF2AutoSpectator.common import constants
+from BF2AutoSpectator.histograms.store import HistogramStore
+
+# Area of the game window the default camera view is compared in, format: (left, top, right, bottom)
+DEFAULT_CAMERA_VIEW_CROP = (168, 0, 168, 0)
+
+
+class HistogramRegion:
+    """
+    Game window region detectors compare to a reference histogram
+    """
+    key: str
+    crop: Tuple[int, int, int, int]
+    reference_key: str
+    max_delta: float
+
+    def __init__(self, key: str, crop: Tuple[int, int, int, int], reference_key: str, max_delta: float):
+        """
+        :param key: key of the region, e.g. "menu/join-internet" (as used in recordings, prefixed with "hists/")
+        :param crop: image crop tuple of region, format: (left, top, right, bottom)
+        :param reference_key: key of the reference histogram the region is compared to, e.g. "menu/join-internet/active"
+        :param max_delta: maximum delta between histograms for them to be considered a match
+        """
+        self.key = key
+        self.crop = crop
+        self.reference_key = reference_key
+        self.max_delta = max_delta
+
+    def __repr__(self) -> str:
+        return f'HistogramRegion({self.key!r}, {self.crop!r}, {self.reference_key!r}, {self.max_delta!r})'
+
+
+def get_histogram_regions(store: HistogramStore, resolution: str) -> List[HistogramRegion]:
+    """
+    Get all regions detectors compare to a (single) reference histogram at a resolution
+    (team selection regions are left out, since those are compared to all teams' histograms)
+    :param store: store containing the reference histograms
+    :param resolution: resolution to get regions for
+    :return:
+    """
+    coordinates = constants.COORDINATES[resolution]['hists']
+    regions = []
+    for group in ['menu', 'eor', 'spawn-menu', 'scoreboard']:
+        for item in coordinates[group]:
+            regions.append(get_histogram_region(store, resolution, f'{group}/{item}'))
+
+    for key in store.get_keys(resolution, 'maps/default-camera-view/'):
+        regions.append(get_histogram_region(store, resolution, key))
+
+    return regions
+
+
+def get_histogram_region(store: HistogramStore, resolution: str, key: str) -> Optional[HistogramRegion]:
+    """
+    Get a region detectors compare to a (single) reference histogram
+    :param store: store containing the reference histograms
+    :param resolution: resolution to get region for
+    :param key: key of the region, e.g. "menu/join-internet" or "maps/default-camera-view/dalian-plant"
+    :return: region (None if there is no such region)
+    """
+    if key.startswith('maps/default-camera-view/'):
+        return HistogramRegion(key, DEFAULT_CAMERA_VIEW_CROP, key, constants.DEFAULT_CAMERA_VIEW_HISTCMP_MAX_DELTA)
+
+    group, _, item = key.partition('/')
+    items = constants.COORDINATES[resolution]['hists'].get(group)
+    # Team selection regions are not compared to a single reference
+    if not isinstance(items, dict) or item not in items:
+        return None
+    crop = items[item]
+
+    # Items that can be active/inactive are compared to their active reference (at any resolution)
+    active = any(store.has(other, f'{key}/active') for other in store.get_resolutions())
+    reference_key = f'{key}/active' if active else key
+
+    return HistogramRegion(key, crop, reference_key, constants.HISTCMP_MAX_DELTA)
@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+from typing import Dict, List, Tuple, Optional
+
+import numpy as np
+from numpy import ndarray
+
+HISTOGRAM_STORE_VERSION = 2
+# Version 1 stores are still supported (they simply do not contain any thresholds)
+HISTOGRAM_STORE_SUPPORTED_VERSIONS = [1, 2]
+HISTOGRAM_STORE_INDEX_NAME = 'index.json'
+HISTOGRAM_BINS = 256
+
+
+class HistogramStore:
+    """
+    Reference histograms, stored as one contiguous float32 matrix (one histogram per row) per resolution.
+    Matrices are memory-mapped from disk when a resolution is first used, an index maps region keys
+    (e.g. "teams/usmc/active") to rows. Stores can also contain calibrated thresholds (maximum deltas) of regions.
+    """
+    directory: str
+    bins: int
+    # Rows of histograms by resolution and key
+    rows: Dict[str, Dict[str, int]]
+    # Thresholds by resolution and region key
+    thresholds: Dict[str, Dict[str, float]]
+
+    matrices: Dict[str, ndarray]
+    # Stacks of histograms by resolution and keys
+    stacks: Dict[Tuple[str, Tuple[str, ...]], ndarray]
+    lock: threading.Lock
+
+    def __init__(self, directory: str):
+        """
+        :param directory: directory containing the store (index and one matrix per resolution)
+        :raises OSError: if the store index cannot be read
+        :raises ValueError: if the store index is invalid or was written by an incompatible version
+        """
+        self.directory = directory
+        self.matrices = {}
+        self.stacks = {}
+        self.lock = threading.Lock()
+
+        with open(os.path.join(directory, HISTOGRAM_STORE_INDEX_NAME), 'r') as file:
+            index = json.load(file)
+
+        if index.get('version') not in HISTOGRAM_STORE_SUPPORTED_VERSIONS:
+            raise ValueError(f'Unsupported histogram store version: {index.get("version")}')
+
+        self.bins = index['bins']
+        self.rows = {resolution: details['rows'] for resolution, details in index['resolutions'].items()}
+        self.thresholds = {
+            resolution: details.get('thresholds', {}) for resolution, details in index['resolutions'].items()
+        }
+
+    def get_matrix(self, resolution: str) -> ndarray:
+        """
+        Get all reference histograms of a resolution
+        :param resolution: resolution to get histograms for
+        :return: (read-only) matrix with one histogram per row
+        """
+        with self.lock:
+            if resolution not in self.matrices:
+                self.matrices[resolution] = np.load(
+                    os.path.join(self.directory, f'{resolution}.npy'),
+                    mmap_mode='r'
+                )
+
+            return self.matrices[resolution]
+
+    def get_row(self, resolution: str, key: str) -> int:
+        return self.rows[resolution][key]
+
+    def has(self, resolution: str, key: str) -> bool:
+        return key in self.rows.get(resolution, {})
+
+    def get(self, resolution: str, key: str) -> ndarray:
+        """
+        Get a reference histogram
+        :param resolution: resolution to get histogram for
+        :param key: key of histogram, e.g. "teams/usmc/active"
+        :return: histogram in the format returned by cv2.calcHist (one bin per row)
+        """
+        return self.get_matrix(resolution)[self.get_row(resolution, key)].reshape(-1, 1)
+
+    def get_stack(self, resolution: str, keys: List[str]) -> ndarray:
+        """
+        Get multiple reference histograms as a matrix (for comparing them in a single pass)
+        (stacks are cached, since detectors usually compare against the same set of references)
+        :param resolution: resolution to get histograms for
+        :param keys: keys of histograms
+        :return: matrix with one histogram per row, in the order of the given keys
+        """
+        stack_key = (resolution, tuple(keys))
+        with self.lock:
+            stack = self.stacks.get(stack_key)
+        if stack is None:
+            stack = self.get_matrix(resolution)[[self.get_row(resolution, key) for key in keys]]
+            with self.lock:
+                self.stacks[stack_key] = stack
+
+        return stack
+
+    def get_threshold(self, resolution: str, region_key: str, default: float) -> float:
+        """
+        Get the calibrated threshold of a region
+        :param resolution: resolution to get threshold for
+        :param region_key: key of region, e.g. "menu/join-internet"
+        :param default: threshold to use if the region's threshold has not been calibrated
+        :return: maximum delta between histograms for them to be considered a match
+        """
+        return self.thresholds.get(resolution, {}).get(region_key, default)
+
+    def get_resolutions(self) -> List[str]:
+        return list(self.rows.keys())
+
+    def get_keys(self, resolution: str, prefix: str = '') -> List[str]:
+        """
+        Get the keys of all histograms of a resolution starting with a prefix (ordered by row)
+        :param resolution: resolution to get keys for
+        :param prefix: prefix to filter keys by, e.g. "maps/default-camera-view/"
+        :return:
+        """
+        rows = self.rows.get(resolution, {})
+        return sorted((key for key in rows if key.startswith(prefix)), key=rows.get)
+
+
+def flatten_histograms(histograms: dict, prefix: str = '') -> Dict[str, ndarray]:
+    """
+    Flatten a nested dict of histograms into a dict keyed by path
+    :param histograms: nested dict of histograms, e.g. {'teams': {'usmc': {'active': ...}}}
+    :param prefix: prefix of all keys
+    :return: histograms keyed by path, e.g. {'teams/usmc/active': ...}
+    """
+    flattened = {}
+    for key, value in histograms.items():
+        if isinstance(value, dict):
+            flattened.update(flatten_histograms(value, f'{prefix}{key}/'))
+        else:
+            flattened[f'{prefix}{key}'] = value
+
+    return flattened
+
+
+def write_histogram_store(directory: str, histograms: Dict[str, Dict[str, ndarray]],
+                          thresholds: Optional[Dict[str, Dict[str, float]]] = None) -> None:
+    """
+    Write reference histograms to a store
+    :param directory: directory to write store to (will be created if it does not exist)
+    :param histograms: histograms by resolution and key
+    :param thresholds: thresholds by resolution and region key
+    :return:
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    resolutions = {}
+    for resolution, resolution_histograms in histograms.items():
+        keys = list(resolution_histograms.keys())
+        matrix = np.zeros((len(keys), HISTOGRAM_BINS), dtype=np.float32)
+        for row, key in enumerate(keys):
+            matrix[row] = np.asarray(resolution_histograms[key], dtype=np.float32).reshape(-1)
+
+        np.save(os.path.join(directory, f'{resolution}.npy'), matrix)
+        resolutions[resolution] = {'rows': {key: row for row, key in enumerate(keys)}}
+        if thresholds is not None and len(thresholds.get(resolution, {})) > 0:
+            resolutions[resolution]['thresholds'] = thresholds[resolution]
+
+    with open(os.path.join(directory, HISTOGRAM_STORE_INDEX_NAME), 'w') as file:
+        json.dump({'version': HISTOGRAM_STORE_VERSION, 'bins': HISTOGRAM_BINS, 'resolutions': resolutions}, file,
+                  indent=2)
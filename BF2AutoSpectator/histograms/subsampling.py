@@ -0,0 +1,49 @@
+from typing import Dict
+
+import cv2
+from numpy import ndarray
+
+# stride: take every n-th pixel of every n-th row, pyramid: repeatedly halve the image (blurring before each step)
+HISTOGRAM_SUBSAMPLING_MODES = ['stride', 'pyramid']
+
+
+def subsample_image(image: ndarray, factor: int, mode: str) -> ndarray:
+    """
+    Subsample an image in order to calculate an approximate histogram of it from fewer pixels
+    (Bhattacharyya distances do not depend on the total number of pixels, so histograms of subsampled images can be
+    compared to reference histograms calculated at full resolution)
+    :param image: image to subsample
+    :param factor: factor to reduce both dimensions of the image by (1 to not subsample)
+    :param mode: subsampling mode (see HISTOGRAM_SUBSAMPLING_MODES)
+    :return: subsampled image
+    :raises ValueError: if the mode is unknown or the factor is not supported by the mode
+    """
+    if mode not in HISTOGRAM_SUBSAMPLING_MODES:
+        raise ValueError(f'Unknown histogram subsampling mode: {mode}')
+    if factor < 1 or (mode == 'pyramid' and factor & (factor - 1) != 0):
+        raise ValueError(f'Unsupported factor for histogram subsampling mode {mode}: {factor}')
+
+    if mode == 'stride':
+        return image[::factor, ::factor]
+
+    while factor > 1 and image.shape[1] > 1:
+        image = cv2.pyrDown(image)
+        factor //= 2
+
+    return image
+
+
+def get_subsampling_factor(factors: Dict[str, int], region_key: str) -> int:
+    """
+    Get the subsampling factor of a region
+    :param factors: subsampling factors by region key or prefix of region keys, e.g. "maps/default-camera-view"
+    :param region_key: key of the region, e.g. "maps/default-camera-view/dalian-plant"
+    :return: factor of the region's most specific entry (1 if there is none)
+    """
+    parts = region_key.split('/')
+    for length in range(len(parts), 0, -1):
+        factor = factors.get('/'.join(parts[:length]))
+        if factor is not None:
+            return factor
+
+    return 1
@@ -0,0 +1,13 @@
+from .cache import OCRResultCache, get_ocr_result_cache
+from .engines import OCREngine, PytesseractEngine, TesserocrEngine, get_ocr_engine, set_ocr_engine
+from .executor import OCRExecutor, get_ocr_executor, set_ocr_executor
+from .glyphs import GlyphReader
+from .ink import InkDensityGate, get_ink_density
+from .labels import LabelMatcher
+from .profiles import OCRProfile, get_ocr_profile
+from .result import OCRResult
+
+__all__ = ['OCREngine', 'PytesseractEngine', 'TesserocrEngine', 'get_ocr_engine', 'set_ocr_engine',
+           'OCRResultCache', 'get_ocr_result_cache', 'OCRExecutor', 'get_ocr_executor', 'set_ocr_executor',
+           'LabelMatcher', 'GlyphReader', 'OCRProfile', 'get_ocr_profile', 'OCRResult', 'InkDensityGate',
+           'get_ink_density']
@@ -0,0 +1,67 @@
+import re
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+# Page segmentation mode for batches: uniform block of text (one line per image)
+BATCH_OCR_PSM = 6
+
+
+def get_batch_ocr_config(ocr_config: str) -> str:
+    """
+    Adapt an OCR config for running a batch of single line images through OCR
+    :param ocr_config: config/parameters for Tesseract OCR used for individual images
+    :return:
+    """
+    if re.search(r'--psm\s+\d+', ocr_config) is None:
+        return f'{ocr_config} --psm {BATCH_OCR_PSM}'
+
+    return re.sub(r'--psm\s+\d+', f'--psm {BATCH_OCR_PSM}', ocr_config)
+
+
+def layout_batch(images: List[ndarray], padding: int = 12) -> Tuple[ndarray, List[Tuple[int, int]]]:
+    """
+    Stack images on a single canvas (one below the other), padding each image with its own background color
+    :param images: images to stack (must all be grayscale or all be RGB)
+    :param padding: number of pixels to pad each image by on each side
+    :return: canvas and the vertical band each image occupies on it, format: (top, bottom)
+    """
+    width = max(image.shape[1] for image in images)
+
+    parts: List[ndarray] = []
+    bands: List[Tuple[int, int]] = []
+    top = 0
+    for image in images:
+        # Use the median color of the image's outermost pixels, so the padding blends in with the background
+        # (replicating the edges would smear any text touching the edges)
+        edges = np.concatenate([image[0], image[-1], image[:, 0], image[:, -1]])
+        background = np.median(edges, axis=0)
+        padded = cv2.copyMakeBorder(
+            image, padding, padding, padding, padding + width - image.shape[1], cv2.BORDER_CONSTANT,
+            value=background.tolist() if image.ndim == 3 else float(background)
+        )
+        parts.append(padded)
+        bands.append((top, top + padded.shape[0]))
+        top += padded.shape[0]
+
+    return np.concatenate(parts), bands
+
+
+def assign_words(words: List[Tuple[str, Tuple[int, int, int, int]]], bands: List[Tuple[int, int]]) -> List[str]:
+    """
+    Map words found on a batch canvas back to the images they were found on
+    :param words: words and their bounding boxes, format: (left, top, right, bottom)
+    :param bands: vertical band each image occupies on the canvas, format: (top, bottom)
+    :return: text found on each image (words in order of appearance)
+    """
+    image_words: List[List[Tuple[int, str]]] = [[] for _ in bands]
+    for text, (left, top, right, bottom) in words:
+        center = (top + bottom) / 2
+        for i, (band_top, band_bottom) in enumerate(bands):
+            if band_top <= center < band_bottom:
+                image_words[i].append((left, text))
+                break
+
+    return [' '.join(text for _, text in sorted(w)) for w in image_words]
@@ -0,0 +1,93 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class OCRResultCache:
+    """
+    Size-bounded (LRU) cache for OCR results, keyed by the (region) key of the image plus its perceptual hash.
+    Results are re-used for any image whose hash differs from a cached hash by at most a few bits (by default, callers
+    should require exact hash matches for regions where a single changed character only changes a few bits, e.g. free
+    text).
+    """
+    maxsize: int
+    max_distance: int
+    results: 'OrderedDict[Tuple[Hashable, int], str]'
+    # Hashes cached per key, used to find hashes within the max distance
+    hashes: Dict[Hashable, List[int]]
+    lock: threading.Lock
+
+    hits: int = 0
+    misses: int = 0
+
+    def __init__(self, maxsize: int = 512, max_distance: int = 4):
+        """
+        :param maxsize: maximum number of results to cache
+        :param max_distance: default maximum number of bits a hash may differ from a cached hash to re-use its result
+        """
+        self.maxsize = maxsize
+        self.max_distance = max_distance
+        self.results = OrderedDict()
+        self.hashes = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable, image_hash: int, max_distance: Optional[int] = None) -> Optional[str]:
+        """
+        Get the cached result for the key and a similar hash
+        :param key: cache key (should identify the region and any processing/OCR parameters)
+        :param image_hash: perceptual hash of the image
+        :param max_distance: maximum number of bits the hash may differ from a cached hash (default if not given)
+        :return: cached result or None if there is none
+        """
+        max_distance = max_distance if max_distance is not None else self.max_distance
+        with self.lock:
+            for cached_hash in self.hashes.get(key, []):
+                if bin(cached_hash ^ image_hash).count('1') <= max_distance:
+                    self.hits += 1
+                    self.results.move_to_end((key, cached_hash))
+                    return self.results[(key, cached_hash)]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, image_hash: int, result: str) -> None:
+        with self.lock:
+            if (key, image_hash) not in self.results:
+                self.hashes.setdefault(key, []).append(image_hash)
+            self.results[(key, image_hash)] = result
+            self.results.move_to_end((key, image_hash))
+
+            while len(self.results) > self.maxsize:
+                (evicted_key, evicted_hash), _ = self.results.popitem(last=False)
+                self.hashes[evicted_key].remove(evicted_hash)
+                if len(self.hashes[evicted_key]) == 0:
+                    del self.hashes[evicted_key]
+
+    def get_or_compute(self, key: Hashable, image_hash: int, compute: Callable[[], str],
+                       max_distance: Optional[int] = None) -> str:
+        """
+        Get the cached result for the key and a similar hash or compute (and cache) it
+        :param key: cache key (should identify the region and any processing/OCR parameters)
+        :param image_hash: perceptual hash of the image
+        :param compute: callable computing the result
+        :param max_distance: maximum number of bits the hash may differ from a cached hash (default if not given)
+        :return:
+        """
+        result = self.get(key, image_hash, max_distance)
+        if result is None:
+            result = compute()
+            self.put(key, image_hash, result)
+
+        return result
+
+    def clear(self) -> None:
+        with self.lock:
+            self.results.clear()
+            self.hashes.clear()
+
+
+_ocr_result_cache = OCRResultCache()
+
+
+def get_ocr_result_cache() -> OCRResultCache:
+    return _ocr_result_cache
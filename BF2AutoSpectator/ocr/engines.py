@@ -0,0 +1,253 @@
+import shlex
+import threading
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from types import ModuleType
+from typing import Dict, Tuple, List, Optional
+
+import numpy as np
+import pytesseract
+from numpy import ndarray
+
+from BF2AutoSpectator.ocr.result import OCRResult
+
+
+class OCREngine(ABC):
+    """
+    Engine running images through Tesseract OCR. Any OCR done by the vision helpers goes through the active engine.
+    """
+    @abstractmethod
+    def image_to_string(self, image: ndarray, ocr_config: str) -> str:
+        """
+        Extract text from an image
+        :param image: RGB or grayscale image to extract text from
+        :param ocr_config: config/parameters for Tesseract OCR (see https://guides.nyu.edu/tesseract/usage)
+        :return: raw OCR result
+        """
+        pass
+
+    @abstractmethod
+    def image_to_words(self, image: ndarray, ocr_config: str) -> List[Tuple[str, Tuple[int, int, int, int]]]:
+        """
+        Extract words along with their location from an image
+        :param image: RGB or grayscale image to extract words from
+        :param ocr_config: config/parameters for Tesseract OCR (see https://guides.nyu.edu/tesseract/usage)
+        :return: words and their bounding boxes, format: (left, top, right, bottom)
+        """
+        pass
+
+    @abstractmethod
+    def image_to_result(self, image: ndarray, ocr_config: str) -> OCRResult:
+        """
+        Extract text along with the confidence of each word from an image
+        :param image: RGB or grayscale image to extract text from
+        :param ocr_config: config/parameters for Tesseract OCR (see https://guides.nyu.edu/tesseract/usage)
+        :return: raw OCR result
+        """
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class PytesseractEngine(OCREngine):
+    """
+    Runs OCR via pytesseract, which starts a new Tesseract process (loading all models) for every image
+    """
+    language: str
+    tessdata_path: Optional[str]
+
+    def __init__(self, language: str = 'eng', tessdata_path: Optional[str] = None):
+        """
+        :param language: name of the model (traineddata file) to use unless the OCR config specifies one
+        :param tessdata_path: path to folder containing the model (Tesseract's tessdata folder is used if not given)
+        """
+        self.language = language
+        self.tessdata_path = tessdata_path
+
+    def image_to_string(self, image: ndarray, ocr_config: str) -> str:
+        return pytesseract.image_to_string(image, lang=self.get_language(ocr_config),
+                                           config=self.get_config(ocr_config))
+
+    def image_to_words(self, image: ndarray, ocr_config: str) -> List[Tuple[str, Tuple[int, int, int, int]]]:
+        data = pytesseract.image_to_data(image, lang=self.get_language(ocr_config), config=self.get_config(ocr_config),
+                                         output_type=pytesseract.Output.DICT)
+        return [
+            (text, (left, top, left + width, top + height))
+            for text, left, top, width, height in zip(data['text'], data['left'], data['top'], data['width'],
+                                                      data['height'])
+            if text.strip() != ''
+        ]
+
+    def image_to_result(self, image: ndarray, ocr_config: str) -> OCRResult:
+        data = pytesseract.image_to_data(image, lang=self.get_language(ocr_config), config=self.get_config(ocr_config),
+                                         output_type=pytesseract.Output.DICT)
+        # Rebuild the text line by line (words of a line are separated by a single space)
+        lines: Dict[Tuple[int, int, int], List[str]] = {}
+        words = []
+        for text, confidence, block, paragraph, line in zip(data['text'], data['conf'], data['block_num'],
+                                                            data['par_num'], data['line_num']):
+            if text.strip() == '':
+                continue
+            lines.setdefault((block, paragraph, line), []).append(text)
+            words.append((text, float(confidence)))
+
+        return OCRResult('\n'.join(' '.join(line) for line in lines.values()), words)
+
+    def get_language(self, ocr_config: str) -> str:
+        language, *_ = parse_ocr_config(ocr_config)
+        return language if language is not None else self.language
+
+    def get_config(self, ocr_config: str) -> str:
+        if self.tessdata_path is None:
+            return ocr_config
+
+        return f'--tessdata-dir "{self.tessdata_path}" {ocr_config}'
+
+
+@lru_cache(maxsize=32)
+def parse_ocr_config(ocr_config: str) -> Tuple[Optional[str], int, int, Tuple[Tuple[str, str], ...]]:
+    """
+    Parse Tesseract command line parameters
+    :param ocr_config: config/parameters for Tesseract OCR, e.g. "--oem 3 --psm 7 -c tessedit_char_whitelist=0123"
+    :return: language (None if not specified), OCR engine mode, page segmentation mode and any variables
+    """
+    language, oem, psm, variables = None, 3, 3, []
+    args = shlex.split(ocr_config)
+    for flag, value in zip(args, args[1:]):
+        if flag == '-l':
+            language = value
+        elif flag == '--oem':
+            oem = int(value)
+        elif flag == '--psm':
+            psm = int(value)
+        elif flag == '-c':
+            name, _, variable_value = value.partition('=')
+            variables.append((name, variable_value))
+        elif flag == '--user-words':
+            variables.append(('user_words_file', value))
+
+    return language, oem, psm, tuple(variables)
+
+
+class TesserocrEngine(OCREngine):
+    """
+    Runs OCR in-process via tesserocr (Tesseract API bindings), loading models only once.
+    Tesseract APIs are not thread-safe, so each thread gets its own API instance per language/mode/variables.
+    """
+    tessdata_path: str
+    language: str
+    tesserocr: ModuleType
+
+    local: threading.local
+    lock: threading.Lock
+    apis: List[object]
+
+    def __init__(self, tessdata_path: str, language: str = 'eng'):
+        """
+        :param tessdata_path: path to folder containing the traineddata files (usually Tesseract's tessdata folder)
+        :param language: name of the model (traineddata file) to use unless the OCR config specifies one
+        :raises ImportError: if tesserocr is not installed
+        :raises RuntimeError: if Tesseract cannot load the model from the tessdata folder
+        """
+        # Import here, since tesserocr is an optional dependency
+        import tesserocr
+        self.tesserocr = tesserocr
+
+        self.tessdata_path = tessdata_path
+        self.language = language
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.apis = []
+
+        # Load the model right away, so an unusable model/tessdata folder surfaces when choosing the engine
+        _, oem, _, variables = parse_ocr_config('')
+        self.get_api(self.language, oem, variables)
+
+    def image_to_string(self, image: ndarray, ocr_config: str) -> str:
+        api = self.set_image(image, ocr_config)
+        text = api.GetUTF8Text()
+        api.Clear()
+
+        return text
+
+    def image_to_words(self, image: ndarray, ocr_config: str) -> List[Tuple[str, Tuple[int, int, int, int]]]:
+        api = self.set_image(image, ocr_config)
+        api.Recognize()
+
+        words = []
+        level = self.tesserocr.RIL.WORD
+        iterator = api.GetIterator()
+        if iterator is not None:
+            for word in self.tesserocr.iterate_level(iterator, level):
+                text = word.GetUTF8Text(level)
+                if text is not None and text.strip() != '':
+                    words.append((text, word.BoundingBox(level)))
+        api.Clear()
+
+        return words
+
+    def image_to_result(self, image: ndarray, ocr_config: str) -> OCRResult:
+        api = self.set_image(image, ocr_config)
+        api.Recognize()
+
+        words = []
+        level = self.tesserocr.RIL.WORD
+        iterator = api.GetIterator()
+        if iterator is not None:
+            for word in self.tesserocr.iterate_level(iterator, level):
+                text = word.GetUTF8Text(level)
+                if text is not None and text.strip() != '':
+                    words.append((text, word.Confidence(level)))
+        text = api.GetUTF8Text()
+        api.Clear()
+
+        return OCRResult(text, words)
+
+    def set_image(self, image: ndarray, ocr_config: str):
+        language, oem, psm, variables = parse_ocr_config(ocr_config)
+        api = self.get_api(language if language is not None else self.language, oem, variables)
+
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+
+        api.SetPageSegMode(self.tesserocr.PSM(psm))
+        api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+
+        return api
+
+    def get_api(self, language: str, oem: int, variables: Tuple[Tuple[str, str], ...]):
+        apis: Dict[tuple, object] = getattr(self.local, 'apis', None)
+        if apis is None:
+            apis = self.local.apis = {}
+
+        key = language, oem, variables
+        if key not in apis:
+            # Variables are passed on init, since some (e.g. user_words_file) cannot be set afterwards
+            api = self.tesserocr.PyTessBaseAPI(path=self.tessdata_path, lang=language, oem=self.tesserocr.OEM(oem),
+                                               variables=dict(variables))
+            apis[key] = api
+            with self.lock:
+                self.apis.append(api)
+
+        return apis[key]
+
+    def close(self) -> None:
+        with self.lock:
+            for api in self.apis:
+                api.End()
+            self.apis.clear()
+
+
+_ocr_engine: OCREngine = PytesseractEngine()
+
+
+def get_ocr_engine() -> OCREngine:
+    return _ocr_engine
+
+
+def set_ocr_engine(ocr_engine: OCREngine) -> None:
+    global _ocr_engine
+    _ocr_engine.close()
+    _ocr_engine = ocr_engine
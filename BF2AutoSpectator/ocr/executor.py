@@ -0,0 +1,76 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class OCRExecutor:
+    """
+    Runs independent OCR work concurrently on a pool of worker threads (Tesseract does not hold the GIL while
+    recognizing text). With a single worker, work is run on the submitting thread, just like calling it directly.
+    """
+    workers: int
+    pool: Optional[ThreadPoolExecutor] = None
+    local: threading.local
+
+    def __init__(self, workers: int = 1):
+        """
+        :param workers: number of worker threads to run OCR work on
+        """
+        self.workers = workers
+        self.local = threading.local()
+        if workers > 1:
+            self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='OCRExecutor')
+
+    def submit(self, fn: Callable[..., T], *args, **kwargs) -> 'Future[T]':
+        """
+        Submit work to be run on a worker thread
+        (work submitted from a worker thread is run right away, since waiting on the pool from within could deadlock)
+        :param fn: callable to run
+        :return: future of the callable's result
+        """
+        if self.pool is not None and not getattr(self.local, 'in_worker', False):
+            return self.pool.submit(self.run_in_worker, fn, *args, **kwargs)
+
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+
+        return future
+
+    def map(self, fn: Callable[..., T], iterable: Iterable) -> List[T]:
+        """
+        Run a callable for each item concurrently and gather the results
+        :param fn: callable to run
+        :param iterable: items to run callable for
+        :return: results, in order of items
+        """
+        futures = [self.submit(fn, item) for item in iterable]
+        return [future.result() for future in futures]
+
+    def run_in_worker(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        self.local.in_worker = True
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.local.in_worker = False
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+
+
+_ocr_executor = OCRExecutor()
+
+
+def get_ocr_executor() -> OCRExecutor:
+    return _ocr_executor
+
+
+def set_ocr_executor(ocr_executor: OCRExecutor) -> None:
+    global _ocr_executor
+    _ocr_executor.close()
+    _ocr_executor = ocr_executor
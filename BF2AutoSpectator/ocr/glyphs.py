@@ -0,0 +1,177 @@
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+from numpy import ndarray
+
+from BF2AutoSpectator.common.logger import logger
+
+
+class GlyphReader:
+    """
+    Reads single lines of text set in a fixed-width font (such as the game console's) by comparing each character cell
+    to glyph templates. Glyph templates are learned from lines whose text is known (e.g. a command that was just typed).
+    Text is expected to be brighter than its background.
+    """
+    advance: int
+    ink_threshold: int
+    max_distance: int
+    directory: Optional[str]
+
+    # Binarized glyph templates by resolution and character
+    glyphs: Dict[str, Dict[str, ndarray]]
+    lock: threading.Lock
+
+    def __init__(self, advance: int = 6, ink_threshold: int = 160, max_distance: int = 2,
+                 directory: Optional[str] = None):
+        """
+        :param advance: width of each character cell in pixels
+        :param ink_threshold: minimum grayscale intensity of text pixels
+        :param max_distance: maximum number of pixels a cell may differ from a glyph template to be read as its character
+        :param directory: directory to load/persist glyph templates from/to (only kept in memory if not given)
+        """
+        self.advance = advance
+        self.ink_threshold = ink_threshold
+        self.max_distance = max_distance
+        self.directory = directory
+        self.glyphs = {}
+        self.lock = threading.Lock()
+
+    def read(self, resolution: str, image: ndarray) -> Optional[str]:
+        """
+        Read a line of text
+        :param resolution: resolution the line was captured at
+        :param image: grayscale image of the line, starting at the first character cell
+        :return: text of the line (without trailing spaces) or None if any cell does not match a known glyph
+        """
+        glyphs = self.get_glyphs(resolution)
+        if len(glyphs) == 0:
+            return None
+
+        text = []
+        for cell in self.get_cells(image):
+            if not cell.any():
+                text.append(' ')
+                continue
+
+            distances = {
+                character: np.count_nonzero(glyph != cell) for character, glyph in glyphs.items()
+                if glyph.shape == cell.shape
+            }
+            if len(distances) == 0:
+                return None
+
+            character = min(distances, key=distances.get)
+            if distances[character] > self.max_distance:
+                return None
+
+            text.append(character)
+
+        return ''.join(text).rstrip()
+
+    def learn(self, resolution: str, image: ndarray, text: str) -> bool:
+        """
+        Learn glyph templates from a line of known text (only pass lines whose text has been confirmed exactly)
+        Cells are checked against the glyphs learned so far: a cell that does not match its character's glyph
+        invalidates that glyph (it is re-learned from a later line), a cell of an unknown character that matches the
+        glyph of a different character is not learned.
+        :param resolution: resolution the line was captured at
+        :param image: grayscale image of the line, starting at the first character cell
+        :param text: text of the line
+        :return: True if the line matched the text's layout and known glyphs, else False
+        """
+        cells = self.get_cells(image)
+        if len(cells) < len(text):
+            return False
+
+        # Make sure the cells line up with the text (any space/cell beyond the text should be blank)
+        padded = text.ljust(len(cells))
+        if any(cell.any() != (character != ' ') for cell, character in zip(cells, padded)):
+            return False
+
+        # Cells of the same character need to agree with each other
+        observed: Dict[str, ndarray] = {}
+        for cell, character in zip(cells, text):
+            if character == ' ':
+                continue
+            if character in observed and self.get_distance(observed[character], cell) > self.max_distance:
+                return False
+            observed.setdefault(character, cell)
+
+        glyphs = self.get_glyphs(resolution)
+        learned, invalidated = {}, []
+        for character, cell in observed.items():
+            if character in glyphs:
+                if self.get_distance(glyphs[character], cell) > self.max_distance:
+                    invalidated.append(character)
+                continue
+
+            matches = [
+                other for other, glyph in glyphs.items()
+                if self.get_distance(glyph, cell) <= self.max_distance
+            ]
+            if len(matches) == 0:
+                learned[character] = cell
+
+        if len(invalidated) > 0:
+            logger.warning(f'Console glyphs of {"".join(invalidated)!r} do not match confirmed text, discarding them')
+
+        if len(learned) == 0 and len(invalidated) == 0:
+            return True
+
+        with self.lock:
+            self.glyphs[resolution].update(learned)
+            for character in invalidated:
+                self.glyphs[resolution].pop(character, None)
+
+        if self.directory is not None:
+            try:
+                os.makedirs(os.path.join(self.directory, resolution), exist_ok=True)
+                for character, glyph in learned.items():
+                    Image.fromarray(glyph.astype(np.uint8) * 255).save(
+                        os.path.join(self.directory, resolution, f'{ord(character)}.png')
+                    )
+                for character in invalidated:
+                    path = os.path.join(self.directory, resolution, f'{ord(character)}.png')
+                    if os.path.isfile(path):
+                        os.remove(path)
+            except OSError as e:
+                logger.error(f'Failed to save glyph templates to disk: {e}')
+
+        return len(invalidated) == 0
+
+    @staticmethod
+    def get_distance(glyph: ndarray, cell: ndarray) -> int:
+        if glyph.shape != cell.shape:
+            return glyph.size + cell.size
+        return np.count_nonzero(glyph != cell)
+
+    def get_cells(self, image: ndarray) -> List[ndarray]:
+        ink = image >= self.ink_threshold
+        return [
+            ink[:, left:left + self.advance]
+            for left in range(0, ink.shape[1] - self.advance + 1, self.advance)
+        ]
+
+    def get_glyphs(self, resolution: str) -> Dict[str, ndarray]:
+        with self.lock:
+            if resolution not in self.glyphs:
+                self.glyphs[resolution] = self.load_glyphs(resolution)
+
+            # Return a copy, since glyphs might be added by other threads
+            return dict(self.glyphs[resolution])
+
+    def load_glyphs(self, resolution: str) -> Dict[str, ndarray]:
+        glyphs = {}
+        if self.directory is None or not os.path.isdir(os.path.join(self.directory, resolution)):
+            return glyphs
+
+        for name in os.listdir(os.path.join(self.directory, resolution)):
+            code, extension = os.path.splitext(name)
+            if extension == '.png' and code.isdigit():
+                with Image.open(os.path.join(self.directory, resolution, name)) as glyph:
+                    glyphs[chr(int(code))] = np.asarray(glyph.convert('L')) > 127
+
+        return glyphs
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from BF2AutoSpectator.common.logger import logger
+
+
+def get_ink_density(image: ndarray, edge_threshold: int = 48) -> float:
+    """
+    Estimate how much of an image is covered by text via the share of strong horizontal edges
+    (works for dark text on a light background as well as for light text on a dark background)
+    :param image: RGB or grayscale image
+    :param edge_threshold: minimum intensity difference between neighbouring pixels to count as an edge
+    :return: share of pixels on an edge (0-1)
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    if image.shape[1] < 2:
+        return 0.0
+
+    edges = cv2.absdiff(image[:, 1:], image[:, :-1]) > edge_threshold
+    return np.count_nonzero(edges) / edges.size
+
+
+class InkDensityGate:
+    """
+    Skips OCR of regions that (almost) certainly contain no text. A region is considered empty if its ink density is
+    well below the lowest density observed while text was confirmed to be visible in it. Thresholds are calibrated at
+    runtime from confirmed reads and are only used once a region has been observed a few times.
+    """
+    path: Optional[str]
+    margin: float
+    min_observations: int
+    calibrate_only: bool
+
+    # Lowest ink density observed with text visible and number of observations by region key
+    observations: Dict[str, Tuple[float, int]]
+    lock: threading.Lock
+
+    skipped: int = 0
+
+    def __init__(self, path: Optional[str] = None, margin: float = .5, min_observations: int = 3,
+                 calibrate_only: bool = False):
+        """
+        :param path: path of JSON file to load/persist calibrated thresholds from/to (only kept in memory if not given)
+        :param margin: share of the lowest observed density a region's density needs to be below to be considered empty
+        :param min_observations: number of observations required before regions are considered empty
+        :param calibrate_only: only calibrate thresholds, never consider any region empty
+        """
+        self.path = path
+        self.margin = margin
+        self.min_observations = min_observations
+        self.calibrate_only = calibrate_only
+        self.observations = self.load_observations()
+        self.lock = threading.Lock()
+
+    def is_empty(self, key: Tuple[str, ...], image: ndarray) -> bool:
+        """
+        Check whether a region contains no text
+        :param key: key identifying the region, e.g. (resolution, region key, processing signature)
+        :param image: processed image of the region
+        :return: True if the region (almost) certainly contains no text, False if it might contain text
+        """
+        threshold = self.get_threshold(key)
+        if threshold is None or self.calibrate_only:
+            return False
+
+        empty = get_ink_density(image) < threshold
+        if empty:
+            with self.lock:
+                self.skipped += 1
+
+        return empty
+
+    def observe(self, key: Tuple[str, ...], image: ndarray) -> None:
+        """
+        Calibrate the threshold of a region using an image in which text was confirmed to be visible
+        :param key: key identifying the region, e.g. (resolution, region key, processing signature)
+        :param image: processed image of the region
+        :return:
+        """
+        density = get_ink_density(image)
+        with self.lock:
+            lowest, count = self.observations.get('/'.join(key), (density, 0))
+            self.observations['/'.join(key)] = (min(lowest, density), count + 1)
+            # Only persist observations that change the threshold (or whether it is used)
+            changed = density < lowest or count < self.min_observations
+            snapshot = dict(self.observations)
+
+        if changed and self.path is not None:
+            try:
+                with open(self.path, 'w') as file:
+                    json.dump(snapshot, file, indent=2)
+            except OSError as e:
+                logger.error(f'Failed to save ink density thresholds to disk: {e}')
+
+    def get_threshold(self, key: Tuple[str, ...]) -> Optional[float]:
+        with self.lock:
+            lowest, count = self.observations.get('/'.join(key), (None, 0))
+
+        if count < self.min_observations:
+            return None
+
+        return lowest * self.margin
+
+    def load_observations(self) -> Dict[str, Tuple[float, int]]:
+        if self.path is None or not os.path.isfile(self.path):
+            return {}
+
+        try:
+            with open(self.path, 'r') as file:
+                return {key: (lowest, count) for key, (lowest, count) in json.load(file).items()}
+        except (OSError, ValueError) as e:
+            logger.error(f'Failed to load ink density thresholds from disk: {e}')
+            return {}
@@ -0,0 +1,129 @@
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+from numpy import ndarray
+
+from BF2AutoSpectator.common.logger import logger
+
+
+class LabelMatcher:
+    """
+    Checks whether fixed UI labels are visible by comparing (processed) regions to reference templates via normalized
+    cross-correlation. Templates are harvested from regions in which OCR confirmed the label to be visible.
+    """
+    directory: Optional[str]
+    match_threshold: float
+    mismatch_threshold: float
+    max_templates: int
+
+    templates: Dict[Tuple[str, ...], List[ndarray]]
+    lock: threading.Lock
+
+    def __init__(self, directory: Optional[str] = None, match_threshold: float = .97, mismatch_threshold: float = .3,
+                 max_templates: int = 4):
+        """
+        :param directory: directory to load/persist templates from/to (templates are only kept in memory if not given)
+        :param match_threshold: minimum correlation with any template for the label to be considered visible
+        :param mismatch_threshold: maximum correlation with all templates for the label to be considered not visible
+        (correlations in between are ambiguous)
+        :param max_templates: maximum number of templates to keep per label (oldest ones are replaced first)
+        """
+        self.directory = directory
+        self.match_threshold = match_threshold
+        self.mismatch_threshold = mismatch_threshold
+        self.max_templates = max_templates
+        self.templates = {}
+        self.lock = threading.Lock()
+
+    def match(self, key: Tuple[str, ...], image: ndarray) -> Optional[bool]:
+        """
+        Check whether a label is visible in a region
+        :param key: key identifying the label, e.g. (resolution, region key, label, processing signature)
+        :param image: processed image of the region
+        :return: True if the label is visible, False if it is not, None if it cannot be determined via templates
+        """
+        templates = self.get_templates(key)
+        if len(templates) == 0:
+            return None
+
+        score = self.get_best_score(templates, image)
+        if score is None:
+            return None
+
+        if score >= self.match_threshold:
+            return True
+        elif score <= self.mismatch_threshold:
+            return False
+
+        return None
+
+    def add(self, key: Tuple[str, ...], image: ndarray) -> None:
+        """
+        Add an image of a region in which the label is known to be visible as a template
+        :param key: key identifying the label, e.g. (resolution, region key, label, processing signature)
+        :param image: processed image of the region
+        :return:
+        """
+        templates = self.get_templates(key)
+        # Label already matches an existing template, no need for another one
+        if (score := self.get_best_score(templates, image)) is not None and score >= self.match_threshold:
+            return
+
+        with self.lock:
+            templates = self.templates[key]
+            templates.append(np.ascontiguousarray(image))
+            if len(templates) > self.max_templates:
+                templates.pop(0)
+            snapshot = list(templates)
+
+        if self.directory is not None:
+            try:
+                for index, template in enumerate(snapshot):
+                    path = self.get_template_path(key, index)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    Image.fromarray(template).save(path)
+            except OSError as e:
+                logger.error(f'Failed to save label templates to disk: {e}')
+
+    def get_templates(self, key: Tuple[str, ...]) -> List[ndarray]:
+        with self.lock:
+            if key not in self.templates:
+                self.templates[key] = self.load_templates(key)
+
+            # Return a copy, since templates might be replaced by other threads
+            return list(self.templates[key])
+
+    def load_templates(self, key: Tuple[str, ...]) -> List[ndarray]:
+        if self.directory is None:
+            return []
+
+        templates = []
+        for index in range(self.max_templates):
+            path = self.get_template_path(key, index)
+            if os.path.isfile(path):
+                with Image.open(path) as template:
+                    templates.append(np.asarray(template))
+
+        return templates
+
+    def get_template_path(self, key: Tuple[str, ...], index: int) -> str:
+        return os.path.join(self.directory, *key, f'{index}.png')
+
+    @staticmethod
+    def get_best_score(templates: List[ndarray], image: ndarray) -> Optional[float]:
+        candidates = [template for template in templates if template.shape == image.shape]
+        if len(candidates) == 0:
+            return None
+
+        # A region without any contrast cannot contain a label (and correlation is undefined for it)
+        if image.std() < 1.0:
+            return 0.0
+
+        return max(
+            float(cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)[0][0])
+            for template in candidates
+        )
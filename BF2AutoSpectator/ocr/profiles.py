@@ -0,0 +1,146 @@
+import atexit
+import os
+import string
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from BF2AutoSpectator.common import constants
+from BF2AutoSpectator.ocr.result import OCRResult
+
+LABEL_WHITELIST = string.ascii_letters
+
+# Paths of the user words files written by this process by words (removed when the process exits)
+_user_words_paths: Dict[Tuple[str, ...], str] = {}
+_user_words_lock = threading.Lock()
+
+
+class OCRProfile:
+    """
+    Tesseract parameters tailored to a region, along with the texts expected to be found in it
+    """
+    psm: int
+    whitelist: Optional[str]
+    user_words: List[str]
+    vocabulary: List[str]
+    min_confidence: float
+
+    ocr_config: Optional[str] = None
+    lock: threading.Lock
+
+    def __init__(self, psm: int = 7, whitelist: Optional[str] = None, user_words: Optional[List[str]] = None,
+                 vocabulary: Optional[List[str]] = None, min_confidence: float = 80.0):
+        """
+        :param psm: Tesseract page segmentation mode
+        :param whitelist: characters Tesseract may recognize (any character if not given)
+        :param user_words: words Tesseract should prefer (in addition to its dictionary)
+        :param vocabulary: (lower case) texts expected to be found in the region, e.g. the label of a button
+        :param min_confidence: minimum confidence (0-100) of every word for a result to be accepted right away
+        """
+        self.psm = psm
+        self.whitelist = whitelist
+        self.user_words = user_words if user_words is not None else []
+        self.vocabulary = vocabulary if vocabulary is not None else []
+        self.min_confidence = min_confidence
+        self.lock = threading.Lock()
+
+    def get_ocr_config(self) -> str:
+        """
+        Get the Tesseract parameters of the profile
+        (any user words are written to a temporary file, since Tesseract only reads them from disk, see
+        get_user_words_path)
+        :return: config/parameters for Tesseract OCR
+        """
+        with self.lock:
+            if self.ocr_config is None:
+                ocr_config = f'--oem 3 --psm {self.psm}'
+                if self.whitelist is not None:
+                    ocr_config += f' -c tessedit_char_whitelist={self.whitelist}'
+                if len(self.user_words) > 0:
+                    ocr_config += f' --user-words "{get_user_words_path(self.user_words)}"'
+                self.ocr_config = ocr_config
+
+            return self.ocr_config
+
+    def find_vocabulary(self, text: str) -> Optional[str]:
+        """
+        Find the first expected text contained in an OCR result
+        :param text: (lower case) OCR result
+        :return: expected text or None if the result contains none of the expected texts
+        """
+        return next((expected for expected in self.vocabulary if expected in text), None)
+
+    def is_accepted(self, result: OCRResult) -> bool:
+        """
+        Check whether an OCR result can be accepted right away (without any further checks or re-reads)
+        :param result: OCR result of the region
+        :return: True if the result is confident and contains an expected text (if any are expected), else False
+        """
+        if not result.is_confident(self.min_confidence):
+            return False
+
+        return len(self.vocabulary) == 0 or self.find_vocabulary(result.text) is not None
+
+
+def get_user_words_path(words: List[str]) -> str:
+    """
+    Get the path of a temporary file containing user words for Tesseract
+    (profiles with the same words share a file, all files are removed when the process exits)
+    :param words: words to write to the file
+    :return: path of the file
+    """
+    key = tuple(words)
+    with _user_words_lock:
+        if key not in _user_words_paths:
+            if len(_user_words_paths) == 0:
+                atexit.register(remove_user_words_files)
+            fd, path = tempfile.mkstemp(prefix='bf2-auto-spectator-', suffix='.user-words')
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                file.write('\n'.join(words) + '\n')
+            _user_words_paths[key] = path
+
+        return _user_words_paths[key]
+
+
+def remove_user_words_files() -> None:
+    with _user_words_lock:
+        for path in _user_words_paths.values():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        _user_words_paths.clear()
+
+
+def get_label_profile(*labels: str) -> OCRProfile:
+    words = sorted(set(word for label in labels for word in label.split()))
+    return OCRProfile(whitelist=LABEL_WHITELIST, user_words=words, vocabulary=list(labels))
+
+
+# Map names as displayed in game, e.g. "dalian plant"
+MAP_NAME_WORDS = sorted(set(word for name in constants.COORDINATES['spawns'].keys() for word in name.split('-')))
+
+DEFAULT_OCR_PROFILE = OCRProfile()
+OCR_PROFILES: Dict[str, OCRProfile] = {
+    'quit-menu-item': get_label_profile('quit'),
+    'game-message-header': get_label_profile('game message'),
+    'connect-to-ip-button': get_label_profile('connect to ip'),
+    'disconnect-prompt-header': get_label_profile('disconnect'),
+    'disconnect-button': get_label_profile('disconnect'),
+    'play-now-button': get_label_profile('play now'),
+    'join-game-button': get_label_profile('join game'),
+    'map-briefing-header': get_label_profile('map briefing'),
+    'spawn-selected-text': get_label_profile('select', 'done'),
+    'suicide-button': get_label_profile('suicide'),
+    'eor-header-items': get_label_profile('score list', 'top players', 'top scores', 'map briefing'),
+    'eor-map-details': OCRProfile(user_words=MAP_NAME_WORDS)
+}
+
+
+def get_ocr_profile(key: str) -> OCRProfile:
+    """
+    Get the OCR profile of a region
+    :param key: key of region in coordinates dict
+    :return: profile of the region, default profile if there is no specific one
+    """
+    return OCR_PROFILES.get(key, DEFAULT_OCR_PROFILE)
@@ -0,0 +1,33 @@
+from typing import List, Tuple
+
+
+class OCRResult:
+    """
+    Text extracted from an image along with the confidence of each word
+    """
+    text: str
+    # Words and their confidence (0-100)
+    words: List[Tuple[str, float]]
+
+    def __init__(self, text: str, words: List[Tuple[str, float]]):
+        self.text = text
+        self.words = words
+
+    def get_confidence(self) -> float:
+        """
+        Get the confidence of the result (which is only as confident as its least confident word)
+        :return: minimum confidence of any word (0-100), 0.0 if no words were found
+        """
+        if len(self.words) == 0:
+            return 0.0
+
+        return min(confidence for _, confidence in self.words)
+
+    def is_confident(self, min_confidence: float) -> bool:
+        return self.get_confidence() >= min_confidence
+
+    def lower(self) -> 'OCRResult':
+        return OCRResult(self.text.lower(), [(word.lower(), confidence) for word, confidence in self.words])
+
+    def __repr__(self) -> str:
+        return f'OCRResult({self.text!r}, confidence={self.get_confidence():.1f})'
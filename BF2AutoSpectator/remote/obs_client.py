@@ -1,3 +1,5 @@
+import base64
+import threading
 from typing import Optional
 from urllib.parse import urlparse
 
@@ -12,12 +14,15 @@ class OBSClient:
     password: str
 
     obs: Optional[obs.ReqClient]
+    # Requests may be sent from the background capture thread, which the websocket client does not support on its own
+    lock: threading.Lock
 
     def __init__(self, url: str):
         pr = urlparse(url)
         self.host = pr.hostname
         self.port = pr.port
         self.password = pr.password
+        self.lock = threading.Lock()
 
     def connect(self) -> None:
         self.obs = obs.ReqClient(host=self.host, port=self.port, password=self.password)
@@ -32,19 +37,42 @@ class OBSClient:
     def is_stream_active(self) -> bool:
         self.__ensure_connected()
 
-        status = self.obs.get_stream_status()
+        with self.lock:
+            status = self.obs.get_stream_status()
 
         return status.output_active or status.output_reconnecting
 
     def start_stream(self) -> None:
         self.__ensure_connected()
 
-        self.obs.start_stream()
+        with self.lock:
+            self.obs.start_stream()
 
     def stop_stream(self) -> None:
         self.__ensure_connected()
 
-        self.obs.stop_stream()
+        with self.lock:
+            self.obs.stop_stream()
+
+    def get_source_screenshot(self, source_name: str, image_format: str, width: int, height: int,
+                              quality: int = -1) -> bytes:
+        """
+        Take a screenshot of an OBS source (OBS scales it to the requested size)
+        :param source_name: name of the source to take a screenshot of
+        :param image_format: image format to encode the screenshot as, e.g. "png" or "jpg"
+        :param width: width to scale the screenshot to
+        :param height: height to scale the screenshot to
+        :param quality: compression quality (0-100, -1 for the format's default)
+        :return: encoded screenshot
+        """
+        self.__ensure_connected()
+
+        with self.lock:
+            resp = self.obs.get_source_screenshot(source_name, image_format, width, height, quality)
+
+        # Image data is returned as a data URI ("data:image/png;base64,...")
+        _, _, data = resp.image_data.partition(',')
+        return base64.b64decode(data)
 
     def __ensure_connected(self) -> None:
         if not hasattr(self, 'obs'):
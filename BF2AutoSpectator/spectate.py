@@ -1,11 +1,12 @@
 import argparse
 import logging
 import os
-import pickle
 import sys
 import time
 from datetime import datetime
 
+from BF2AutoSpectator.capture import ReplayScreenSource, OBSScreenSource, set_screen_source
+from BF2AutoSpectator.capture.debug import DebugScreenshotWriter
 from BF2AutoSpectator.common import constants
 from BF2AutoSpectator.common.commands import CommandStore
 from BF2AutoSpectator.common.config import Config
@@ -13,6 +14,8 @@ from BF2AutoSpectator.common.exceptions import SpawnCoordinatesNotAvailableExcep
 from BF2AutoSpectator.common.logger import logger
 from BF2AutoSpectator.common.utility import is_responding_pid, find_window_by_title, taskkill_pid, init_pytesseract
 from BF2AutoSpectator.game import GameInstanceManager
+from BF2AutoSpectator.histograms import HistogramStore, HISTOGRAM_SUBSAMPLING_MODES
+from BF2AutoSpectator.ocr import TesserocrEngine, set_ocr_engine, OCRExecutor, set_ocr_executor
 from BF2AutoSpectator.remote import ControllerClient, GamePhase, OBSClient
 
 
@@ -32,8 +35,40 @@ def run():
     parser.add_argument('--game-path', help='Path to BF2 install folder',
                         type=str, default='C:\\Program Files (x86)\\EA Games\\Battlefield 2\\')
     parser.add_argument('--game-res', help='Resolution to use for BF2 window', choices=['720p', '900p'], type=str, default='720p')
+    parser.add_argument('--capture-source', help='Source to take screenshots of the game window from',
+                        choices=['desktop', 'replay', 'obs'], type=str, default='desktop')
+    parser.add_argument('--replay-path', help='Path to directory/zip archive of recorded game window frames to replay '
+                                              '(requires --capture-source replay)', type=str)
+    parser.add_argument('--obs-source-name', help='Name of the OBS source capturing the game window '
+                                                  '(requires --capture-source obs)', type=str)
+    parser.add_argument('--obs-capture-format', help='Image format OBS should use for screenshots of larger regions',
+                        choices=['png', 'jpg'], type=str, default='png')
+    parser.add_argument('--obs-capture-scale', help='Factor OBS should scale screenshots of larger regions by',
+                        type=float, default=1.0)
+    parser.add_argument('--capture-rate', help='Number of frames per second to capture of the game window in the '
+                                               'background (0 to disable background capture)', type=float, default=0)
+    parser.add_argument('--capture-buffer-size', help='Number of recent frames to keep when capturing in the background',
+                        type=int, default=16)
+    parser.add_argument('--record-path', help='Path to directory to record evaluated game window regions to '
+                                              '(along with detection results)', type=str)
     parser.add_argument('--tesseract-path', help='Path to Tesseract install folder',
                         type=str, default='C:\\Program Files\\Tesseract-OCR\\')
+    parser.add_argument('--ocr-engine', help='Engine to run OCR with (auto: use tesserocr if installed, '
+                                             'else fall back to pytesseract)',
+                        choices=['auto', 'tesserocr', 'pytesseract'], type=str, default='auto')
+    parser.add_argument('--ocr-model', help='Name of Tesseract model (traineddata file) to run OCR with '
+                                            '(see BF2AutoSpectator.tools.train_ocr_model)', type=str, default='eng')
+    parser.add_argument('--ocr-model-path', help='Path to folder containing the OCR model '
+                                                 '(Tesseract\'s tessdata folder is used if not given)', type=str)
+    parser.add_argument('--ocr-workers', help='Number of threads to run independent OCR work on', type=int, default=2)
+    parser.add_argument('--concurrent-checks', dest='concurrent_checks', action='store_true')
+    parser.add_argument('--label-templates-path', help='Path to directory to load/save templates for matching fixed UI '
+                                                       'labels from/to (templates are only kept in memory if not given)',
+                        type=str)
+    parser.add_argument('--calibrate-ink-gate', dest='calibrate_ink_gate', action='store_true')
+    parser.add_argument('--histogram-subsampling', help='Calculate histograms of large regions from subsampled images '
+                                                        '(off: always use full resolution)',
+                        choices=['off', *HISTOGRAM_SUBSAMPLING_MODES], type=str, default='off')
     parser.add_argument('--instance-rtl', help='How many rounds to use a game instance for (rounds to live)', type=int, default=6)
     parser.add_argument('--min-iterations-on-player',
                         help='Number of iterations to stay on a player before allowing the next_player command',
@@ -48,7 +83,12 @@ def run():
     parser.add_argument('--no-rtl-limit', dest='limit_rtl', action='store_false')
     parser.add_argument('--debug-log', dest='debug_log', action='store_true')
     parser.add_argument('--debug-screenshot', dest='debug_screenshot', action='store_true')
-    parser.set_defaults(limit_rtl=True, debug_log=False, debug_screenshot=False, use_controller=False, control_obs=False)
+    parser.add_argument('--debug-screenshot-sample-rate', help='Fraction of debug screenshots to write to disk',
+                        type=float, default=1.0)
+    parser.add_argument('--debug-screenshot-quota', help='Maximum disk space (in MB) to use for debug screenshots '
+                                                         '(oldest screenshots are deleted first)', type=int, default=1000)
+    parser.set_defaults(limit_rtl=True, debug_log=False, debug_screenshot=False, use_controller=False, control_obs=False,
+                        calibrate_ink_gate=False, concurrent_checks=False)
     args = parser.parse_args()
 
     logger.setLevel(logging.DEBUG if args.debug_log else logging.INFO)
@@ -64,6 +104,14 @@ def run():
         server_mod=args.server_mod,
         game_path=args.game_path,
         tesseract_path=args.tesseract_path,
+        ocr_engine=args.ocr_engine,
+        ocr_model=args.ocr_model,
+        ocr_model_path=args.ocr_model_path,
+        ocr_workers=args.ocr_workers,
+        concurrent_checks=args.concurrent_checks,
+        label_templates_path=args.label_templates_path,
+        calibrate_ink_gate=args.calibrate_ink_gate,
+        histogram_subsampling=args.histogram_subsampling,
         limit_rtl=args.limit_rtl,
         instance_rtl=args.instance_rtl,
         map_load_delay=args.map_load_delay,
@@ -72,7 +120,17 @@ def run():
         control_obs=args.control_obs,
         obs_url=args.obs_url,
         resolution=args.game_res,
+        capture_source=args.capture_source,
+        replay_path=args.replay_path,
+        obs_source_name=args.obs_source_name,
+        obs_capture_format=args.obs_capture_format,
+        obs_capture_scale=args.obs_capture_scale,
+        capture_rate=args.capture_rate,
+        capture_buffer_size=args.capture_buffer_size,
+        record_path=args.record_path,
         debug_screenshot=args.debug_screenshot,
+        debug_screenshot_sample_rate=args.debug_screenshot_sample_rate,
+        debug_screenshot_quota=args.debug_screenshot_quota,
         min_iterations_on_player=args.min_iterations_on_player,
         max_iterations_on_player=5,
         max_iterations_on_default_camera_view=6,
@@ -85,13 +143,63 @@ def run():
     elif not os.path.isfile(os.path.join(config.get_game_path(), constants.BF2_EXE)):
         sys.exit(f'Could not find {constants.BF2_EXE} in given game install folder: {config.get_game_path()}')
 
-    # Init pytesseract
-    init_pytesseract(config.get_tesseract_path())
+    tessdata_path = config.get_ocr_model_path() or os.path.join(config.get_tesseract_path(), 'tessdata')
+    if not os.path.isfile(os.path.join(tessdata_path, f'{config.get_ocr_model()}.traineddata')):
+        # Tesseract may also find models via TESSDATA_PREFIX
+        tessdata_prefix = os.environ.get('TESSDATA_PREFIX')
+        if tessdata_prefix is not None and \
+                os.path.isfile(os.path.join(tessdata_prefix, f'{config.get_ocr_model()}.traineddata')):
+            tessdata_path = tessdata_prefix
+        elif config.get_ocr_model() != 'eng':
+            logger.warning(f'Could not find OCR model {config.get_ocr_model()}.traineddata in folder: {tessdata_path}, '
+                           f'falling back to eng')
+            config.set_ocr_model('eng', None)
+            tessdata_path = os.path.join(config.get_tesseract_path(), 'tessdata')
+        else:
+            logger.warning(f'Could not find OCR model eng.traineddata in folder: {tessdata_path}, '
+                           f'leaving it to Tesseract to locate the model')
 
-    # Load pickles
-    logger.debug('Loading pickles')
-    with open(os.path.join(config.ROOT_DIR, 'pickle', 'histograms.pickle'), 'rb') as histogramFile:
-        histograms = pickle.load(histogramFile)
+    # Init pytesseract
+    init_pytesseract(config.get_tesseract_path(), config.get_ocr_model(), config.get_ocr_model_path())
+
+    # Init OCR engine (pytesseract remains active if tesserocr is not used)
+    if config.get_ocr_engine() in ['auto', 'tesserocr']:
+        try:
+            set_ocr_engine(TesserocrEngine(tessdata_path, config.get_ocr_model()))
+            logger.info('Running OCR in-process via tesserocr')
+        except ImportError:
+            if config.get_ocr_engine() == 'tesserocr':
+                sys.exit('Running OCR via tesserocr requires the tesserocr package')
+            logger.info('tesserocr is not installed, running OCR via pytesseract')
+        except RuntimeError as e:
+            if config.get_ocr_engine() == 'tesserocr':
+                sys.exit(f'Failed to load OCR model {config.get_ocr_model()} via tesserocr '
+                         f'(tessdata folder: {tessdata_path}): {e}')
+            logger.warning(f'Failed to load OCR model {config.get_ocr_model()} via tesserocr '
+                           f'(tessdata folder: {tessdata_path}), running OCR via pytesseract')
+
+    # Init OCR executor
+    if config.get_ocr_workers() > 1:
+        set_ocr_executor(OCRExecutor(config.get_ocr_workers()))
+
+    # Init screen source
+    if config.get_capture_source() == 'obs' and (config.get_obs_url() is None or config.get_obs_source_name() is None):
+        sys.exit('Capturing via OBS requires an --obs-url and an --obs-source-name')
+    elif config.get_capture_source() == 'replay':
+        if config.get_replay_path() is None:
+            sys.exit('Replaying recorded frames requires a --replay-path')
+        logger.info(f'Replaying recorded frames from {config.get_replay_path()}')
+        try:
+            set_screen_source(ReplayScreenSource(config.get_replay_path()))
+        except (OSError, ValueError) as e:
+            sys.exit(f'Failed to load recorded frames: {e}')
+
+    # Load reference histograms (only the index is read here, histograms are memory-mapped once first used)
+    logger.debug('Loading histogram store')
+    try:
+        histograms = HistogramStore(os.path.join(config.ROOT_DIR, 'histograms'))
+    except (OSError, ValueError) as e:
+        sys.exit(f'Failed to load reference histograms: {e}')
 
     # Init debug directory if debugging is/could be enabled
     if config.debug_screenshot() or config.use_controller():
@@ -99,6 +207,12 @@ def run():
         if not os.path.isdir(config.DEBUG_DIR):
             os.mkdir(Config.DEBUG_DIR)
 
+        DebugScreenshotWriter().configure(
+            Config.DEBUG_DIR,
+            config.get_debug_screenshot_sample_rate(),
+            config.get_debug_screenshot_quota() * 1000 * 1000
+        )
+
     # Init game instance state store
     gim = GameInstanceManager(
         config.get_game_path(),
@@ -108,6 +222,24 @@ def run():
         histograms
     )
     gis = gim.get_state()
+    if config.get_capture_rate() > 0:
+        logger.info(f'Capturing game window in the background at {config.get_capture_rate()} frames per second')
+        gim.enable_background_capture(config.get_capture_rate(), config.get_capture_buffer_size())
+    if config.concurrent_checks():
+        logger.info('Running independent detectors concurrently')
+        gim.enable_concurrent_checks()
+    if config.get_label_templates_path() is not None:
+        gim.enable_label_template_persistence(config.get_label_templates_path())
+    if config.calibrate_ink_gate():
+        logger.info('Calibrating ink density thresholds, label regions are always run through OCR')
+        gim.enable_ink_gate_calibration()
+    if config.get_histogram_subsampling() != 'off':
+        logger.info(f'Calculating histograms of large regions from subsampled images '
+                    f'(mode: {config.get_histogram_subsampling()})')
+        gim.enable_histogram_subsampling(config.get_histogram_subsampling())
+    if config.get_record_path() is not None:
+        logger.info(f'Recording evaluated game window regions to {config.get_record_path()}')
+        gim.enable_recording(config.get_record_path())
     cc = ControllerClient(
         config.get_controller_base_uri()
     )
@@ -120,9 +252,19 @@ def run():
         cc.connect()
         cc.update_game_phase(GamePhase.initial)
 
-    if config.control_obs():
+    if config.control_obs() or config.get_capture_source() == 'obs':
         obsc.connect()
 
+    if config.get_capture_source() == 'obs':
+        logger.info(f'Capturing game window via OBS source "{config.get_obs_source_name()}"')
+        set_screen_source(OBSScreenSource(
+            obsc.get_source_screenshot,
+            config.get_obs_source_name(),
+            gim.get_game_window_region,
+            image_format=config.get_obs_capture_format(),
+            scale=config.get_obs_capture_scale()
+        ))
+
     # Try to find any existing game instance
     logger.info('Looking for an existing game instance')
     got_instance, correct_params, *_ = gim.find_instance(config.get_server_mod())
@@ -526,10 +668,13 @@ def run():
                 cc.update_current_server(server_ip, server_port, server_pass)
             continue
 
-        on_round_finish_screen = gim.is_round_end_screen_visible()
-        map_is_loading = gim.is_map_loading()
-        map_briefing_present = gim.is_map_briefing_visible()
-        default_camera_view_visible = gim.is_default_camera_view_visible()
+        # Capture the game window once and run all state detections against that same frame
+        # (reset mouse first, since it would otherwise block the join game button)
+        with gim.shared_frame(reset_mouse=True):
+            on_round_finish_screen = gim.is_round_end_screen_visible()
+            map_is_loading = gim.is_map_loading()
+            map_briefing_present = gim.is_map_briefing_visible()
+            default_camera_view_visible = gim.is_default_camera_view_visible()
 
         # Update instance state if any map load/eor screen is present
         # (only _set_ map loading state here, since it should only be _unset_ when attempting to spawn
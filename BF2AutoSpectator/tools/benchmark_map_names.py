@@ -0,0 +1,94 @@
+"""
+Benchmark resolving map names read via OCR to known map names
+
+Map names can be taken from a recording (see --record-path) and/or a file of labeled OCR results (one per line,
+format: "<ocr result>\t<expected map name>"). Accuracy can only be determined for labeled OCR results.
+
+Usage: python -m BF2AutoSpectator.tools.benchmark_map_names [--recording PATH] [--labels PATH]
+"""
+import argparse
+import sys
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from BF2AutoSpectator.capture.recording import RecordingReader
+from BF2AutoSpectator.common import constants
+from BF2AutoSpectator.common.map_names import MapNameIndex, clean_map_name
+
+
+def load_recorded_map_names(path: str) -> List[Tuple[str, Optional[str]]]:
+    reader = RecordingReader(path)
+    samples = []
+    for entry in reader.get_entries(region_key='ocr/eor-map-details'):
+        # Map name is read from the first crop of the region
+        if entry.text is not None and entry.crop == constants.COORDINATES[entry.resolution]['ocr']['eor-map-details'][0]:
+            samples.append((entry.text, None))
+    reader.close()
+
+    return samples
+
+
+def load_labeled_map_names(path: str) -> List[Tuple[str, Optional[str]]]:
+    samples = []
+    with open(path, 'r') as labels:
+        for line in labels:
+            if line.strip() == '':
+                continue
+            ocr_result, _, expected = line.rstrip('\n').partition('\t')
+            samples.append((ocr_result, expected.strip() or None))
+
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark resolving OCR map names to known map names')
+    parser.add_argument('--recording', help='Path to recording to take eor-map-details OCR results from', type=str)
+    parser.add_argument('--labels', help='Path to file with labeled OCR results '
+                                         '(format: "<ocr result>\\t<expected map name>")', type=str)
+    parser.add_argument('--rounds', help='Number of times to resolve each map name', type=int, default=100)
+    args = parser.parse_args()
+
+    samples = []
+    if args.recording is not None:
+        samples.extend(load_recorded_map_names(args.recording))
+    if args.labels is not None:
+        samples.extend(load_labeled_map_names(args.labels))
+    if len(samples) == 0:
+        sys.exit('No map names to benchmark, provide a --recording and/or --labels')
+
+    started_at = time.perf_counter()
+    index = MapNameIndex(constants.COORDINATES['spawns'].keys())
+    build_time = time.perf_counter() - started_at
+
+    exact, resolved, labeled, correct, exact_correct = 0, 0, 0, 0, 0
+    timings = []
+    for ocr_result, expected in samples:
+        cleaned = clean_map_name(ocr_result)
+        for _ in range(args.rounds):
+            started_at = time.perf_counter()
+            map_name, score = index.lookup(cleaned)
+            timings.append(time.perf_counter() - started_at)
+
+        exact += cleaned in index.names
+        resolved += map_name is not None
+        if expected is not None:
+            labeled += 1
+            correct += (map_name or cleaned) == expected
+            exact_correct += cleaned == expected
+        if map_name != cleaned:
+            print(f'{ocr_result!r} -> {map_name!r} (score: {score:.2f}, expected: {expected!r})')
+
+    timings = np.array(timings) * 1e6
+    print(f'Index of {len(index.names)} map names built in {build_time * 1e3:.2f}ms')
+    print(f'Map names: {len(samples)}, exact matches: {exact}, resolved: {resolved}')
+    if labeled > 0:
+        print(f'Accuracy on {labeled} labeled map names: {correct / labeled:.1%} '
+              f'(exact matching only: {exact_correct / labeled:.1%})')
+    print(f'Lookup time: mean {timings.mean():.1f}us, p99 {np.percentile(timings, 99):.1f}us, '
+          f'max {timings.max():.1f}us')
+
+
+if __name__ == '__main__':
+    main()
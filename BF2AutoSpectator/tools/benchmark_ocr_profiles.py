@@ -0,0 +1,128 @@
+"""
+Benchmark the OCR profiles of regions against the default OCR config
+
+Line images can be taken from harvested ground truth (see train_ocr_model harvest) and/or from a recording
+(see --record-path). Ground truth texts are used as reference where available, else the recorded OCR results.
+For each region, latency and accuracy are reported for the default profile and the region's own profile, along with how
+many results the region's profile would accept right away (and how many of those would be wrong).
+
+Usage: python -m BF2AutoSpectator.tools.benchmark_ocr_profiles [--ground-truth PATH] [--recording PATH]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pytesseract
+from PIL import Image
+from numpy import ndarray
+
+from BF2AutoSpectator.capture.processing import apply_image_ops
+from BF2AutoSpectator.capture.recording import RecordingReader, deserialize_image_ops
+from BF2AutoSpectator.common import constants
+from BF2AutoSpectator.ocr import OCREngine, PytesseractEngine, TesserocrEngine, OCRProfile, get_ocr_profile
+from BF2AutoSpectator.ocr.profiles import DEFAULT_OCR_PROFILE
+
+# Harvested line images are named <recording>-<image>-ocr-<region key>
+GROUND_TRUTH_NAME_REGEX = re.compile(r'-\d{8}-ocr-(.+)$')
+
+
+def load_ground_truth(path: str) -> List[Tuple[str, ndarray, str]]:
+    samples = []
+    for name in sorted(os.listdir(path)):
+        base, extension = os.path.splitext(name)
+        match = GROUND_TRUTH_NAME_REGEX.search(base)
+        if extension != '.png' or match is None or not os.path.isfile(os.path.join(path, f'{base}.gt.txt')):
+            continue
+
+        with Image.open(os.path.join(path, name)) as image, \
+                open(os.path.join(path, f'{base}.gt.txt'), 'r', encoding='utf-8') as ground_truth:
+            samples.append((match.group(1), np.asarray(image), ground_truth.read().strip()))
+
+    return samples
+
+
+def load_recorded(path: str) -> List[Tuple[str, ndarray, str]]:
+    reader = RecordingReader(path)
+    samples = []
+    seen = set()
+    for entry in reader.get_entries():
+        if not entry.region_key.startswith('ocr/') or entry.text is None or (entry.chunk, entry.name) in seen:
+            continue
+        seen.add((entry.chunk, entry.name))
+
+        image = apply_image_ops(reader.read_image(entry), deserialize_image_ops(entry.image_ops))
+        samples.append((entry.region_key[len('ocr/'):], image, entry.text))
+    reader.close()
+
+    return samples
+
+
+def benchmark(engine: OCREngine, profile: OCRProfile, samples: List[Tuple[ndarray, str]],
+              rounds: int) -> Tuple[float, float, int, int]:
+    ocr_config = profile.get_ocr_config()
+    timings = []
+    correct, accepted, wrongly_accepted = 0, 0, 0
+    for image, expected in samples:
+        for _ in range(rounds):
+            started_at = time.perf_counter()
+            result = engine.image_to_result(image, ocr_config)
+            timings.append(time.perf_counter() - started_at)
+
+        text = result.text.strip(' \n\x0c').lower()
+        correct += text == expected
+        if profile.is_accepted(result.lower()):
+            accepted += 1
+            wrongly_accepted += text != expected
+
+    return float(np.mean(timings)), correct / len(samples), accepted, wrongly_accepted
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark OCR profiles of regions against the default OCR config')
+    parser.add_argument('--ground-truth', help='Path to directory containing harvested ground truth', type=str)
+    parser.add_argument('--recording', help='Path to recording to take OCR regions from', type=str)
+    parser.add_argument('--tesseract-path', help='Path to Tesseract install folder',
+                        type=str, default='C:\\Program Files\\Tesseract-OCR\\')
+    parser.add_argument('--ocr-engine', help='Engine to run OCR with',
+                        choices=['tesserocr', 'pytesseract'], type=str, default='pytesseract')
+    parser.add_argument('--rounds', help='Number of times to run each image through OCR', type=int, default=1)
+    args = parser.parse_args()
+
+    samples = []
+    if args.ground_truth is not None:
+        samples.extend(load_ground_truth(args.ground_truth))
+    if args.recording is not None:
+        samples.extend(load_recorded(args.recording))
+    if len(samples) == 0:
+        sys.exit('No line images to benchmark, provide --ground-truth and/or a --recording')
+
+    if args.ocr_engine == 'tesserocr':
+        engine = TesserocrEngine(os.path.join(args.tesseract_path, 'tessdata'))
+    else:
+        pytesseract.pytesseract.tesseract_cmd = os.path.join(args.tesseract_path, constants.TESSERACT_EXE)
+        engine = PytesseractEngine()
+
+    regions: Dict[str, List[Tuple[ndarray, str]]] = {}
+    for key, image, expected in samples:
+        regions.setdefault(key, []).append((image, expected))
+
+    print(f'{"region":<28} {"images":>6} {"profile":>8} {"latency":>10} {"accuracy":>9} {"accepted":>9} {"wrong":>6}')
+    for key, region_samples in sorted(regions.items()):
+        profiles = [('default', DEFAULT_OCR_PROFILE)]
+        if get_ocr_profile(key) is not DEFAULT_OCR_PROFILE:
+            profiles.append(('region', get_ocr_profile(key)))
+
+        for name, profile in profiles:
+            latency, accuracy, accepted, wrongly_accepted = benchmark(engine, profile, region_samples, args.rounds)
+            print(f'{key:<28} {len(region_samples):>6} {name:>8} {latency * 1e3:>8.1f}ms {accuracy:>9.1%} '
+                  f'{accepted:>9} {wrongly_accepted:>6}')
+
+    engine.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Calibrate reference histograms and thresholds of histogram regions from labeled recordings
+
+Regions are taken from one or more recordings (see --record-path, histogram regions are recorded as
+"hists/<region key>") and labeled via a labels file (one label per line, format: "<chunk>/<image name>\t<true|false>").
+Labels need to be established independently of the histogram detectors (e.g. by reviewing the recorded images or from
+OCR confirmed game state). The detectors' recorded verdicts are never used as labels, since they were decided by
+comparing against the very references and thresholds being calibrated. Regions without labeled images are not
+calibrated.
+
+For each region and resolution with enough positive samples, the reference histogram is rebuilt as the mean histogram of
+the positive samples. The region's threshold is then placed in the middle of the gap between the largest delta of any
+positive and the smallest delta of any negative sample, which maximizes the margin to both. Regions whose samples cannot
+be separated (or that lack enough negative samples) keep using the default threshold. Any reference histograms and
+thresholds that are not calibrated are copied from the base store.
+
+Usage: python -m BF2AutoSpectator.tools.calibrate_histograms --recording PATH [--recording PATH] --output PATH
+"""
+import argparse
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy import ndarray
+
+from BF2AutoSpectator.capture.recording import RecordingReader
+from BF2AutoSpectator.common.config import Config
+from BF2AutoSpectator.histograms import HistogramStore, write_histogram_store, calc_bhattacharyya_distances, \
+    stack_histograms
+from BF2AutoSpectator.histograms.engine import calc_histogram
+from BF2AutoSpectator.histograms.regions import HistogramRegion, get_histogram_region
+
+
+def load_labels(path: str) -> Dict[str, bool]:
+    labels = {}
+    with open(path, 'r') as file:
+        for line in file:
+            if line.strip() == '':
+                continue
+            name, _, label = line.rstrip('\n').partition('\t')
+            if label.strip().lower() not in ['true', 'false']:
+                sys.exit(f'Invalid label for {name}: {label!r} (expected true or false)')
+            labels[name.strip()] = label.strip().lower() == 'true'
+
+    return labels
+
+
+def load_samples(recordings: List[str], store: HistogramStore, labels: Dict[str, bool]) \
+        -> Tuple[Dict[Tuple[str, str], Tuple[HistogramRegion, List[Tuple[ndarray, bool]]]], Dict[Tuple[str, str], int]]:
+    samples = {}
+    unlabeled: Dict[Tuple[str, str], int] = {}
+    for recording in recordings:
+        reader = RecordingReader(recording)
+        # Entries of unchanged regions reference the same image, which only needs to be used once
+        seen = set()
+        for entry in reader.get_entries():
+            if not entry.region_key.startswith('hists/'):
+                continue
+
+            region = get_histogram_region(store, entry.resolution, entry.region_key[len('hists/'):])
+            if region is None or (region.key, entry.chunk, entry.name) in seen:
+                continue
+            seen.add((region.key, entry.chunk, entry.name))
+
+            label = labels.get(f'{entry.chunk}/{entry.name}')
+            if label is None:
+                unlabeled[(entry.resolution, region.key)] = unlabeled.get((entry.resolution, region.key), 0) + 1
+                continue
+
+            image = reader.read_image(entry)
+            if image.ndim != 3:
+                continue
+
+            _, region_samples = samples.setdefault((entry.resolution, region.key), (region, []))
+            region_samples.append((calc_histogram(image), label))
+        reader.close()
+
+    return samples, unlabeled
+
+
+def calibrate_threshold(positive: ndarray, negative: ndarray) -> Optional[Tuple[float, float]]:
+    """
+    Find the threshold that separates positive from negative deltas with the largest margin
+    :param positive: deltas of samples that should match
+    :param negative: deltas of samples that should not match
+    :return: threshold and margin (None if the samples cannot be separated)
+    """
+    if positive.max() >= negative.min():
+        return None
+
+    return float((positive.max() + negative.min()) / 2), float((negative.min() - positive.max()) / 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Calibrate reference histograms and thresholds from recordings')
+    parser.add_argument('--recording', help='Path to recording to take labeled histogram regions from',
+                        type=str, action='append', required=True)
+    parser.add_argument('--labels', help='Path to file of (independently established) labels of recorded images',
+                        type=str, required=True)
+    parser.add_argument('--histograms', help='Path to base histogram store', type=str,
+                        default=os.path.join(Config.ROOT_DIR, 'histograms'))
+    parser.add_argument('--output', help='Path to directory to write calibrated histogram store to',
+                        type=str, required=True)
+    parser.add_argument('--min-samples', help='Number of positive and negative samples required to calibrate a region',
+                        type=int, default=5)
+    parser.add_argument('--keep-references', dest='keep_references', action='store_true',
+                        help='Only calibrate thresholds, keep reference histograms of base store')
+    parser.set_defaults(keep_references=False)
+    args = parser.parse_args()
+
+    base = HistogramStore(args.histograms)
+    samples, unlabeled = load_samples(args.recording, base, load_labels(args.labels))
+    for resolution, key in sorted(set(unlabeled) - set(samples)):
+        print(f'Not calibrating {resolution}/{key}: none of its {unlabeled[(resolution, key)]} recorded images '
+              f'are labeled')
+    if len(samples) == 0:
+        sys.exit('No labeled histogram regions found in recordings')
+
+    # Start from (in-memory copies of) the base store's histograms and thresholds
+    histograms = {
+        resolution: {key: np.array(base.get(resolution, key)) for key in base.get_keys(resolution)}
+        for resolution in base.get_resolutions()
+    }
+    thresholds = {resolution: dict(base.thresholds[resolution]) for resolution in base.get_resolutions()}
+
+    print(f'{"resolution":<10} {"region":<48} {"pos":>5} {"neg":>5} {"max pos":>8} {"min neg":>8} '
+          f'{"threshold":>9} {"margin":>7}')
+    calibrated = 0
+    for (resolution, key), (region, region_samples) in sorted(samples.items()):
+        positive = [histogram for histogram, label in region_samples if label]
+        negative = [histogram for histogram, label in region_samples if not label]
+        if len(positive) < args.min_samples:
+            print(f'{resolution:<10} {key:<48} {len(positive):>5} {len(negative):>5} (not enough positive samples)')
+            continue
+
+        reference = histograms.get(resolution, {}).get(region.reference_key)
+        if not args.keep_references or reference is None:
+            reference = np.mean(stack_histograms(positive), axis=0).astype(np.float32).reshape(-1, 1)
+            histograms.setdefault(resolution, {})[region.reference_key] = reference
+            # Any existing threshold was calibrated against the previous reference
+            thresholds.setdefault(resolution, {}).pop(key, None)
+
+        deltas = calc_bhattacharyya_distances(stack_histograms(positive + negative),
+                                              stack_histograms([reference]))[:, 0]
+        positive_deltas, negative_deltas = deltas[:len(positive)], deltas[len(positive):]
+        summary = f'{resolution:<10} {key:<48} {len(positive):>5} {len(negative):>5} {positive_deltas.max():>8.4f}'
+        if len(negative) < args.min_samples:
+            print(f'{summary} {"-":>8} (not enough negative samples, keeping default threshold)')
+            continue
+
+        result = calibrate_threshold(positive_deltas, negative_deltas)
+        if result is None:
+            print(f'{summary} {negative_deltas.min():>8.4f} (samples overlap, keeping default threshold)')
+            thresholds.setdefault(resolution, {}).pop(key, None)
+            continue
+
+        threshold, margin = result
+        thresholds.setdefault(resolution, {})[key] = threshold
+        calibrated += 1
+        print(f'{summary} {negative_deltas.min():>8.4f} {threshold:>9.4f} {margin:>7.4f}')
+
+    write_histogram_store(args.output, histograms, thresholds)
+
+    # Make sure the written store can be loaded and contains what was calibrated
+    store = HistogramStore(args.output)
+    for resolution, resolution_histograms in histograms.items():
+        for key, histogram in resolution_histograms.items():
+            if not (store.get(resolution, key) == histogram.reshape(-1, 1)).all():
+                sys.exit(f'Written histogram {resolution}/{key} differs from calibrated histogram')
+
+    print(f'Calibrated thresholds of {calibrated} regions, wrote histogram store to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Compile reference histograms from the legacy pickle format into a histogram store
+
+Usage: python -m BF2AutoSpectator.tools.compile_histograms [--pickle PATH] [--output PATH]
+"""
+import argparse
+import os
+import pickle
+import sys
+
+from BF2AutoSpectator.common.config import Config
+from BF2AutoSpectator.histograms import HistogramStore, flatten_histograms, write_histogram_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile pickled reference histograms into a histogram store')
+    parser.add_argument('--pickle', help='Path to pickled histograms', type=str,
+                        default=os.path.join(Config.ROOT_DIR, 'pickle', 'histograms.pickle'))
+    parser.add_argument('--output', help='Path to directory to write histogram store to', type=str,
+                        default=os.path.join(Config.ROOT_DIR, 'histograms'))
+    args = parser.parse_args()
+
+    with open(args.pickle, 'rb') as file:
+        histograms = pickle.load(file)
+
+    flattened = {resolution: flatten_histograms(histograms[resolution]) for resolution in histograms}
+    write_histogram_store(args.output, flattened)
+
+    # Make sure the store matches the pickle exactly
+    store = HistogramStore(args.output)
+    for resolution, resolution_histograms in flattened.items():
+        for key, histogram in resolution_histograms.items():
+            if not (store.get(resolution, key) == histogram.reshape(-1, 1)).all():
+                sys.exit(f'Compiled histogram {resolution}/{key} differs from pickled histogram')
+
+    print(f'Compiled {sum(len(h) for h in flattened.values())} histograms for {len(flattened)} resolutions '
+          f'into {args.output}')
+
+
+if __name__ == '__main__':
+    main()
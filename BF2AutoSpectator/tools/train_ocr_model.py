@@ -0,0 +1,191 @@
+"""
+Train a Tesseract model for the BF2 UI font from recorded OCR regions
+
+Training is done in two steps:
+1. harvest: take OCR regions from one or more recordings (see --record-path), apply the image operations the detectors
+   applied and write them as line images along with their (lower case) text, in the ground truth format used by
+   tesstrain. Only reads that exactly match a text the region is known to contain (the vocabulary of the region's OCR
+   profile or a known map name) are considered confirmed, since repeated reads of the generic model may just be
+   repeated misreads. Any harvested ground truth can (and should) be reviewed and corrected by hand before training.
+2. train: fine-tune the (best/float) eng model on the ground truth via tesstrain
+   (https://github.com/tesseract-ocr/tesstrain) and package it as an integer (fast) model. The ground truth only
+   covers the texts of labels and map names, but the model is used for every OCR region (e.g. also for map sizes, game
+   messages and the console). tesstrain merges the start model's character set (unicharset) with the one of the ground
+   truth, so the model keeps recognizing digits and punctuation. The packaged model is checked to still contain all of
+   REQUIRED_CHARACTERS. Requires make and the Tesseract training tools (lstmtraining, combine_tessdata etc.) to be on
+   the PATH.
+
+The resulting traineddata file can be selected via --ocr-model and --ocr-model-path.
+
+Usage: python -m BF2AutoSpectator.tools.train_ocr_model harvest --recording PATH [--recording PATH] --output PATH
+       python -m BF2AutoSpectator.tools.train_ocr_model train --ground-truth PATH --tesstrain PATH --tessdata PATH
+           --output PATH
+"""
+import argparse
+import os
+import string
+import subprocess
+import sys
+import tempfile
+from typing import List, Optional, Set, Tuple
+
+from PIL import Image
+
+from BF2AutoSpectator.capture.processing import apply_image_ops
+from BF2AutoSpectator.capture.recording import RecordingReader, RecordingEntry, deserialize_image_ops
+from BF2AutoSpectator.common import constants
+from BF2AutoSpectator.common.map_names import MapNameIndex, clean_map_name
+from BF2AutoSpectator.ocr.profiles import get_ocr_profile
+
+OCR_MODEL_NAME = 'bf2ui'
+# Characters regions without a vocabulary rely on, e.g. map sizes ("64"), game messages and console output ("> 1.5")
+REQUIRED_CHARACTERS = set(string.ascii_lowercase + string.digits + '.:>-/()\'')
+
+
+def get_confirmed_text(entry: RecordingEntry, index: MapNameIndex) -> Optional[str]:
+    """
+    Get the text of a recorded OCR region if the read is confirmed by a text the region is known to contain
+    :param entry: recorded OCR region
+    :param index: index of known map names
+    :return: confirmed text or None if the read cannot be confirmed
+    """
+    text = entry.text.strip(' \n\x0c').lower()
+    key = entry.region_key[len('ocr/'):]
+    # Map names are confirmed by exactly matching a known map name
+    if key == 'eor-map-details' and entry.crop == constants.COORDINATES[entry.resolution]['ocr'][key][0]:
+        return text if index.lookup(clean_map_name(text))[1] == 1.0 else None
+
+    # Any other text needs to exactly match the vocabulary of the region's profile
+    return text if text in get_ocr_profile(key).vocabulary else None
+
+
+def harvest(recordings: List[str], output: str) -> None:
+    os.makedirs(output, exist_ok=True)
+    index = MapNameIndex(constants.COORDINATES['spawns'].keys())
+
+    written, skipped = 0, 0
+    for recording in recordings:
+        reader = RecordingReader(recording)
+
+        # Each distinct image of a region only needs to be written once
+        seen: Set[Tuple[str, str, str]] = set()
+        for entry in reader.get_entries():
+            if not entry.region_key.startswith('ocr/') or entry.text is None or entry.text.strip() == '':
+                continue
+            if (entry.region_key, entry.chunk, entry.name) in seen:
+                continue
+            seen.add((entry.region_key, entry.chunk, entry.name))
+
+            text = get_confirmed_text(entry, index)
+            if text is None:
+                skipped += 1
+                continue
+
+            image = apply_image_ops(reader.read_image(entry), deserialize_image_ops(entry.image_ops))
+            name = f'{os.path.basename(os.path.normpath(recording))}-{os.path.splitext(entry.name)[0]}-' \
+                   f'{entry.region_key.replace("/", "-")}'
+            Image.fromarray(image).save(os.path.join(output, f'{name}.png'))
+            with open(os.path.join(output, f'{name}.gt.txt'), 'w', encoding='utf-8') as ground_truth:
+                ground_truth.write(text + '\n')
+            written += 1
+
+        reader.close()
+
+    print(f'Wrote {written} line images to {output} (skipped {skipped} unconfirmed reads)')
+
+
+def get_character_set(ground_truth: str) -> Set[str]:
+    characters = set()
+    for name in os.listdir(ground_truth):
+        if name.endswith('.gt.txt'):
+            with open(os.path.join(ground_truth, name), 'r', encoding='utf-8') as file:
+                characters.update(file.read().strip())
+
+    return characters
+
+
+def get_unicharset_characters(traineddata: str) -> Set[str]:
+    """
+    Get the characters a model can recognize
+    :param traineddata: path to traineddata file of the model
+    :return: characters of the model's LSTM unicharset
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        prefix = os.path.join(directory, 'model.')
+        subprocess.run(['combine_tessdata', '-u', traineddata, prefix], check=True, stdout=subprocess.DEVNULL)
+        with open(f'{prefix}lstm-unicharset', 'r', encoding='utf-8') as file:
+            # First line contains the number of entries, every other line starts with the (space separated) character
+            return set(line.split(' ', 1)[0] for line in file.read().splitlines()[1:] if line != '')
+
+
+def train(ground_truth: str, tesstrain: str, tessdata: str, output: str, model_name: str, start_model: str,
+          max_iterations: int) -> None:
+    characters = get_character_set(ground_truth)
+    if len(characters) == 0:
+        sys.exit(f'No ground truth found in {ground_truth}, run harvest first')
+    print(f'Training {model_name} on {len(characters)} characters: {"".join(sorted(characters))!r}')
+
+    make_args = [
+        f'MODEL_NAME={model_name}',
+        f'START_MODEL={start_model}',
+        f'TESSDATA={os.path.abspath(tessdata)}',
+        f'GROUND_TRUTH_DIR={os.path.abspath(ground_truth)}',
+        f'MAX_ITERATIONS={max_iterations}'
+    ]
+    model_dir = os.path.join(tesstrain, 'data', model_name)
+    os.makedirs(output, exist_ok=True)
+    try:
+        # tesstrain merges the start model's unicharset with the one derived from the ground truth
+        subprocess.run(['make', 'training', *make_args], cwd=tesstrain, check=True)
+        # Package the final checkpoint as an integer (fast) model, which is smaller and faster
+        # (the precision of a float model is not needed for a single font)
+        subprocess.run([
+            'lstmtraining',
+            '--stop_training',
+            '--convert_to_int',
+            '--continue_from', os.path.join(model_dir, 'checkpoints', f'{model_name}_checkpoint'),
+            '--traineddata', os.path.join(model_dir, f'{model_name}.traineddata'),
+            '--model_output', os.path.join(output, f'{model_name}.traineddata')
+        ], check=True)
+        missing = REQUIRED_CHARACTERS - get_unicharset_characters(os.path.join(output, f'{model_name}.traineddata'))
+    except (OSError, subprocess.CalledProcessError) as e:
+        sys.exit(f'Failed to train model via tesstrain: {e}')
+
+    if len(missing) > 0:
+        sys.exit(f'Trained model cannot recognize {"".join(sorted(missing))!r}, which other regions rely on '
+                 f'(use a start model that covers them)')
+
+    print(f'Wrote {model_name}.traineddata to {output}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train a Tesseract model for the BF2 UI font')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    harvest_parser = subparsers.add_parser('harvest', help='Harvest ground truth from recordings')
+    harvest_parser.add_argument('--recording', help='Path to recording to harvest OCR regions from',
+                                type=str, action='append', required=True)
+    harvest_parser.add_argument('--output', help='Path to directory to write ground truth to', type=str, required=True)
+
+    train_parser = subparsers.add_parser('train', help='Train model on harvested ground truth')
+    train_parser.add_argument('--ground-truth', help='Path to directory containing ground truth',
+                              type=str, required=True)
+    train_parser.add_argument('--tesstrain', help='Path to tesstrain checkout', type=str, required=True)
+    train_parser.add_argument('--tessdata', help='Path to tessdata folder containing the (best/float) start model',
+                              type=str, required=True)
+    train_parser.add_argument('--output', help='Path to directory to write traineddata file to',
+                              type=str, required=True)
+    train_parser.add_argument('--model-name', help='Name of model to train', type=str, default=OCR_MODEL_NAME)
+    train_parser.add_argument('--start-model', help='Name of model to fine-tune', type=str, default='eng')
+    train_parser.add_argument('--max-iterations', help='Number of training iterations', type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.command == 'harvest':
+        harvest(args.recording, args.output)
+    else:
+        train(args.ground_truth, args.tesstrain, args.tessdata, args.output, args.model_name, args.start_model,
+              args.max_iterations)
+
+
+if __name__ == '__main__':
+    main()
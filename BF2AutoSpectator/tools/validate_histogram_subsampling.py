@@ -0,0 +1,124 @@
+"""
+Validate subsampled histograms against full resolution histograms
+
+Regions can be taken from a recording (see --record-path, histogram regions are recorded as "hists/<region key>")
+and/or from recorded game window frames (see --replay-path), in which case all histogram regions are cropped from each
+frame. For each region, subsampling mode and factor, the drift of the delta to the region's reference histogram
+(compared to the delta at full resolution) is reported, along with how many match decisions subsampling would change.
+Only enable subsampling for regions (see constants.HISTOGRAM_SUBSAMPLING_FACTORS) at factors that change no decisions.
+
+Usage: python -m BF2AutoSpectator.tools.validate_histogram_subsampling [--recording PATH] [--replay PATH]
+"""
+import argparse
+import os
+import sys
+from typing import Dict, List, Tuple
+
+import numpy as np
+from numpy import ndarray
+
+from BF2AutoSpectator.capture import Frame, ReplayScreenSource
+from BF2AutoSpectator.capture.recording import RecordingReader
+from BF2AutoSpectator.common.config import Config
+from BF2AutoSpectator.histograms import HistogramStore, HISTOGRAM_SUBSAMPLING_MODES, subsample_image, \
+    calc_bhattacharyya_distances, stack_histograms
+from BF2AutoSpectator.histograms.engine import calc_histogram
+from BF2AutoSpectator.histograms.regions import HistogramRegion, get_histogram_regions
+
+
+def load_recorded(path: str, store: HistogramStore) -> List[Tuple[HistogramRegion, str, ndarray]]:
+    reader = RecordingReader(path)
+    regions: Dict[str, Dict[str, HistogramRegion]] = {}
+    samples = []
+    for entry in reader.get_entries():
+        if not entry.region_key.startswith('hists/'):
+            continue
+
+        if entry.resolution not in regions:
+            regions[entry.resolution] = {
+                region.key: region for region in get_histogram_regions(store, entry.resolution)
+            }
+        region = regions[entry.resolution].get(entry.region_key[len('hists/'):])
+        image = reader.read_image(entry)
+        if region is None or image.ndim != 3:
+            continue
+
+        samples.append((region, entry.resolution, image))
+    reader.close()
+
+    return samples
+
+
+def load_replayed(path: str, store: HistogramStore, resolution: str) -> List[Tuple[HistogramRegion, str, ndarray]]:
+    source = ReplayScreenSource(path, origin=(0, 0), loop=False)
+    regions = get_histogram_regions(store, resolution)
+    samples = []
+    for _ in range(len(source)):
+        image = source.next_image()
+        height, width, *_ = image.shape
+        frame = Frame(image, (0, 0, width, height))
+        samples.extend((region, resolution, frame.crop(region.crop)) for region in regions)
+    source.close()
+
+    return samples
+
+
+def validate(samples: List[Tuple[ndarray, float, ndarray]], mode: str, factor: int) -> Tuple[float, float, int]:
+    drifts = []
+    changed = 0
+    for image, max_delta, reference in samples:
+        full, subsampled = calc_bhattacharyya_distances(
+            stack_histograms([calc_histogram(image), calc_histogram(subsample_image(image, factor, mode))]),
+            stack_histograms([reference])
+        )[:, 0]
+        drifts.append(abs(subsampled - full))
+        changed += bool(full < max_delta) != bool(subsampled < max_delta)
+
+    return float(np.max(drifts)), float(np.mean(drifts)), changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate subsampled histograms against full resolution histograms')
+    parser.add_argument('--recording', help='Path to recording to take histogram regions from', type=str)
+    parser.add_argument('--replay', help='Path to directory/zip archive of recorded game window frames', type=str)
+    parser.add_argument('--resolution', help='Resolution of recorded game window frames', choices=['720p', '900p'],
+                        type=str, default='720p')
+    parser.add_argument('--histograms', help='Path to histogram store', type=str,
+                        default=os.path.join(Config.ROOT_DIR, 'histograms'))
+    parser.add_argument('--mode', help='Subsampling mode to validate', choices=HISTOGRAM_SUBSAMPLING_MODES,
+                        type=str, action='append')
+    parser.add_argument('--factor', help='Subsampling factor to validate', type=int, action='append')
+    args = parser.parse_args()
+
+    store = HistogramStore(args.histograms)
+    samples = []
+    if args.recording is not None:
+        samples.extend(load_recorded(args.recording, store))
+    if args.replay is not None:
+        samples.extend(load_replayed(args.replay, store, args.resolution))
+    if len(samples) == 0:
+        sys.exit('No histogram regions to validate, provide a --recording and/or --replay')
+
+    regions: Dict[Tuple[str, str], List[Tuple[ndarray, float, ndarray]]] = {}
+    for region, resolution, image in samples:
+        regions.setdefault((resolution, region.key), []).append(
+            (
+                image,
+                # Compare against the threshold detection actually uses, which may have been calibrated
+                store.get_threshold(resolution, region.key, region.max_delta),
+                store.get(resolution, region.reference_key)
+            )
+        )
+
+    print(f'{"resolution":<10} {"region":<48} {"images":>6} {"mode":>8} {"factor":>6} {"max drift":>10} '
+          f'{"mean drift":>10} {"changed":>8}')
+    for (resolution, key), region_samples in sorted(regions.items()):
+        for mode in args.mode or HISTOGRAM_SUBSAMPLING_MODES:
+            for factor in args.factor or [2, 4, 8]:
+                max_drift, mean_drift, changed = validate(region_samples, mode, factor)
+                print(f'{resolution:<10} {key:<48} {len(region_samples):>6} {mode:>8} {factor:>6} {max_drift:>10.4f} '
+                      f'{mean_drift:>10.4f} {changed:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import os
+import pickle
+
+import cv2
+import numpy as np
+import pytest
+
+from BF2AutoSpectator.histograms import HistogramStore, calc_bhattacharyya_distances, flatten_histograms, \
+    stack_histograms, write_histogram_store
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def pickled() -> dict:
+    with open(os.path.join(ROOT_DIR, 'pickle', 'histograms.pickle'), 'rb') as file:
+        histograms = pickle.load(file)
+
+    return {resolution: flatten_histograms(histograms[resolution]) for resolution in histograms}
+
+
+@pytest.fixture(scope='module')
+def store() -> HistogramStore:
+    return HistogramStore(os.path.join(ROOT_DIR, 'histograms'))
+
+
+def test_store_matches_pickle(pickled, store):
+    assert sorted(store.get_resolutions()) == sorted(pickled.keys())
+    for resolution, histograms in pickled.items():
+        assert sorted(store.get_keys(resolution)) == sorted(histograms.keys())
+        for key, histogram in histograms.items():
+            assert (store.get(resolution, key) == histogram).all()
+
+
+def test_stack_matches_pickle(pickled, store):
+    for resolution, histograms in pickled.items():
+        keys = store.get_keys(resolution, 'teams/')
+        stack = store.get_stack(resolution, keys)
+        assert stack.shape == (len(keys), 256)
+        for row, key in enumerate(keys):
+            assert (stack[row] == histograms[key].reshape(-1)).all()
+
+
+def test_bhattacharyya_distances_match_opencv(pickled, store):
+    keys = store.get_keys('720p', 'teams/')
+    references = store.get_stack('720p', keys)
+    observed = [pickled['720p'][key] for key in keys[:4]]
+
+    distances = calc_bhattacharyya_distances(stack_histograms(observed), references)
+    for i, histogram in enumerate(observed):
+        for j, key in enumerate(keys):
+            expected = cv2.compareHist(histogram, pickled['720p'][key], cv2.HISTCMP_BHATTACHARYYA)
+            assert distances[i, j] == pytest.approx(expected, abs=1e-5)
+
+
+def test_written_store_round_trips(tmp_path):
+    histograms = {'720p': {'menu/join-internet/active': np.arange(256, dtype=np.float32)}}
+    thresholds = {'720p': {'menu/join-internet': .25}}
+    write_histogram_store(str(tmp_path), histograms, thresholds)
+
+    store = HistogramStore(str(tmp_path))
+    assert (store.get('720p', 'menu/join-internet/active') == np.arange(256).reshape(-1, 1)).all()
+    assert store.get_threshold('720p', 'menu/join-internet', .1) == .25
+    assert store.get_threshold('720p', 'menu/join-internet-2', .1) == .1
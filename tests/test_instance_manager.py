@@ -0,0 +1,70 @@
+import os
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from BF2AutoSpectator.capture import ReplayScreenSource, get_screen_source, set_screen_source
+from BF2AutoSpectator.capture.recording import RecordingReader
+from BF2AutoSpectator.common.utility import Window
+from BF2AutoSpectator.game import GameInstanceManager
+from BF2AutoSpectator.histograms import HistogramStore
+from BF2AutoSpectator.histograms.engine import calc_histogram
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Game window whose client area (without title bar and shadow) is located at (8, 31)
+WINDOW = Window(1, 'BF2', (0, 0, 1296, 759), 'BF2', 1)
+# Regions in opposite corners of the window, which are captured separately
+OUTER_CROP = (0, 0, 1180, 620)
+INNER_CROP = (1180, 620, 0, 0)
+
+
+@pytest.fixture
+def frame_image(tmp_path) -> np.ndarray:
+    image = np.random.default_rng(0).integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+    os.makedirs(tmp_path / 'replay')
+    Image.fromarray(image).save(tmp_path / 'replay' / '0000.png')
+    previous = get_screen_source()
+    set_screen_source(ReplayScreenSource(str(tmp_path / 'replay'), origin=(8, 31)))
+    yield image
+    set_screen_source(previous)
+
+
+@pytest.fixture
+def gim(tmp_path, frame_image) -> GameInstanceManager:
+    gim = GameInstanceManager('', '', '', '720p', HistogramStore(os.path.join(ROOT_DIR, 'histograms')))
+    gim.game_window = WINDOW
+    gim.enable_recording(str(tmp_path / 'recording'))
+    return gim
+
+
+def read_recording(gim: GameInstanceManager, directory: str) -> RecordingReader:
+    deadline = time.time() + 5
+    while (len(gim.recorder.queue) > 0 or not os.path.isfile(os.path.join(directory, 'index.jsonl'))) and \
+            time.time() < deadline:
+        time.sleep(.01)
+    # Give the writer a moment to finish the entry it took from the queue
+    time.sleep(.1)
+    return RecordingReader(directory)
+
+
+def test_histogram_match_records_region_not_covered_by_shared_frame(tmp_path, gim, frame_image):
+    reference = calc_histogram(frame_image[620:, 1180:])
+    with gim.shared_frame(crops=[OUTER_CROP]) as frame:
+        assert not frame.covers([INNER_CROP])
+        assert gim.is_histogram_region_match('menu/multiplayer', INNER_CROP, reference)
+
+    reader = read_recording(gim, str(tmp_path / 'recording'))
+    entry, = reader.get_entries('hists/menu/multiplayer')
+    assert entry.verdict is True
+    assert (reader.read_image(entry) == frame_image[620:, 1180:]).all()
+
+
+def test_histogram_matches_record_regions_not_covered_by_shared_frame(tmp_path, gim, frame_image):
+    references = ['menu/multiplayer/active', 'menu/join-internet/active']
+    with gim.shared_frame(crops=[OUTER_CROP]):
+        matches = gim.are_histogram_regions_matching(['a', 'b'], [INNER_CROP, (1080, 520, 100, 100)], references)
+
+    reader = read_recording(gim, str(tmp_path / 'recording'))
+    assert [entry.verdict for entry in reader.get_entries('hists/a') + reader.get_entries('hists/b')] == matches
@@ -0,0 +1,57 @@
+import random
+
+import jellyfish
+
+from BF2AutoSpectator.common.map_names import MapNameIndex, clean_map_name
+
+MAP_NAMES = ['dalian-plant', 'daqing-oilfields', 'dragon-valley', 'fushe-pass', 'gulf-of-oman', 'kubra-dam',
+             'mashtuur-city', 'operation-clean-sweep', 'road-to-jalalabad', 'sharqi-peninsula', 'songhua-stalemate',
+             'strike-at-karkand', 'strike-at-karkand-2', 'wake-island-2007', 'zatar-wetlands']
+
+
+def test_search_matches_linear_scan():
+    index = MapNameIndex(MAP_NAMES)
+    rng = random.Random(0)
+    queries = MAP_NAMES + ['dalian-p1ant', 'strike-at-karkand-3', 'kubra', 'wake-island-1707', 'xyz']
+    for _ in range(50):
+        name = list(rng.choice(MAP_NAMES))
+        name[rng.randrange(len(name))] = rng.choice('abcdefghijklmnopqrstuvwxyz-0123456789')
+        queries.append(''.join(name))
+
+    for query in queries:
+        for max_distance in range(6):
+            expected = sorted(
+                (jellyfish.levenshtein_distance(query, name), name) for name in MAP_NAMES
+                if jellyfish.levenshtein_distance(query, name) <= max_distance
+            )
+            assert index.search(query, max_distance) == expected
+
+
+def test_search_of_empty_index():
+    assert MapNameIndex([]).search('dalian-plant', 3) == []
+
+
+def test_lookup_exact_name():
+    assert MapNameIndex(MAP_NAMES).lookup('kubra-dam') == ('kubra-dam', 1.0)
+
+
+def test_lookup_resolves_confusable_misreads():
+    index = MapNameIndex(MAP_NAMES)
+
+    assert index.lookup('dalian-p1ant')[0] == 'dalian-plant'
+    assert index.lookup('gu1f-0f-oman')[0] == 'gulf-of-oman'
+
+
+def test_lookup_does_not_resolve_unknown_maps():
+    index = MapNameIndex(MAP_NAMES)
+
+    # Unknown maps often only differ from known maps by a suffix
+    assert index.lookup('strike-at-karkand-3') == (None, 0.0)
+    assert index.lookup('kubra-dam-2') == (None, 0.0)
+    # Differs from a known map by substitutions that are not typical OCR errors
+    assert index.lookup('dalian-plank') == (None, 0.0)
+
+
+def test_clean_map_name():
+    assert clean_map_name('Dalian Plant') == 'dalian-plant'
+    assert clean_map_name('Strike_At  Karkand') == 'strike-at-karkand'
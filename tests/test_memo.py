@@ -0,0 +1,44 @@
+from BF2AutoSpectator.capture.memo import RegionResultCache
+
+
+def test_get_returns_put_result():
+    cache = RegionResultCache()
+    assert cache.get(('region', 1)) is None
+    cache.put(('region', 1), 'result')
+
+    assert cache.get(('region', 1)) == 'result'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_result_is_evicted():
+    cache = RegionResultCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    # Using a makes b the least recently used result
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_get_or_compute_only_computes_on_miss():
+    cache = RegionResultCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return False
+
+    assert cache.get_or_compute('a', compute) is False
+    assert cache.get_or_compute('a', compute) is False
+    assert len(calls) == 1
+
+
+def test_clear_removes_all_results():
+    cache = RegionResultCache()
+    cache.put('a', 1)
+    cache.clear()
+
+    assert cache.get('a') is None
@@ -0,0 +1,220 @@
+import base64
+import hashlib
+import io
+import json
+import re
+import socket
+import struct
+import threading
+from typing import Optional
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from BF2AutoSpectator.capture import OBSScreenSource
+
+WINDOW_REGION = (100, 50, 320, 180)
+
+
+@pytest.fixture
+def window() -> np.ndarray:
+    _, _, width, height = WINDOW_REGION
+    return np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def encode(image: np.ndarray, image_format: str) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, format='JPEG' if image_format == 'jpg' else image_format.upper())
+    return buffer.getvalue()
+
+
+class FakeOBS:
+    """
+    Stands in for the OBS websocket, answering source screenshot requests with an image of the game window
+    """
+    def __init__(self, window: np.ndarray):
+        self.window = window
+        self.requests = []
+
+    def get_source_screenshot(self, source_name: str, image_format: str, width: int, height: int,
+                              quality: int) -> bytes:
+        self.requests.append((source_name, image_format, width, height, quality))
+        image = np.asarray(Image.fromarray(self.window).resize((width, height)))
+        return encode(image, image_format)
+
+
+def test_small_region_sets_are_grabbed_losslessly(window):
+    obs = FakeOBS(window)
+    source = OBSScreenSource(obs.get_source_screenshot, 'game', lambda: WINDOW_REGION, image_format='jpg', scale=.5)
+
+    first, second = source.grab_many([(110, 60, 40, 20), (300, 200, 20, 30)])
+
+    # Both regions are served from a single (full size png) screenshot
+    assert obs.requests == [('game', 'png', 320, 180, -1)]
+    assert (first == window[10:30, 10:50]).all()
+    assert (second == window[150:180, 200:220]).all()
+
+
+def test_large_region_sets_are_grabbed_scaled(window):
+    obs = FakeOBS(window)
+    source = OBSScreenSource(obs.get_source_screenshot, 'game', lambda: WINDOW_REGION, image_format='jpg', scale=.5,
+                             quality=80)
+
+    image = source.grab(WINDOW_REGION)
+
+    assert obs.requests == [('game', 'jpg', 160, 90, 80)]
+    # Screenshot is scaled back up to the window's size
+    assert image.shape == window.shape
+
+
+def test_grab_without_window_fails(window):
+    source = OBSScreenSource(FakeOBS(window).get_source_screenshot, 'game', lambda: None)
+
+    with pytest.raises(ValueError):
+        source.grab(WINDOW_REGION)
+
+
+class MockOBSWebsocket:
+    """
+    Local websocket server speaking (the parts of) obs-websocket v5 (https://github.com/obsproject/obs-websocket)
+    needed to take source screenshots, serving screenshots of the game window
+    """
+    PASSWORD = 'secret'
+    SALT = 'salt'
+    CHALLENGE = 'challenge'
+
+    def __init__(self, window: np.ndarray):
+        self.window = window
+        self.requests = []
+        self.identified = False
+        self.server = socket.create_server(('127.0.0.1', 0))
+        self.port = self.server.getsockname()[1]
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def close(self) -> None:
+        self.server.close()
+        self.thread.join(5)
+
+    def serve(self) -> None:
+        try:
+            connection, _ = self.server.accept()
+        except OSError:
+            # Server was closed without any client connecting
+            return
+        with connection:
+            self.handshake(connection)
+            self.send(connection, {'op': 0, 'd': {
+                'obsWebSocketVersion': '5.0.0',
+                'rpcVersion': 1,
+                'authentication': {'challenge': self.CHALLENGE, 'salt': self.SALT}
+            }})
+            identify = self.receive(connection)
+            self.identified = identify['op'] == 1 and identify['d'].get('authentication') == self.get_auth()
+            if not self.identified:
+                return
+            self.send(connection, {'op': 2, 'd': {'negotiatedRpcVersion': 1}})
+
+            while (request := self.receive(connection)) is not None:
+                self.send(connection, {'op': 7, 'd': self.respond(request['d'])})
+
+    def respond(self, request: dict) -> dict:
+        response = {'requestType': request['requestType'], 'requestId': request['requestId']}
+        if request['requestType'] != 'GetSourceScreenshot':
+            return {**response, 'requestStatus': {'result': False, 'code': 204}}
+
+        data = request['requestData']
+        self.requests.append((data['sourceName'], data['imageFormat'], data['imageWidth'], data['imageHeight'],
+                              data['imageCompressionQuality']))
+        image = np.asarray(Image.fromarray(self.window).resize((data['imageWidth'], data['imageHeight'])))
+        image_data = base64.b64encode(encode(image, data['imageFormat'])).decode()
+        return {
+            **response,
+            'requestStatus': {'result': True, 'code': 100},
+            'responseData': {'imageData': f'data:image/{data["imageFormat"]};base64,{image_data}'}
+        }
+
+    def get_auth(self) -> str:
+        secret = base64.b64encode(hashlib.sha256((self.PASSWORD + self.SALT).encode()).digest())
+        return base64.b64encode(hashlib.sha256(secret + self.CHALLENGE.encode()).digest()).decode()
+
+    @staticmethod
+    def handshake(connection: socket.socket) -> None:
+        request = b''
+        while not request.endswith(b'\r\n\r\n'):
+            request += connection.recv(1024)
+        key = re.search(rb'Sec-WebSocket-Key: (\S+)', request, re.IGNORECASE).group(1)
+        accept = base64.b64encode(hashlib.sha1(key + b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11').digest())
+        connection.sendall(b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                           b'Sec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+
+    @staticmethod
+    def send(connection: socket.socket, message: dict) -> None:
+        payload = json.dumps(message).encode()
+        if len(payload) < 126:
+            header = struct.pack('!BB', 0x81, len(payload))
+        elif len(payload) < 2 ** 16:
+            header = struct.pack('!BBH', 0x81, 126, len(payload))
+        else:
+            header = struct.pack('!BBQ', 0x81, 127, len(payload))
+        connection.sendall(header + payload)
+
+    @staticmethod
+    def receive(connection: socket.socket) -> Optional[dict]:
+        def read(size: int) -> bytes:
+            data = b''
+            while len(data) < size:
+                chunk = connection.recv(size - len(data))
+                if chunk == b'':
+                    raise ConnectionError('Client disconnected')
+                data += chunk
+            return data
+
+        try:
+            first, second = read(2)
+            length = second & 0x7f
+            if length == 126:
+                length, = struct.unpack('!H', read(2))
+            elif length == 127:
+                length, = struct.unpack('!Q', read(8))
+            # Client frames are always masked
+            mask = read(4)
+            payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(read(length)))
+        except ConnectionError:
+            return None
+
+        # Connection close frame
+        if first & 0x0f == 0x8:
+            return None
+
+        return json.loads(payload)
+
+
+@pytest.fixture
+def mock_obs(window) -> MockOBSWebsocket:
+    mock_obs = MockOBSWebsocket(window)
+    yield mock_obs
+    mock_obs.close()
+
+
+def test_obs_client_source_screenshot(window, mock_obs):
+    pytest.importorskip('obsws_python')
+    pytest.importorskip('socketio')
+    from BF2AutoSpectator.remote import OBSClient
+
+    client = OBSClient(f'ws://:{MockOBSWebsocket.PASSWORD}@127.0.0.1:{mock_obs.port}')
+    client.connect()
+    try:
+        source = OBSScreenSource(client.get_source_screenshot, 'game', lambda: WINDOW_REGION, image_format='jpg',
+                                 scale=.5, quality=80)
+
+        region = source.grab((110, 60, 40, 20))
+        window_image = source.grab(WINDOW_REGION)
+    finally:
+        client.disconnect()
+
+    assert mock_obs.identified
+    assert mock_obs.requests == [('game', 'png', 320, 180, 80), ('game', 'jpg', 160, 90, 80)]
+    assert (region == window[10:30, 10:50]).all()
+    assert window_image.shape == window.shape
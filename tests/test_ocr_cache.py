@@ -0,0 +1,49 @@
+import cv2
+import numpy as np
+
+from BF2AutoSpectator.capture.processing import get_difference_hash
+from BF2AutoSpectator.ocr.cache import OCRResultCache
+
+
+def render_text(text: str) -> np.ndarray:
+    # Same size as the game message text region
+    image = np.zeros((18, 470), dtype=np.uint8)
+    cv2.putText(image, text, (2, 14), cv2.FONT_HERSHEY_PLAIN, 1, 255, 1)
+    return image
+
+
+def test_similar_hashes_re_use_result():
+    cache = OCRResultCache(max_distance=4)
+    cache.put('region', 0b1111, 'join game')
+
+    assert cache.get('region', 0b1110) == 'join game'
+    assert cache.get('region', 0b0000) == 'join game'
+    assert cache.get('region', 0b10000 | 0b0000) is None
+
+
+def test_exact_hashes_only_when_requested():
+    cache = OCRResultCache(max_distance=4)
+    cache.put('region', 0b1111, 'you are banned 1')
+
+    assert cache.get('region', 0b1111, max_distance=0) == 'you are banned 1'
+    assert cache.get('region', 0b1110, max_distance=0) is None
+
+
+def test_changed_character_of_free_text_is_not_re_used():
+    cache = OCRResultCache(max_distance=4)
+    first, second = render_text('Server restarting in 10'), render_text('Server restarting in 18')
+    cache.put('game-message-text', get_difference_hash(first), 'server restarting in 10')
+
+    assert cache.get('game-message-text', get_difference_hash(second), max_distance=0) is None
+    assert cache.get('game-message-text', get_difference_hash(first), max_distance=0) == 'server restarting in 10'
+
+
+def test_least_recently_used_result_is_evicted():
+    cache = OCRResultCache(maxsize=2, max_distance=0)
+    cache.put('a', 1, 'a')
+    cache.put('b', 1, 'b')
+    cache.get('a', 1)
+    cache.put('c', 1, 'c')
+
+    assert cache.get('b', 1) is None
+    assert cache.get('a', 1) == 'a'
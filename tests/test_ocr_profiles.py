@@ -0,0 +1,20 @@
+import os
+
+from BF2AutoSpectator.ocr.profiles import OCRProfile, get_label_profile, remove_user_words_files
+
+
+def test_user_words_are_written_to_shared_file():
+    first = get_label_profile('disconnect')
+    second = get_label_profile('disconnect')
+    assert first.get_ocr_config() == second.get_ocr_config()
+
+    path = first.get_ocr_config().split('--user-words ')[1].strip('"')
+    with open(path, 'r', encoding='utf-8') as file:
+        assert file.read() == 'disconnect\n'
+
+    remove_user_words_files()
+    assert not os.path.exists(path)
+
+
+def test_ocr_config_without_user_words():
+    assert OCRProfile(psm=8, whitelist='abc').get_ocr_config() == '--oem 3 --psm 8 -c tessedit_char_whitelist=abc'
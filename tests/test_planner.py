@@ -0,0 +1,52 @@
+from BF2AutoSpectator.capture.planner import CapturePlan, contains, crop_to_box, plan_capture
+
+SIZE = (1280, 720)
+
+
+def covers(plan: CapturePlan, crops: list) -> bool:
+    return all(any(contains(box, crop_to_box(crop, plan.size)) for box in plan.boxes) for crop in crops)
+
+
+def test_crop_to_box():
+    assert crop_to_box((10, 20, 30, 40), SIZE) == (10, 20, 1250, 680)
+
+
+def test_contained_regions_are_not_captured_separately():
+    crops = [(100, 100, 100, 100), (200, 200, 200, 200)]
+    plan = plan_capture(crops, SIZE)
+
+    assert plan.boxes == [crop_to_box(crops[0], SIZE)]
+
+
+def test_nearby_regions_are_merged():
+    # Two small regions next to each other: capturing the gap costs less than the capture overhead
+    crops = [(100, 100, 1100, 600), (190, 100, 1010, 600)]
+    plan = plan_capture(crops, SIZE)
+
+    assert plan.boxes == [(100, 100, 270, 120)]
+    assert covers(plan, crops)
+
+
+def test_distant_regions_are_not_merged():
+    # Two regions in opposite corners: capturing everything in between costs more than a second capture
+    crops = [(0, 0, 1180, 620), (1180, 620, 0, 0)]
+    plan = plan_capture(crops, SIZE)
+
+    assert sorted(plan.boxes) == [(0, 0, 100, 100), (1180, 620, 1280, 720)]
+    assert covers(plan, crops)
+
+
+def test_merged_boxes_are_merged_further():
+    # Merging two of the regions saves enough to then also merge the merged box with the third one
+    crops = [(100, 100, 1100, 600), (150, 100, 1050, 600), (210, 100, 990, 600)]
+    plan = plan_capture(crops, SIZE, overhead=1000)
+
+    assert plan.boxes == [(100, 100, 290, 120)]
+    assert covers(plan, crops)
+
+
+def test_get_regions_are_relative_to_origin():
+    plan = CapturePlan(SIZE, [(100, 100, 180, 120)])
+
+    assert plan.get_regions((50, 60)) == [(150, 160, 80, 20)]
+    assert plan.get_pixel_count() == 80 * 20
@@ -0,0 +1,105 @@
+import cv2
+import numpy as np
+import pytest
+from PIL import Image, ImageOps
+
+from BF2AutoSpectator.capture.processing import ImageOperation, apply_image_ops, apply_image_ops_sequentially, \
+    colorize_lut, compile_image_ops
+
+# Image operation chains used by the detectors
+IMAGE_OPS_CHAINS = [
+    [(ImageOperation.invert, None)],
+    [(ImageOperation.invert, None), (ImageOperation.solarize, {'threshold': 2})],
+    [(ImageOperation.grayscale, None)],
+    [
+        (ImageOperation.grayscale, None),
+        (ImageOperation.colorize, {'black': '#000', 'white': '#fff', 'blackpoint': 30, 'whitepoint': 175}),
+        (ImageOperation.invert, None)
+    ],
+    [
+        (ImageOperation.grayscale, None),
+        (ImageOperation.colorize, {'black': '#000', 'white': '#fff', 'blackpoint': 100, 'whitepoint': 200})
+    ],
+    [
+        (ImageOperation.grayscale, None),
+        (ImageOperation.colorize, {'black': '#000', 'white': '#f00', 'mid': '#0f0', 'blackpoint': 20,
+                                   'whitepoint': 220, 'midpoint': 90})
+    ],
+]
+
+
+def apply_pil_image_ops(image: np.ndarray, image_ops: list) -> np.ndarray:
+    pil_image = Image.fromarray(image)
+    for operation, args in image_ops:
+        args = args if args is not None else {}
+        if operation is ImageOperation.invert:
+            pil_image = ImageOps.invert(pil_image)
+        elif operation is ImageOperation.solarize:
+            pil_image = ImageOps.solarize(pil_image, **args)
+        elif operation is ImageOperation.grayscale:
+            pil_image = ImageOps.grayscale(pil_image)
+        elif operation is ImageOperation.colorize:
+            pil_image = ImageOps.colorize(pil_image, **args)
+
+    return np.asarray(pil_image)
+
+
+@pytest.fixture
+def image() -> np.ndarray:
+    return np.random.default_rng(0).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize('image_ops', IMAGE_OPS_CHAINS)
+def test_compiled_image_ops_match_pil(image, image_ops):
+    compiled = compile_image_ops(image_ops)
+    assert compiled is not None
+
+    # Grayscale conversion may round differently than PIL's (by one at most), which would be amplified by any
+    # subsequent operations, so compare the lookup table part on the same grayscale image
+    if image_ops[0][0] is ImageOperation.grayscale:
+        grayscale = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        assert np.abs(grayscale.astype(int) - apply_pil_image_ops(image, image_ops[:1]).astype(int)).max() <= 1
+        image, image_ops = grayscale, image_ops[1:]
+
+    actual, expected = compiled.apply(image), apply_pil_image_ops(image, image_ops)
+    # Colorizing with shades of gray only yields a single channel (PIL always returns RGB)
+    if actual.ndim == 2 and expected.ndim == 3:
+        assert (expected == expected[:, :, :1]).all()
+        expected = expected[:, :, 0]
+    assert (actual == expected).all()
+
+
+@pytest.mark.parametrize('image_ops', IMAGE_OPS_CHAINS)
+def test_compiled_image_ops_match_sequential_image_ops(image, image_ops):
+    assert (compile_image_ops(image_ops).apply(image) == apply_image_ops_sequentially(image, image_ops)).all()
+
+
+def test_colorize_lut_matches_pil():
+    gradient = np.arange(256, dtype=np.uint8).reshape(1, -1)
+    for args in [
+        {'black': '#000', 'white': '#fff', 'blackpoint': 30, 'whitepoint': 175},
+        {'black': '#000', 'white': '#fff', 'blackpoint': 50, 'whitepoint': 135},
+        {'black': '#123', 'white': '#fe0', 'mid': '#080', 'blackpoint': 10, 'whitepoint': 240, 'midpoint': 100},
+    ]:
+        lut = colorize_lut(**args)
+        expected = np.asarray(ImageOps.colorize(Image.fromarray(gradient), **args))[0]
+        if lut.ndim == 1:
+            expected = expected[:, 0]
+        assert (lut == expected).all()
+
+
+def test_image_ops_that_cannot_be_fused_are_applied_sequentially(image):
+    image_ops = [(ImageOperation.invert, None), (ImageOperation.grayscale, None)]
+    assert compile_image_ops(image_ops) is None
+
+    expected = apply_pil_image_ops(image, image_ops)
+    assert np.abs(apply_image_ops(image, image_ops).astype(int) - expected.astype(int)).max() <= 1
+
+
+def test_image_ops_do_not_modify_image(image):
+    original = image.copy()
+    for image_ops in IMAGE_OPS_CHAINS:
+        apply_image_ops(image, image_ops)
+        apply_image_ops_sequentially(image, image_ops)
+
+    assert (image == original).all()
@@ -0,0 +1,68 @@
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from BF2AutoSpectator.capture import ReplayScreenSource, get_screen_source, set_screen_source
+from BF2AutoSpectator.capture.processing import ImageOperation
+from BF2AutoSpectator.capture.vision import capture_region, capture_region_crops, process_frame, \
+    histogram_frame_region, calc_cv2_hist
+from BF2AutoSpectator.common.config import Config
+
+REGION = (100, 50, 320, 180)
+
+
+@pytest.fixture
+def frames(tmp_path) -> list:
+    _, _, width, height = REGION
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(2)]
+    for i, image in enumerate(images):
+        Image.fromarray(image).save(tmp_path / f'{i:04d}.png')
+
+    return images
+
+
+@pytest.fixture
+def replay(tmp_path, frames):
+    # Options are usually set from the command line arguments
+    Config().set_debug_screenshot(False)
+    previous = get_screen_source()
+    source = ReplayScreenSource(str(tmp_path), origin=REGION[:2])
+    set_screen_source(source)
+    yield source
+    set_screen_source(previous)
+
+
+def test_capture_region_serves_replayed_frames(replay, frames):
+    first, second, third = capture_region(REGION), capture_region(REGION), capture_region(REGION)
+
+    assert (first.image == frames[0]).all()
+    assert (second.image == frames[1]).all()
+    # Replay starts over after the last frame
+    assert (third.image == frames[0]).all()
+
+
+def test_capture_region_crops_covers_all_crops(replay, frames):
+    crops = [(10, 10, 270, 150), (250, 140, 10, 10)]
+    frame = capture_region_crops(REGION, crops)
+
+    assert frame.covers(crops)
+    assert (frame.crop(crops[0]) == frames[0][10:30, 10:50]).all()
+    assert (frame.crop(crops[1]) == frames[0][140:170, 250:310]).all()
+
+
+def test_process_frame_applies_image_ops_to_each_crop(replay, frames):
+    frame = capture_region(REGION)
+    first, second = process_frame(frame, [(ImageOperation.invert, None)], [(0, 0, 300, 170), (300, 170, 0, 0)])
+
+    assert (first == 255 - frames[0][:10, :20]).all()
+    assert (second == 255 - frames[0][170:, 300:]).all()
+
+
+def test_histogram_frame_region(replay, frames):
+    frame = capture_region(REGION)
+    histogram = histogram_frame_region(frame, (20, 10, 20, 10))
+
+    assert (histogram == cv2.calcHist([frames[0][10:170, 20:300]], [2], None, [256], [0, 256])).all()
+    assert (histogram == calc_cv2_hist(frames[0][10:170, 20:300])).all()